@@ -112,14 +112,17 @@ class CanvasTracked(Canvas):
             pass
         
 
-    def get_part(self, id=None, type=None, sub_type=None, row=None, col=None):
+    def get_part(self, id=None, type=None, sub_type=None, row=None, col=None,
+                 tag=None):
         """ Get basic part
         :id: unique part id
+        :tag: part tag
         :returns: part, None if not found
         """
         if self.parts_control is None:
             raise SelectError("get_part can't function because parts_control not set")
-        return self.parts_control.get_part(id=id, type=type, sub_type=sub_type, row=row, col=col)
+        return self.parts_control.get_part(id=id, type=type, sub_type=sub_type, row=row, col=col,
+                                           tag=tag)
 
 
     def get_tracked(self, start=None, part=None):
@@ -194,10 +197,9 @@ class CanvasTracked(Canvas):
     def get_part_from_tags(self, tags):
         for tag in tags:
             if tag.startswith("part:"):
-                match = re.search(r'id:(\d+)', tag)
-                if match:
-                    part_id = int(match.group(1))
-                    return self.get_part(part_id)
+                part = self.get_part(tag=tag)
+                if part is not None:
+                    return part
         return None
     
     
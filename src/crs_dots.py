@@ -121,6 +121,8 @@ SlTrace.lg(pgm_info)
 btmove = 1.             #  Seconds between moves
 display_game = True     # True - display game as played, else suppress display
 profile_running = False # True - run cprofile over running_loop
+timing_interval = None  # Seconds between play timing snapshots
+timing_file = None      # Play timing snapshot JSON file, else log
 ew_display = 7
 ew_select = 7
 ew_standoff = 8
@@ -167,6 +169,11 @@ parser.add_argument('--snapshot_dir', dest='snapshot_dir', default=snapshot_dir,
                               f" (default: {snapshot_dir}"))
 parser.add_argument('--speed_step', type=float, dest='speed_step', default=speed_step)
 parser.add_argument('--stroke_move', type=str2bool, dest='stroke_move', default=stroke_move)
+parser.add_argument('--timing_interval=', type=float, dest='timing_interval',
+                    default=timing_interval,
+                    help="Seconds between play timing snapshots")
+parser.add_argument('--timing_file=', dest='timing_file', default=timing_file,
+                    help="Play timing snapshot JSON file (default: log)")
 parser.add_argument('--trace', dest='trace', default=trace)
 parser.add_argument('--undo_micro_move', type=str2bool, dest='undo_micro_move',
                                      default=undo_micro_move)
@@ -201,6 +208,8 @@ speed_step = args.speed_step
 src_lst = args.src_lst
 stx_lst = args.stx_lst
 stroke_move = args.stroke_move
+timing_interval = args.timing_interval
+timing_file = args.timing_file
 undo_micro_move = args.undo_micro_move
 trace = args.trace
 if trace:
@@ -443,6 +452,8 @@ def end_game():
             ps = pstats.Stats(sp.pr, stream=s).sort_stats(sortby)
             ps.print_stats()
             SlTrace.lg(s.getvalue())
+        if timing_interval is not None or timing_file is not None:
+            sp.play_timing.write_snapshot()
 
         SlTrace.lg("end_game:  game={:d}".
                    format(sp.ngame))
@@ -564,7 +575,9 @@ def set_dots_button():
                         after_move=after_move,
                         show_ties=show_ties,
                         undo_micro_move=undo_micro_move,
-                        undo_len=undo_len)
+                        undo_len=undo_len,
+                        timing_interval=timing_interval,
+                        timing_file=timing_file)
         ###if command_stream is not None:
         ###    command_stream.set_play_control(sp)
         ###    command_stream.set_cmd_stream_proc(sp.cmd_stream_proc)
@@ -0,0 +1,17 @@
+# __init__.py
+"""
+Benchmarks of the dots game hot paths, across board sizes
+
+    bench_results   BenchResults - timing, JSON output, baseline comparison
+    bench_engine    headless benchmarks: DotsShadow, MoveList, DotsEngine
+                    auto play and games, results file parsing
+    bench_ui        Tk benchmarks: SelectArea hit testing, command undo/redo,
+                    board reset
+
+Run, from src:
+    python -m dots_bench --sizes=3,5,10,25 --output=bench.json
+    python -m dots_bench --baseline=bench.json
+Runs are compared, unless a baseline is given, with the reference
+baseline bench_baseline.json, kept in this package.
+"""
+from dots_bench.bench_results import BenchResults
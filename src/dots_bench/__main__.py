@@ -0,0 +1,83 @@
+# __main__.py
+"""
+Run dots benchmarks, from src:
+    python -m dots_bench [--sizes=3,5,10,25] [--groups=shadow,game,...]
+                         [--seconds=1] [--output=bench.json]
+                         [--baseline=bench.json | --no_baseline]
+                         [--tolerance=.2] [--save_baseline]
+Results are compared with the baseline, by default the reference
+baseline, dots_bench/bench_baseline.json (BASELINE_FILE).
+Exits with status 1 if, compared with the baseline, any benchmark
+has slowed by more than the tolerance.
+--save_baseline replaces the reference baseline with this run's
+results e.g. on a new machine.
+"""
+import argparse
+import os
+import sys
+
+from select_trace import SlTrace
+from dots_bench.bench_results import BenchResults, BASELINE_FILE
+from dots_bench.bench_engine import ENGINE_GROUPS, run_engine_benches
+from dots_bench.bench_ui import UI_GROUPS, run_ui_benches
+
+sizes = "3,5,10,25"
+groups = ",".join(list(ENGINE_GROUPS) + list(UI_GROUPS))
+seconds = 1.0
+output = None
+baseline = BASELINE_FILE
+no_baseline = False
+save_baseline = False
+tolerance = .2
+no_bitboard = False
+trace = ""
+parser = argparse.ArgumentParser()
+parser.add_argument('--sizes=', dest='sizes', default=sizes)
+parser.add_argument('--groups=', dest='groups', default=groups,
+                    help="benchmark groups: " + groups)
+parser.add_argument('--seconds=', type=float, dest='seconds', default=seconds)
+parser.add_argument('--output=', dest='output', default=output,
+                    help="JSON results file")
+parser.add_argument('--baseline=', dest='baseline', default=baseline,
+                    help="JSON results file to compare against"
+                         " default: reference baseline")
+parser.add_argument('--no_baseline', action='store_true', dest='no_baseline',
+                    default=no_baseline, help="no baseline comparison")
+parser.add_argument('--save_baseline', action='store_true', dest='save_baseline',
+                    default=save_baseline,
+                    help="save results as the reference baseline")
+parser.add_argument('--tolerance=', type=float, dest='tolerance', default=tolerance)
+parser.add_argument('--no_bitboard', action='store_true', dest='no_bitboard',
+                    default=no_bitboard)
+parser.add_argument('--trace', dest='trace', default=trace)
+args = parser.parse_args()             # or die "Illegal options"
+if args.trace:
+    SlTrace.setFlags(args.trace)
+size_list = [int(x) for x in args.sizes.split(",")]
+group_list = args.groups.split(",")
+for group in group_list:
+    if group not in ENGINE_GROUPS and group not in UI_GROUPS:
+        SlTrace.lg("Unrecognized benchmark group: %s" % group)
+        sys.exit(2)
+
+results = BenchResults(seconds=args.seconds)
+results.info["use_bitboard"] = not args.no_bitboard
+run_engine_benches(results, size_list, groups=group_list,
+                   use_bitboard=not args.no_bitboard)
+run_ui_benches(results, size_list, groups=group_list)
+if args.output is not None:
+    results.save(args.output)
+regressions = None
+if not args.no_baseline:
+    if os.path.isfile(args.baseline):
+        regressions = results.compare(BenchResults.load(args.baseline),
+                                      tolerance=args.tolerance)
+    else:
+        SlTrace.lg("No baseline %s - not compared" % args.baseline)
+if args.save_baseline:
+    results.save(BASELINE_FILE)
+if regressions:
+    SlTrace.lg("%d regressions over %.0f%%" % (len(regressions), args.tolerance*100))
+    sys.exit(1)
+if regressions is not None:
+    SlTrace.lg("No regressions")
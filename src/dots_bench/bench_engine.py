@@ -0,0 +1,229 @@
+# bench_engine.py
+"""
+Headless benchmarks - no Tk or canvas needed
+
+    shadow      DotsShadow get_legal_list, get_square_moves,
+                get_square_distance_list, make_move / unmake_move
+                and copy on a half played board
+    move_list   MoveList add_move, rand_obj, iteration, mask filter
+    auto_play   DotsEngine.auto_play per move, by player level -
+                the SelectPlay.auto_play strategies on the shadow
+    game        complete DotsEngine game, per game and per move
+    load        results file reading, per game: DotsGameParser,
+                DotsGameLoad (.gmres and .gmbin), DotsGameBin
+"""
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from select_trace import SlTrace
+from move_list import MoveList, MVP
+from dots_engine import DotsEngine, DotsEnginePlayer
+from dots_game_file import DotsGameFile
+from dots_game_load import DotsGameLoad
+from dots_game_parser import DotsGameParser
+from dots_game_bin import DotsGameBin, convert_gmres
+
+
+def size_name(name, size):
+    """ Benchmark name with board size
+    :name: benchmark name
+    :size: board size
+    """
+    return "%s[%dx%d]" % (name, size, size)
+
+
+def get_engine(size, levels=(2, 2), use_bitboard=True, results_file=None):
+    """ Engine with a player per level
+    :size: board size (rows and columns)
+    :levels: player levels default: two level 2 players
+    :use_bitboard: shadow uses DotsBitBoard default: True
+    :results_file: DotsGameFile, if any
+    """
+    players = [DotsEnginePlayer(level=level) for level in levels]
+    return DotsEngine(nrows=size, ncols=size, players=players,
+                      use_bitboard=use_bitboard, results_file=results_file)
+
+
+def get_mid_game(size, use_bitboard=True, seed=1):
+    """ Engine with game half played
+    :size: board size
+    :use_bitboard: shadow uses DotsBitBoard default: True
+    :seed: random seed default: 1
+    """
+    random.seed(seed)
+    engine = get_engine(size, use_bitboard=use_bitboard)
+    nmove = engine.shadow.get_num_legal_moves()//2
+    for _ in range(nmove):
+        mvp = engine.auto_play(engine.players[engine.player_index])
+        if mvp is None:
+            break
+        engine.new_edge(mvp)
+    return engine
+
+
+def bench_shadow(results, size, use_bitboard=True):
+    """ DotsShadow move queries
+    The cached legal list is cleared before each call, so each call
+    reads the open edges as after a move.
+    """
+    shadow = get_mid_game(size, use_bitboard=use_bitboard).shadow
+
+    def get_legal_list():
+        shadow.legal_list = None
+        return shadow.get_legal_list()
+
+    results.time_loop(size_name("shadow.get_legal_list", size), get_legal_list)
+    shadow.get_legal_list()
+    results.time_loop(size_name("shadow.get_square_moves", size),
+                      shadow.get_square_moves)
+    results.time_loop(size_name("shadow.get_square_distance_list", size),
+                      shadow.get_square_distance_list)
+    index = int(shadow.open_edges[0])
+
+    def make_unmake():
+        shadow.make_move(index, 1)
+        shadow.unmake_move()
+
+    results.time_loop(size_name("shadow.make_unmake_move", size), make_unmake)
+    results.time_loop(size_name("shadow.copy", size), shadow.copy)
+
+
+def bench_move_list(results, size, use_bitboard=True):
+    """ MoveList operations, per move, on the legal moves of a
+    half played board
+    """
+    shadow = get_mid_game(size, use_bitboard=use_bitboard).shadow
+    legals = shadow.get_legal_list()
+    nmove = legals.get_nmoves()
+    mvps = [legals.get_mvp(i) for i in range(nmove)]
+    mask = np.arange(nmove) % 2 == 0
+
+    def add_moves():
+        move_list = MoveList(shadow, max_move=nmove)
+        for mvp in mvps:
+            move_list.add_move(mvp)
+
+    def iterate():
+        for _ in legals:
+            pass
+
+    def filter_moves():
+        legals.filter(mask)
+
+    results.time_loop(size_name("move_list.add_move", size), add_moves,
+                      ops_per_call=nmove)
+    results.time_loop(size_name("move_list.rand_obj", size), legals.rand_obj)
+    results.time_loop(size_name("move_list.iter", size), iterate,
+                      ops_per_call=nmove)
+    results.time_loop(size_name("move_list.filter", size), filter_moves,
+                      ops_per_call=nmove)
+
+
+def bench_auto_play(results, size, levels=(1, 2, 3), use_bitboard=True):
+    """ DotsEngine.auto_play time per move, over complete games, by level
+    Only move choice is timed, not making the move.
+    """
+    perf_counter = time.perf_counter
+    for level in levels:
+        engine = get_engine(size, levels=(level, level), use_bitboard=use_bitboard)
+        random.seed(1)
+        nmove = 0
+        sec = 0.
+        while sec < results.seconds or nmove < results.min_calls:
+            engine.new_game()
+            while True:
+                player = engine.players[engine.player_index]
+                time_beg = perf_counter()
+                mvp = engine.auto_play(player)
+                sec += perf_counter() - time_beg
+                if mvp is None:
+                    break
+                nmove += 1
+                engine.new_edge(mvp)
+        results.add(size_name("auto_play.level%d" % level, size), nmove, sec)
+
+
+def bench_game(results, size, use_bitboard=True):
+    """ Complete game between level 2 players, per game and per move
+    """
+    engine = get_engine(size, use_bitboard=use_bitboard)
+    nmove = engine.shadow.get_num_legal_moves()
+    random.seed(1)
+    results.time_calls(size_name("engine.game", size), engine.play_game)
+    res = results.results[size_name("engine.game", size)]
+    results.add(size_name("engine.game_move", size), res["calls"],
+                res["calls"]*res["sec_per_op"], ops_per_call=nmove)
+
+
+def bench_load(results, size, ngame=20, use_bitboard=True):
+    """ Reading results files, per game
+    A .gmres file of ngame games is written, by DotsGameFile, to a
+    temporary directory and converted to .gmbin
+    """
+    file_dir = tempfile.mkdtemp(prefix="dots_bench_")
+    try:
+        rF = DotsGameFile(file_dir=file_dir, file_prefix="bench%d" % size,
+                          history="dots_bench", pgm_info="size=%d" % size)
+        engine = get_engine(size, use_bitboard=use_bitboard, results_file=rF)
+        random.seed(1)
+        engine.play_games(ngame)
+        rF.end_file()
+        gmres_file = rF.file_path
+        bin_file = os.path.splitext(gmres_file)[0] + ".gmbin"
+        convert_gmres(gmres_file, bin_file)
+
+        def parse():
+            for _ in DotsGameParser(gmres_file).games():
+                pass
+
+        def load_gmres():
+            DotsGameLoad(file_dir=file_dir,
+                         log_files=False).load_game_file(file_name=gmres_file)
+
+        def load_gmbin():
+            DotsGameLoad(file_dir=file_dir,
+                         log_files=False).load_game_file(file_name=bin_file)
+
+        def bin_results():
+            gb = DotsGameBin(bin_file)
+            gb.get_results_array(gb.select(nrow=size, ncol=size))
+
+        results.time_calls(size_name("load.parser", size), parse, ops_per_call=ngame)
+        results.time_calls(size_name("load.gmres", size), load_gmres, ops_per_call=ngame)
+        results.time_calls(size_name("load.gmbin", size), load_gmbin, ops_per_call=ngame)
+        results.time_calls(size_name("load.bin_results", size), bin_results,
+                           ops_per_call=ngame)
+    finally:
+        shutil.rmtree(file_dir, ignore_errors=True)
+
+
+ENGINE_GROUPS = {
+    "shadow" : bench_shadow,
+    "move_list" : bench_move_list,
+    "auto_play" : bench_auto_play,
+    "game" : bench_game,
+    "load" : bench_load,
+    }
+
+
+def run_engine_benches(results, sizes, groups=None, use_bitboard=True):
+    """ Run headless benchmarks
+    :results: BenchResults
+    :sizes: list of board sizes
+    :groups: list of group names default: all ENGINE_GROUPS
+    :use_bitboard: shadow uses DotsBitBoard default: True
+    """
+    if groups is None:
+        groups = list(ENGINE_GROUPS)
+    for size in sizes:
+        for group in groups:
+            bench = ENGINE_GROUPS.get(group)
+            if bench is None:
+                continue
+            SlTrace.lg("%s %dx%d" % (group, size, size), "bench")
+            bench(results, size, use_bitboard=use_bitboard)
@@ -0,0 +1,170 @@
+# bench_results.py
+"""
+Benchmark timing and results
+
+Each benchmark is recorded, by name, as:
+    calls           number of calls timed
+    ops_per_call    operations per call e.g. moves per game
+    sec_per_op      seconds per operation
+    ops_per_sec     operations per second
+or, if it could not be run:
+    skipped         reason
+Names carry the board size e.g. "shadow.get_legal_list[5x5]".
+
+Results are saved as JSON and may be compared with a stored
+baseline, a benchmark being a regression if its sec_per_op
+exceeds the baseline's by more than the tolerance.
+The reference baseline, BASELINE_FILE, is kept with the package; its
+"info" records the machine it was timed on.  Timings only compare on
+similar machines, so replace it (python -m dots_bench --save_baseline)
+when benchmarking on another machine.
+"""
+import json
+import os
+import platform
+import sys
+import time
+
+from select_trace import SlTrace
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "bench_baseline.json")
+
+
+class BenchResults:
+    """ Timed benchmarks
+    """
+    def __init__(self, seconds=1.0, min_calls=3):
+        """ Setup results
+        :seconds: time to run each benchmark default: 1.0
+        :min_calls: minimum number of calls timed default: 3
+        """
+        self.seconds = seconds
+        self.min_calls = min_calls
+        self.results = {}           # By benchmark name
+        self.info = dict(ts=SlTrace.getTs(),
+                         python=sys.version.split()[0],
+                         machine=platform.machine(),
+                         platform=platform.platform(),
+                         seconds=seconds)
+
+
+    def add(self, name, calls, sec, ops_per_call=1):
+        """ Record benchmark
+        :name: benchmark name
+        :calls: number of calls
+        :sec: total time, in seconds
+        :ops_per_call: operations per call default: 1
+        """
+        nop = calls*ops_per_call
+        sec_per_op = sec/nop if nop > 0 else 0.
+        self.results[name] = dict(calls=calls, ops_per_call=ops_per_call,
+                                  sec_per_op=sec_per_op,
+                                  ops_per_sec=1./sec_per_op if sec_per_op > 0 else 0.)
+        SlTrace.lg("%-45s %12.3f usec/op %12.0f ops/sec"
+                   % (name, sec_per_op*1e6, self.results[name]["ops_per_sec"]))
+
+
+    def add_skip(self, name, reason):
+        """ Record benchmark which could not be run
+        :name: benchmark name
+        :reason: why skipped
+        """
+        self.results[name] = dict(skipped=reason)
+        SlTrace.lg("%-45s skipped: %s" % (name, reason))
+
+
+    def time_calls(self, name, call, ops_per_call=1, setup=None):
+        """ Time repeated calls, for self.seconds
+        :name: benchmark name
+        :call: function()
+        :ops_per_call: operations per call default: 1
+        :setup: if present, function() called, untimed, before each call
+        """
+        ncall = 0
+        sec = 0.
+        perf_counter = time.perf_counter
+        while sec < self.seconds or ncall < self.min_calls:
+            if setup is not None:
+                setup()
+            time_beg = perf_counter()
+            call()
+            sec += perf_counter() - time_beg
+            ncall += 1
+        self.add(name, ncall, sec, ops_per_call=ops_per_call)
+
+
+    def time_loop(self, name, call, ops_per_call=1):
+        """ Time calls without per call timing, for fast calls
+        Calls are made in batches, the batch size growing till
+        a batch takes a measurable time
+        :name: benchmark name
+        :call: function()
+        :ops_per_call: operations per call default: 1
+        """
+        ncall = 0
+        nbatch = 1
+        perf_counter = time.perf_counter
+        time_beg = perf_counter()
+        while True:
+            batch_beg = perf_counter()
+            for _ in range(nbatch):
+                call()
+            ncall += nbatch
+            now = perf_counter()
+            if now - time_beg >= self.seconds and ncall >= self.min_calls:
+                break
+            if now - batch_beg < .01:
+                nbatch *= 2
+        self.add(name, ncall, perf_counter()-time_beg, ops_per_call=ops_per_call)
+
+
+    def to_dict(self):
+        """ Results as a JSON compatible dictionary
+        """
+        return dict(info=self.info, results=self.results)
+
+
+    def save(self, file_name):
+        """ Write results as JSON
+        :file_name: output file
+        """
+        with open(file_name, "w") as fout:
+            json.dump(self.to_dict(), fout, indent=2, sort_keys=True)
+        SlTrace.lg("Benchmark results: %s" % file_name)
+
+
+    @classmethod
+    def load(cls, file_name):
+        """ Read results saved by save
+        :file_name: JSON file
+        :returns: results dictionary, by benchmark name
+        """
+        with open(file_name) as fin:
+            return json.load(fin)["results"]
+
+
+    def compare(self, baseline, tolerance=.2):
+        """ Compare with baseline results
+        :baseline: results dictionary, by benchmark name, e.g. from load
+        :tolerance: fractional slowdown allowed default: .2 (20 percent)
+        :returns: list of (name, baseline sec_per_op, sec_per_op) regressions
+        """
+        regressions = []
+        for name in sorted(self.results):
+            res = self.results[name]
+            base = baseline.get(name)
+            if base is None or "sec_per_op" not in base or "sec_per_op" not in res:
+                continue
+            base_sec = base["sec_per_op"]
+            sec = res["sec_per_op"]
+            if base_sec <= 0:
+                continue
+            ratio = sec/base_sec
+            flag = ""
+            if ratio > 1 + tolerance:
+                flag = "  REGRESSION"
+                regressions.append((name, base_sec, sec))
+            SlTrace.lg("%-45s %12.3f usec/op baseline %12.3f  x%.2f%s"
+                       % (name, sec*1e6, base_sec*1e6, ratio, flag))
+        return regressions
@@ -0,0 +1,238 @@
+# bench_ui.py
+"""
+Benchmarks needing Tk - boards are made with SelectDots, undisplayed
+
+    hit         SelectArea.get_parts_at at random canvas locations
+    undo_redo   SelectCommandManager undo and redo of edge moves,
+                recorded as SelectPlay.new_edge records them
+    reset       SelectDots.reset of a played board, as between games
+
+If Tk, or a display, is not available the benchmarks are recorded
+as skipped.
+"""
+import random
+
+from select_trace import SlTrace
+
+
+class BenchPlayer:
+    """ Minimal player, as needed by the shadow
+    """
+    def __init__(self, playing_num):
+        self.playing_num = playing_num
+
+
+    def get_playing_num(self):
+        return self.playing_num
+
+
+    def __str__(self):
+        return "player%d" % self.playing_num
+
+
+class BenchCommandUser:
+    """ Command user module - the SelectPlay functions used by
+    SelectCommandPlay in executing, undoing and redoing edge moves,
+    without display
+    """
+    def __init__(self, board, nplayer=2):
+        """ Setup user of commands
+        :board: SelectDots board
+        :nplayer: number of players default: 2
+        """
+        from select_command_manager import SelectCommandManager
+        from select_command_play import SelectCommandPlay
+
+        self.board = board
+        self.players = [BenchPlayer(i+1) for i in range(nplayer)]
+        self.player = self.players[0]
+        self.keycmd_edge_mark = None
+        self.command_manager = SelectCommandManager(self, undo_len=board.nrows
+                                                    *(board.ncols+1)*2 + 10)
+        SelectCommandPlay.set_management(self.command_manager, self)
+        self.command_class = SelectCommandPlay
+
+
+    def new_edge(self, edge):
+        """ Make and save edge move command
+        :edge: edge part
+        """
+        player = self.player
+        cmd = self.command_class("new_edge", undo_unit=True, display=False)
+        cmd.set_prev_player(player)
+        cmd.add_prev_parts(edge)
+        edge.turn_on(display=False, player=player, move_no=cmd.move_no)
+        cmd.add_new_parts(edge)
+        self.player = self.players[(self.players.index(player)+1) % len(self.players)]
+        cmd.set_new_player(self.player)
+        cmd.do_cmd()
+
+
+    def get_player(self):
+        return self.player
+
+
+    def set_player(self, player):
+        self.player = player
+
+
+    def get_part(self, id=None, type=None, sub_type=None, row=None, col=None):
+        return self.board.get_part(id=id, type=type, sub_type=sub_type, row=row, col=col)
+
+
+    def remove_parts(self, parts):
+        self.board.remove_parts(parts)
+
+
+    def set_part_values(self, part, values):
+        self.board.set_part_values(part, values)
+        self.command_manager.set_changed(part)
+
+
+    def update_keycmd_edge_mark(self, prev_edge_mark, new_edge_mark):
+        pass
+
+
+    def update_score_from_cmd(self, new_score, prev_score):
+        pass
+
+
+    def display_messages(self, messages):
+        pass
+
+
+    def trace_scores(self, prefix=None):
+        pass
+
+
+    def display_print(self, tag, trace=None):
+        pass
+
+
+    def select_print(self, tag, trace=None):
+        pass
+
+
+    def list_selected(self, prefix=None):
+        pass
+
+
+def get_board(frame, mw, size, width, height):
+    """ Undisplayed board
+    """
+    from select_dots import SelectDots
+
+    return SelectDots(frame, mw=mw, nrows=size, ncols=size,
+                      width=width, height=height,
+                      display_game=False, highlighting=False)
+
+
+def bench_hit(results, size, board, width, height):
+    """ SelectArea.get_parts_at at random locations
+    """
+    from dots_bench.bench_engine import size_name
+
+    area = board.area
+    random.seed(1)
+    locs = [(random.randint(0, width-1), random.randint(0, height-1))
+            for _ in range(1000)]
+    get_parts_at = area.get_parts_at
+
+    def hits():
+        for x, y in locs:
+            get_parts_at(x, y)
+
+    results.time_loop(size_name("area.get_parts_at", size), hits,
+                      ops_per_call=len(locs))
+
+
+def bench_undo_redo(results, size, board, width, height):
+    """ Undo, then redo, of a game's worth of edge moves
+    """
+    from dots_bench.bench_engine import size_name
+
+    user = BenchCommandUser(board)
+    edges = board.area.get_parts(pt_type="edge")
+    random.seed(1)
+    random.shuffle(edges)
+    for edge in edges:
+        user.new_edge(edge)
+    command_manager = user.command_manager
+    nmove = len(edges)
+
+    def undo_all():
+        while command_manager.can_undo():
+            command_manager.undo()
+
+    def redo_all():
+        while command_manager.can_redo():
+            command_manager.redo()
+
+    results.time_calls(size_name("command.undo", size), undo_all,
+                       ops_per_call=nmove, setup=redo_all)
+    results.time_calls(size_name("command.redo", size), redo_all,
+                       ops_per_call=nmove, setup=undo_all)
+
+
+def bench_reset(results, size, board, width, height):
+    """ Board reset after all edges are played
+    """
+    from dots_bench.bench_engine import size_name
+
+    players = [BenchPlayer(1), BenchPlayer(2)]
+    edges = board.area.get_parts(pt_type="edge")
+
+    def play_all():
+        for i, edge in enumerate(edges):
+            edge.turn_on(display=False, player=players[i % 2], move_no=i+1)
+
+    results.time_calls(size_name("board.reset", size), board.reset,
+                       setup=play_all)
+
+
+UI_GROUPS = {
+    "hit" : bench_hit,
+    "undo_redo" : bench_undo_redo,
+    "reset" : bench_reset,
+    }
+
+
+def run_ui_benches(results, sizes, groups=None, width=800, height=800):
+    """ Run Tk benchmarks
+    :results: BenchResults
+    :sizes: list of board sizes
+    :groups: list of group names default: all UI_GROUPS
+    :width, height: canvas size default: 800 x 800
+    """
+    from dots_bench.bench_engine import size_name
+
+    if groups is None:
+        groups = list(UI_GROUPS)
+    groups = [group for group in groups if group in UI_GROUPS]
+    if not groups:
+        return
+
+    try:
+        from tkinter import Tk, Frame
+        mw = Tk()
+    except Exception as ex:
+        for size in sizes:
+            for group in groups:
+                results.add_skip(size_name(group, size), "no Tk: %s" % ex)
+        return
+
+    mw.withdraw()
+    frame = Frame(mw, width=width, height=height)
+    frame.pack()
+    try:
+        for size in sizes:
+            for group in groups:
+                SlTrace.lg("%s %dx%d" % (group, size, size), "bench")
+                try:
+                    board = get_board(frame, mw, size, width, height)
+                except ImportError as ex:
+                    results.add_skip(size_name(group, size), "board: %s" % ex)
+                    continue
+                UI_GROUPS[group](results, size, board, width, height)
+    finally:
+        mw.destroy()
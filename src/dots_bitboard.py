@@ -0,0 +1,252 @@
+# dots_bitboard.py
+"""
+Bitboard representation of the dots board
+
+The drawn edges are held as bits of one Python int, so a board
+position is a single (hashable, cheaply copied) number.
+Square completion, distance to square completion and legal move
+enumeration are done with precomputed per-edge masks of the
+adjacent squares' other sides - O(1) per edge.
+
+Edge index
+    The edge index of (row, col, hv) is the flat index into the
+    DotsShadow.lines array [nrows+1, ncols+1, 2], as in dots_edges:
+        index = ((row-1)*(ncols+1) + (col-1))*2 + hv
+    so enumerating set bits in increasing order visits edges in
+    the same order as scanning DotsShadow.lines.
+    Positions with no edge (horizontal at the right end,
+    vertical at the bottom) are never legal.
+
+Square index
+    square (row, col) index = (row-1)*ncols + (col-1)
+"""
+import numpy as np
+
+from select_error import SelectError
+from move_list import MoveList, MVP
+from dots_edges import get_edge_tables
+
+
+class DotsBitBoard:
+    """ Dots board edges packed into a Python int
+    """
+    NOT_CLOSE = 99          # distance when edge borders no square
+
+    def __init__(self, nrows, ncols=None):
+        """ Setup empty board
+        :nrows: number of rows of squares
+        :ncols: number of columns of squares default: nrows
+        """
+        if ncols is None:
+            ncols = nrows
+        self.nrows = nrows
+        self.ncols = ncols
+        self.nindex = (nrows+1)*(ncols+1)*2     # Edge index range, including non-edges
+        self.setup_masks()
+        self.edges = 0                          # Bit set for each drawn edge
+        self.nopen_line = self.nedge
+
+
+    def setup_masks(self):
+        """ Setup per board masks, from the board size's tables
+            legal_mask: all real edges
+            square_masks[sq]: the four sides of square sq
+            square_edges[sq]: edge indexes of the four sides of square sq
+            edge_squares[index]: squares bordering edge
+            edge_other_masks[index]: for each bordering square,
+                                    the square's other three sides
+        """
+        tables = get_edge_tables(self.nrows, self.ncols)   # Shared by boards of our size
+        self.tables = tables
+        self.legal_mask = tables.legal_mask
+        self.nedge = tables.nedge
+        self.square_masks = tables.square_masks
+        self.square_edges = tables.square_edge_list
+        self.edge_squares = tables.edge_sq_list
+        self.edge_other_masks = tables.edge_other_masks
+
+
+    def edge_index(self, row, col, hv):
+        """ Edge index
+        :row: row number, starting at 1
+        :col: col number, starting at 1
+        :hv: horizontal==0, vertical==1
+        :returns: edge index
+        """
+        return ((row-1)*(self.ncols+1) + (col-1))*2 + hv
+
+
+    def index_edge(self, index):
+        """ Edge (row, col, hv) from index
+        :index: edge index
+        :returns: (row, col, hv) row, col starting at 1
+        """
+        return self.tables.edge_rchs[index]
+
+
+    def square_rowcol(self, sq):
+        """ Square (row, col) from square index
+        :sq: square index
+        :returns: (row, col) starting at 1
+        """
+        return self.tables.square_rcs[sq]
+
+
+    def check_index(self, index):
+        """ Check for real edge index
+        :index: edge index
+        """
+        if index < 0 or index >= self.nindex or not (self.legal_mask >> index) & 1:
+            raise SelectError(f"DotsBitBoard: edge index {index} out of range")
+
+
+    def clear(self):
+        """ Remove all edges
+        """
+        self.edges = 0
+        self.nopen_line = self.nedge
+
+
+    def is_on(self, index):
+        """ Check if edge is drawn
+        :index: edge index
+        """
+        return (self.edges >> int(index)) & 1 == 1
+
+
+    def turn_on(self, index):
+        """ Draw edge
+        :index: edge index
+        """
+        bit = 1 << int(index)
+        if not self.edges & bit:
+            self.edges |= bit
+            self.nopen_line -= 1
+
+
+    def turn_off(self, index):
+        """ Remove edge
+        :index: edge index
+        """
+        bit = 1 << int(index)
+        if self.edges & bit:
+            self.edges &= ~bit
+            self.nopen_line += 1
+
+
+    def does_complete_square(self, index):
+        """ Check if drawing edge will complete a square
+        i.e. a bordering square has its other three sides drawn
+        :index: edge index
+        """
+        edges = self.edges
+        for mask in self.edge_other_masks[index]:
+            if edges & mask == mask:
+                return True
+        return False
+
+
+    def distance_from_square(self, index):
+        """ Find the minimum number of moves, after this edge, to complete square
+        0 => a completed square
+        1 => sets up opponent to complete square
+        :index: edge index
+        :returns: min distance, NOT_CLOSE if edge borders no square
+        """
+        edges = self.edges
+        min_dist = self.NOT_CLOSE
+        for mask in self.edge_other_masks[index]:
+            dist = bin(mask & ~edges).count("1")
+            if dist < min_dist:
+                min_dist = dist
+                if dist == 0:
+                    break
+        return min_dist
+
+
+    def get_completed_squares(self, index):
+        """ Get squares completed, all sides drawn, bordering edge
+        :index: edge index
+        :returns: list of square indexes
+        """
+        edges = self.edges
+        completed = []
+        for sq in self.edge_squares[index]:
+            mask = self.square_masks[sq]
+            if edges & mask == mask:
+                completed.append(sq)
+        return completed
+
+
+    def get_legal_indexes(self):
+        """ Get open edges, in increasing index order
+        :returns: list of edge indexes
+        """
+        indexes = []
+        open_edges = self.legal_mask & ~self.edges
+        while open_edges:
+            low = open_edges & -open_edges
+            indexes.append(low.bit_length()-1)
+            open_edges ^= low
+        return indexes
+
+
+    def get_legal_list(self):
+        """ Return MoveList of legal moves
+        :returns: MoveList of open edges
+        """
+        return MoveList(self, indexes=np.array(self.get_legal_indexes(), dtype=int))
+
+
+    def get_num_legal_moves(self):
+        """ Fast check on number of legal moves
+        """
+        return self.nopen_line
+
+
+    def get_edge(self, row=None, col=None, hv=None):
+        """ Edge part, for MoveList compatibility
+        The bitboard holds no parts
+        :returns: None
+        """
+        return None
+
+
+    def copy(self):
+        """ Copy of board - shares the per board masks
+        """
+        new_board = DotsBitBoard.__new__(DotsBitBoard)
+        new_board.__dict__.update(self.__dict__)
+        return new_board
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from select_trace import SlTrace
+
+    for nr, nc in [(2,2), (3,4), (5,5)]:
+        bb = DotsBitBoard(nr, nc)
+        SlTrace.lg(f"{nr}x{nc}: nedge={bb.nedge} nopen={bb.get_num_legal_moves()}")
+        nsq = 0
+        while bb.get_num_legal_moves() > 0:
+            indexes = bb.get_legal_indexes()
+            index = indexes[random.randint(0, len(indexes)-1)]
+            completes = bb.does_complete_square(index)
+            bb.turn_on(index)
+            completed = bb.get_completed_squares(index)
+            if completes != (len(completed) > 0):
+                raise SelectError(f"does_complete_square mismatch at {bb.index_edge(index)}")
+            nsq += len(completed)
+        if nsq != nr*nc:
+            raise SelectError(f"completed {nsq} squares expected {nr*nc}")
+
+    bb = DotsBitBoard(5)
+    ntime = 100000
+    index = bb.edge_index(3, 3, MVP.HV_H)
+    time_beg = time.time()
+    for _ in range(ntime):
+        bb.does_complete_square(index)
+    time_tot = time.time() - time_beg
+    SlTrace.lg(f"does_complete_square: {ntime/time_tot:.0f} per sec")
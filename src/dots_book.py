@@ -0,0 +1,481 @@
+# dots_book.py
+"""
+Opening book / solved position table for small boards
+
+Positions are solved offline, by this module's __main__, and the
+results kept in one file per board size, loaded memory-mapped, so
+the search players (DotsStrategy levels >= LEVEL_SEARCH, two
+players) play solved positions from the table at no search cost.
+
+Position
+    The set of drawn edges, as a bit mask by the edge's position in
+    the board's edge_indexes (dots_edges) - at most 32 edges, so
+    boards up to 3x4 (31 edges).  As in DotsSearch, a position's value
+    is the net number of the remaining squares the player to move can
+    get, which does not depend on the scores so far.
+Symmetry
+    Board reflections (and, for square boards, transposes) give the
+    same game, so only the canonical position, the smallest key over
+    the board's symmetries, is kept.  A position's canonical key is
+    made with per byte lookup tables.
+Solving
+    Positions are solved, from the full board back, a level (number
+    of drawn edges) at a time, from the solved level above, with
+    numpy operations over all of a level's canonical positions.
+    Small boards (2x2, 3x3) are solved completely, for larger boards
+    (3x4) only positions with at most max_open open edges are kept.
+Table file
+    dots_book_<nrows>x<ncols>.npy, in BOOK_DIR (books, beside src)
+    unless a book directory is given, a numpy array of records
+        key     canonical position, EMPTY_KEY in an empty slot
+        value   value for player to move
+        move    best move, as edge position, in the canonical position
+    The array is an open addressing hash table, with linear probing,
+    of a power of 2 number of slots, so a lookup is O(1).
+    A board with only the other orientation's table (e.g. 4x3 with
+    the 3x4 table) uses it through the transpose.
+"""
+import os
+import time
+import numpy as np
+
+from select_trace import SlTrace
+from select_error import SelectError
+from dots_edges import get_edge_tables, HV_H, HV_V
+from trace_lazy import trace_flag, lg
+
+TR_BOOK = trace_flag("book")
+
+BOOK_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                        "..", "books"))     # Independent of working directory
+BOOK_DTYPE = np.dtype([("key", "<u4"), ("value", "i1"), ("move", "u1")])
+EMPTY_KEY = 0xFFFFFFFF
+HASH_MULT = 0x9E3779B1          # Fibonacci hashing multiplier
+MAX_LOAD = .75                  # Maximum fraction of slots used
+
+
+def book_file_name(nrows, ncols, book_dir=None):
+    """ Table file path for board size
+    :nrows: number of rows of squares
+    :ncols: number of columns of squares
+    :book_dir: book directory default: BOOK_DIR
+    """
+    if book_dir is None:
+        book_dir = BOOK_DIR
+    return os.path.join(book_dir, "dots_book_%dx%d.npy" % (nrows, ncols))
+
+
+class DotsBookBoard:
+    """ Edge positions and symmetries of one board size
+    """
+    def __init__(self, nrows, ncols):
+        """ Setup board size
+        :nrows: number of rows of squares
+        :ncols: number of columns of squares
+        """
+        self.nrows = nrows
+        self.ncols = ncols
+        tables = get_edge_tables(nrows, ncols)
+        self.tables = tables
+        nedge = tables.nedge
+        if nedge > 32:
+            raise SelectError(f"DotsBook: board {nrows}x{ncols} has {nedge} edges"
+                              f" - over 32")
+        self.nedge = nedge
+        self.full = (1 << nedge) - 1
+        self.edge_indexes = tables.edge_indexes.tolist()
+        self.edge_pos = [-1]*tables.nindex     # Position of edge index
+        for pos, index in enumerate(self.edge_indexes):
+            self.edge_pos[index] = pos
+        self.edge_bits = np.zeros(tables.nindex, dtype=np.int64)
+        self.edge_bits[tables.edge_indexes] = 1 << np.arange(nedge, dtype=np.int64)
+        self.setup_symmetries()
+        self.setup_squares()
+
+
+    def setup_symmetries(self):
+        """ Setup edge permutation, its inverse and key lookup tables,
+        for each board symmetry
+            perms[s][pos]       edge position, in transformed board
+            inv_perms[s][pos]   edge position, in original board
+            luts[s][byte]       array [256] of transformed bits of key byte
+        """
+        nrows, ncols = self.nrows, self.ncols
+        transforms = []
+        for flip_row in (False, True):
+            for flip_col in (False, True):
+                for transpose in ((False, True) if nrows == ncols else (False,)):
+                    transforms.append((flip_row, flip_col, transpose))
+
+        def map_dot(row, col, flip_row, flip_col, transpose):
+            if flip_row:
+                row = nrows + 2 - row
+            if flip_col:
+                col = ncols + 2 - col
+            if transpose:
+                row, col = col, row
+            return row, col
+
+        self.perms = []
+        self.inv_perms = []
+        self.luts = []
+        for transform in transforms:
+            perm = [0]*self.nedge
+            for pos, index in enumerate(self.edge_indexes):
+                row, col, hv = self.tables.edge_rchs[index]
+                end_row, end_col = (row, col+1) if hv == HV_H else (row+1, col)
+                dot1 = map_dot(row, col, *transform)
+                dot2 = map_dot(end_row, end_col, *transform)
+                row, col = min(dot1, dot2)
+                hv = HV_H if dot1[0] == dot2[0] else HV_V
+                perm[pos] = self.edge_pos[self.tables.edge_index(row, col, hv)]
+            inv_perm = [0]*self.nedge
+            for pos, tpos in enumerate(perm):
+                inv_perm[tpos] = pos
+            luts = np.zeros([4, 256], dtype=np.uint32)
+            for nbyte in range(4):
+                for bit in range(8):
+                    pos = nbyte*8 + bit
+                    if pos < self.nedge:
+                        has_bit = (np.arange(256) >> bit) & 1 == 1
+                        luts[nbyte, has_bit] |= np.uint32(1 << perm[pos])
+            self.perms.append(perm)
+            self.inv_perms.append(inv_perm)
+            self.luts.append(luts)
+        self.lut_lists = [[lut.tolist() for lut in luts] for luts in self.luts]
+
+
+    def setup_squares(self):
+        """ Setup, for each edge position, the masks of the other
+        three edges of each bordering square
+        """
+        self.other_masks = []
+        for index in self.edge_indexes:
+            masks = []
+            for sq in self.tables.edge_sq_list[index]:
+                mask = 0
+                for side in self.tables.square_edge_list[sq]:
+                    if side != index:
+                        mask |= 1 << self.edge_pos[side]
+                masks.append(mask)
+            self.other_masks.append(masks)
+
+
+    def canonical(self, key):
+        """ Canonical key of position
+        :key: position key
+        :returns: (canonical key, symmetry number)
+        """
+        b0 = key & 255
+        b1 = (key >> 8) & 255
+        b2 = (key >> 16) & 255
+        b3 = key >> 24
+        best = None
+        best_sym = 0
+        for sym, luts in enumerate(self.lut_lists):
+            tkey = luts[0][b0] | luts[1][b1] | luts[2][b2] | luts[3][b3]
+            if best is None or tkey < best:
+                best = tkey
+                best_sym = sym
+        return best, best_sym
+
+
+    def canonical_keys(self, keys):
+        """ Canonical keys of array of positions
+        :keys: uint32 array of position keys
+        :returns: uint32 array of canonical keys
+        """
+        b0 = keys & 255
+        b1 = (keys >> 8) & 255
+        b2 = (keys >> 16) & 255
+        b3 = keys >> 24
+        best = None
+        for luts in self.luts:
+            tkeys = luts[0][b0] | luts[1][b1] | luts[2][b2] | luts[3][b3]
+            best = tkeys if best is None else np.minimum(best, tkeys)
+        return best
+
+
+def hash_slots(keys, nbit):
+    """ Home slot of keys
+    :keys: uint32 array of keys
+    :nbit: number of slot bits
+    :returns: int64 array of slots
+    """
+    prod = (keys.astype(np.uint64) * np.uint64(HASH_MULT)) & np.uint64(0xFFFFFFFF)
+    return (prod >> np.uint64(32 - nbit)).astype(np.int64)
+
+
+def hash_slot(key, nbit):
+    """ Home slot of key, as hash_slots
+    """
+    return ((key * HASH_MULT) & 0xFFFFFFFF) >> (32 - nbit)
+
+
+class DotsBookBuilder:
+    """ Solve board positions, a level at a time, for the table file
+    """
+    def __init__(self, nrows, ncols, max_open=None):
+        """ Setup solver
+        :nrows: number of rows of squares
+        :ncols: number of columns of squares
+        :max_open: maximum number of open edges of positions kept
+                default: all positions
+        """
+        self.board = DotsBookBoard(nrows, ncols)
+        self.max_open = max_open
+        self.nposition = 0
+
+
+    def parent_keys(self, keys):
+        """ Canonical positions with one less edge drawn
+        :keys: canonical keys of a level
+        :returns: sorted, unique, canonical keys of level below
+        """
+        parents = []
+        for pos in range(self.board.nedge):
+            bit = np.uint32(1 << pos)
+            has_bit = keys[(keys & bit) != 0]
+            parents.append(has_bit ^ bit)
+        return np.unique(self.board.canonical_keys(np.concatenate(parents)))
+
+
+    def solve_level(self, keys, child_keys, child_values):
+        """ Solve positions of a level from the level above
+        :keys: sorted canonical keys of level
+        :child_keys: sorted canonical keys of level above
+        :child_values: values of level above
+        :returns: (values, best moves)
+        """
+        nkey = len(keys)
+        best = np.full(nkey, -128, dtype=np.int16)
+        best_move = np.zeros(nkey, dtype=np.uint8)
+        for pos in range(self.board.nedge):
+            bit = np.uint32(1 << pos)
+            open_ = np.flatnonzero((keys & bit) == 0)
+            if len(open_) == 0:
+                continue
+            keys_open = keys[open_]
+            nsq = np.zeros(len(open_), dtype=np.int16)
+            for mask in self.board.other_masks[pos]:
+                mask = np.uint32(mask)
+                nsq += (keys_open & mask) == mask
+            children = self.board.canonical_keys(keys_open | bit)
+            child_value = child_values[np.searchsorted(child_keys, children)].astype(np.int16)
+            value = np.where(nsq > 0, nsq + child_value, -child_value)
+            better = value > best[open_]
+            best[open_[better]] = value[better]
+            best_move[open_[better]] = pos
+        return best.astype(np.int8), best_move
+
+
+    def solve(self):
+        """ Solve all positions kept
+        :returns: (keys, values, moves) arrays of kept positions
+        """
+        board = self.board
+        nedge = board.nedge
+        min_drawn = 0
+        if self.max_open is not None:
+            min_drawn = max(nedge - self.max_open, 0)
+        keys = np.array([board.full], dtype=np.uint32)
+        values = np.zeros(1, dtype=np.int8)
+        levels = []
+        for ndrawn in range(nedge-1, min_drawn-1, -1):
+            time_beg = time.time()
+            level_keys = self.parent_keys(keys)
+            level_values, level_moves = self.solve_level(level_keys, keys, values)
+            levels.append((level_keys, level_values, level_moves))
+            keys, values = level_keys, level_values
+            SlTrace.lg("book %dx%d: %d drawn %d positions %.1f sec"
+                       % (board.nrows, board.ncols, ndrawn, len(keys),
+                          time.time()-time_beg), "book")
+        all_keys = np.concatenate([level[0] for level in levels])
+        all_values = np.concatenate([level[1] for level in levels])
+        all_moves = np.concatenate([level[2] for level in levels])
+        self.nposition = len(all_keys)
+        return all_keys, all_values, all_moves
+
+
+    def make_table(self, keys, values, moves):
+        """ Make hash table of positions
+        :keys, values, moves: solved positions
+        :returns: table array (BOOK_DTYPE)
+        """
+        nbit = 1
+        while (1 << nbit)*MAX_LOAD < len(keys):
+            nbit += 1
+        nslot = 1 << nbit
+        table = np.zeros(nslot, dtype=BOOK_DTYPE)
+        table["key"] = EMPTY_KEY
+        slot_keys = table["key"]
+        slots = hash_slots(keys, nbit)
+        todo = np.arange(len(keys))
+        while len(todo) > 0:                # Place, a probe at a time
+            free = np.flatnonzero(slot_keys[slots] == EMPTY_KEY)
+            _, first = np.unique(slots[free], return_index=True)
+            place = free[first]             # One entry per free slot
+            entries = todo[place]
+            table["key"][slots[place]] = keys[entries]
+            table["value"][slots[place]] = values[entries]
+            table["move"][slots[place]] = moves[entries]
+            left = np.ones(len(todo), dtype=bool)
+            left[place] = False
+            todo = todo[left]
+            slots = (slots[left] + 1) & (nslot - 1)
+        return table
+
+
+    def save(self, file_name):
+        """ Solve positions and write table file
+        :file_name: table file path
+        """
+        keys, values, moves = self.solve()
+        table = self.make_table(keys, values, moves)
+        tmp_name = file_name + ".tmp.npy"
+        np.save(tmp_name, table)
+        os.replace(tmp_name, file_name)
+        SlTrace.lg("book %s: %d positions in %d slots %d bytes"
+                   % (file_name, len(keys), len(table), os.path.getsize(file_name)))
+
+
+class DotsBook:
+    """ Solved position table of one board size, read memory-mapped
+    """
+    def __init__(self, nrows, ncols, file_name, transpose=False):
+        """ Load table
+        :nrows: number of rows of squares
+        :ncols: number of columns of squares
+        :file_name: table file
+        :transpose: True - table is for the transposed (ncols x nrows) board
+                default: False
+        """
+        if transpose:
+            board = DotsBookBoard(ncols, nrows)
+            tables = get_edge_tables(nrows, ncols)
+            self.edge_bits = np.zeros(tables.nindex, dtype=np.int64)
+            self.edge_indexes = [0]*board.nedge     # Our edge index, by table edge position
+            for pos, index in enumerate(board.edge_indexes):
+                row, col, hv = board.tables.edge_rchs[index]
+                our_index = tables.edge_index(col, row, HV_V if hv == HV_H else HV_H)
+                self.edge_bits[our_index] = 1 << pos
+                self.edge_indexes[pos] = our_index
+        else:
+            board = DotsBookBoard(nrows, ncols)
+            self.edge_bits = board.edge_bits
+            self.edge_indexes = board.edge_indexes
+        self.board = board
+        self.file_name = file_name
+        self.table = np.load(file_name, mmap_mode="r")
+        if self.table.dtype != BOOK_DTYPE:
+            raise SelectError(f"DotsBook: {file_name} is not a book table")
+        nslot = len(self.table)
+        self.nbit = nslot.bit_length() - 1
+        if nslot != 1 << self.nbit:
+            raise SelectError(f"DotsBook: {file_name} slots {nslot} not a power of 2")
+        self.slot_mask = nslot - 1
+        self.keys = self.table["key"]
+        self.nlookup = 0
+        self.nfound = 0
+
+
+    def lookup(self, shadow):
+        """ Look up shadow board position
+        :shadow: DotsShadow
+        :returns: (best move edge index, value for player to move),
+                None if position is not in table
+        """
+        self.nlookup += 1
+        board = self.board
+        open_edges = shadow.open_edges[:shadow.nopen_line]
+        key = board.full - int(self.edge_bits[open_edges].sum())
+        key, sym = board.canonical(key)
+        keys = self.keys
+        slot = hash_slot(key, self.nbit)
+        while True:
+            slot_key = keys[slot]
+            if slot_key == key:
+                break
+            if slot_key == EMPTY_KEY:
+                return None
+            slot = (slot + 1) & self.slot_mask
+        self.nfound += 1
+        entry = self.table[slot]
+        pos = board.inv_perms[sym][entry["move"]]
+        return self.edge_indexes[pos], int(entry["value"])
+
+
+    def get_move(self, shadow):
+        """ Best move for shadow board position
+        :shadow: DotsShadow
+        :returns: edge index, None if position is not in table
+        """
+        found = self.lookup(shadow)
+        if found is None:
+            return None
+        index, value = found
+        lg(TR_BOOK, lambda: "book: move=%s value=%d"
+                            % (shadow.tables.edge_rchs[index], value))
+        return index
+
+
+books = {}                      # DotsBook, None if no table, by (nrows, ncols, book_dir)
+
+def get_book(nrows, ncols, book_dir=None):
+    """ Get table for board size, loaded on first use
+    :nrows: number of rows of squares
+    :ncols: number of columns of squares
+    :book_dir: book directory default: BOOK_DIR
+    :returns: DotsBook, None if no table for board size
+            or, transposed, for ncols x nrows
+    """
+    key = (nrows, ncols, book_dir)
+    if key in books:
+        return books[key]
+
+    book = None
+    file_name = book_file_name(nrows, ncols, book_dir=book_dir)
+    transpose = False
+    if not os.path.isfile(file_name) and nrows != ncols:
+        file_name = book_file_name(ncols, nrows, book_dir=book_dir)
+        transpose = True
+    if os.path.isfile(file_name):
+        try:
+            book = DotsBook(nrows, ncols, file_name, transpose=transpose)
+        except (IOError, ValueError, SelectError) as ex:
+            SlTrace.lg("Ignoring bad book %s: %s" % (file_name, str(ex)))
+    books[key] = book
+    return book
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sizes = "2x2,3x3,3x4"
+    book_dir = BOOK_DIR
+    max_open = "3x4=8"
+    trace = "book"
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes=', dest='sizes', default=sizes,
+                        help="board sizes nrowsxncols,...")
+    parser.add_argument('--book_dir=', dest='book_dir', default=book_dir)
+    parser.add_argument('--max_open=', dest='max_open', default=max_open,
+                        help="maximum open edges of positions kept, by size"
+                             " e.g. 3x4=8,2x2=  empty: all positions")
+    parser.add_argument('--trace', dest='trace', default=trace)
+    args = parser.parse_args()             # or die "Illegal options"
+    if args.trace:
+        SlTrace.setFlags(args.trace)
+    max_opens = {}
+    if args.max_open:
+        for size_max in args.max_open.split(","):
+            size, nopen = size_max.split("=")
+            max_opens[size] = int(nopen) if nopen else None
+    if not os.path.isdir(args.book_dir):
+        os.makedirs(args.book_dir)
+    for size in args.sizes.split(","):
+        nrows, ncols = (int(n) for n in size.split("x"))
+        time_beg = time.time()
+        builder = DotsBookBuilder(nrows, ncols, max_open=max_opens.get(size))
+        builder.save(book_file_name(nrows, ncols, book_dir=args.book_dir))
+        SlTrace.lg("book %s: %.1f sec" % (size, time.time()-time_beg))
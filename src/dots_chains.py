@@ -0,0 +1,415 @@
+# dots_chains.py
+"""
+Chain and loop analysis of a DotsShadow board
+
+A square with exactly two open (undrawn) sides is a chain link.
+Links sharing an open side belong to the same chain.  A chain whose
+links all lead to other links is a loop.  Drawing any side of a
+chain lets the next player take the whole chain.
+
+The links are grouped with a union-find which is updated as edges
+are drawn and removed (DotsShadow.turn_on_edge / turn_off_edge):
+    A square becoming a link is joined to its neighboring links.
+    A square ceasing to be a link causes only its own (old) chain
+    to be regrouped: all its squares are ungrouped, then the
+    remaining links are joined again.
+so no full board flood fill is done per move.
+
+Endgame ideas used by get_chain_move:
+    long chain - chain of 3 or more squares
+    long chain parity - with two players, the first player wants
+            dots + long chains to be even, the second wants it odd
+    double dealing - when taking a chain, decline the last two
+            squares (last four of a loop) by drawing the far side,
+            so the opponent must take them and then open the next chain
+"""
+import random
+
+from select_trace import SlTrace
+
+
+class DotsChain:
+    """ One chain or loop of links
+    """
+    def __init__(self, squares, is_loop=False):
+        """ Setup chain
+        :squares: list of square indexes in chain
+        :is_loop: True if chain is a loop
+        """
+        self.squares = squares
+        self.is_loop = is_loop
+
+
+    def __len__(self):
+        return len(self.squares)
+
+
+    def __str__(self):
+        st = "loop" if self.is_loop else "chain"
+        return f"{st}({len(self.squares)})"
+
+
+class DotsChains:
+    """ Incremental chain / loop breakdown of a DotsShadow
+    """
+    LONG_CHAIN = 3              # Minimum length of a long chain
+    PARITY_MAX_SAFE = 20        # Check parity of safe moves when no more than this many
+
+    def __init__(self, shadow):
+        """ Setup analysis of current shadow board
+        Subsequent changes are supplied by the shadow via edge_changed
+        :shadow: DotsShadow
+        """
+        self.shadow = shadow
+        nrows = shadow.nrows
+        ncols = shadow.ncols
+        self.ndots = (nrows+1)*(ncols+1)
+        nsq = nrows*ncols
+        self.sq_edges = shadow.tables.square_edge_list  # Edge indexes: top, bottom, left, right
+        self.is_link = [False]*nsq
+        self.parent = list(range(nsq))
+        self.members = [[sq] for sq in range(nsq)]   # Valid for roots
+        self.chains = None                  # Cached get_chains, None if stale
+        for sq in range(nsq):
+            if shadow.square_filled[sq] == 2:
+                self.add_link(sq)
+
+
+    def find(self, sq):
+        """ Find chain root of link
+        :sq: square index
+        """
+        parent = self.parent
+        root = sq
+        while parent[root] != root:
+            root = parent[root]
+        while parent[sq] != root:           # Compress path
+            parent[sq], sq = root, parent[sq]
+        return root
+
+
+    def union(self, sq1, sq2):
+        """ Join links' chains
+        """
+        root1 = self.find(sq1)
+        root2 = self.find(sq2)
+        if root1 == root2:
+            return
+
+        if len(self.members[root1]) < len(self.members[root2]):
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        self.members[root1].extend(self.members[root2])
+        self.members[root2] = []
+
+
+    def open_neighbors(self, sq):
+        """ Squares across the open sides of a square
+        :sq: square index
+        :returns: list of (edge index, neighbor square index or None for board edge)
+        """
+        shadow = self.shadow
+        neighbors = []
+        for index in self.sq_edges[sq]:
+            if shadow.open_pos[index] < 0:
+                continue
+            other = None
+            for osq in shadow.edge_sq_list[index]:
+                if osq != sq:
+                    other = osq
+            neighbors.append((index, other))
+        return neighbors
+
+
+    def add_link(self, sq):
+        """ Square becomes a link - join with neighboring links
+        :sq: square index
+        """
+        self.is_link[sq] = True
+        self.parent[sq] = sq
+        self.members[sq] = [sq]
+        for _, other in self.open_neighbors(sq):
+            if other is not None and self.is_link[other]:
+                self.union(sq, other)
+
+
+    def remove_links(self, sqs):
+        """ Squares are no longer links - regroup their old chains
+        :sqs: square indexes
+        """
+        roots = set(self.find(sq) for sq in sqs)
+        for sq in sqs:
+            self.is_link[sq] = False
+        affected = []
+        for root in roots:
+            affected.extend(self.members[root])
+        for sq in affected:                 # All ungrouped before any regrouping
+            self.parent[sq] = sq
+            self.members[sq] = [sq]
+        for sq in affected:
+            if self.is_link[sq]:
+                for _, other in self.open_neighbors(sq):
+                    if other is not None and self.is_link[other]:
+                        self.union(sq, other)
+
+
+    def edge_changed(self, index):
+        """ Update after edge drawn or removed
+        Called by DotsShadow after its square counts and open edges are updated
+        :index: edge index
+        """
+        square_filled = self.shadow.square_filled
+        removed = []
+        added = []
+        for sq in self.shadow.edge_sq_list[index]:
+            if self.is_link[sq]:
+                if square_filled[sq] != 2:
+                    removed.append(sq)
+            elif square_filled[sq] == 2:
+                added.append(sq)
+        if removed:
+            self.remove_links(removed)
+        for sq in added:
+            self.add_link(sq)
+        self.chains = None
+
+
+    def get_chains(self):
+        """ Get current chains and loops
+        :returns: list of DotsChain
+        """
+        if self.chains is not None:
+            return self.chains
+
+        chains = []
+        for sq, is_link in enumerate(self.is_link):
+            if not is_link or self.parent[sq] != sq:
+                continue
+            members = self.members[sq]
+            nends = 0
+            for msq in members:
+                for _, other in self.open_neighbors(msq):
+                    if other is None or not self.is_link[other]:
+                        nends += 1
+            chains.append(DotsChain(list(members), is_loop=(nends == 0)))
+        self.chains = chains
+        return chains
+
+
+    def get_chain_lengths(self):
+        """ Get chain, loop lengths
+        :returns: list of (length, is_loop)
+        """
+        return [(len(chain), chain.is_loop) for chain in self.get_chains()]
+
+
+    def get_long_chain_count(self):
+        """ Number of long (LONG_CHAIN or more squares) chains, not counting loops
+        """
+        nlong = 0
+        for chain in self.get_chains():
+            if not chain.is_loop and len(chain) >= self.LONG_CHAIN:
+                nlong += 1
+        return nlong
+
+
+    def get_long_chain_parity(self):
+        """ Long chain parity (dots + long chains) % 2
+        With two players, 0 favors the first player, 1 the second
+        """
+        return (self.ndots + self.get_long_chain_count()) % 2
+
+
+    def get_chain_size(self, sq):
+        """ Size of chain containing square, 0 if not a link
+        :sq: square index
+        """
+        if not self.is_link[sq]:
+            return 0
+        return len(self.members[self.find(sq)])
+
+
+    def get_double_deal_move(self, index):
+        """ Double dealing move for capturing edge, if capture is of
+        the last two squares of a chain (last four of a loop)
+        :index: capturing edge index
+        :returns: edge index which declines the last squares, None if not applicable
+        """
+        shadow = self.shadow
+        for sq in shadow.edge_sq_list[index]:
+            if shadow.square_filled[sq] != 3:
+                continue                # Not the square being taken
+            for open_index, other in self.open_neighbors(sq):
+                if other is None or not self.is_link[other]:
+                    continue
+                size = self.get_chain_size(other)
+                if size == 1:           # Chain end: draw the far side of the link
+                    for far_index, far in self.open_neighbors(other):
+                        if far_index != open_index:
+                            if far is not None and shadow.square_filled[far] == 3:
+                                return None     # Both ends takeable - not a chain end
+                            return far_index
+                elif size == 2:         # Loop end: two links between takeable squares
+                    root = self.find(other)
+                    mate = [msq for msq in self.members[root] if msq != other][0]
+                    for mid_index, mid in self.open_neighbors(other):
+                        if mid == mate:
+                            for far_index, far in self.open_neighbors(mate):
+                                if far_index != mid_index:
+                                    if far is None or shadow.square_filled[far] != 3:
+                                        return None     # Chain of two, not loop end
+                            return mid_index
+        return None
+
+
+    def get_control_value(self, exclude_sq=None):
+        """ Estimated net squares to the player in control (the player
+        able to double deal) from the remaining long chains and loops:
+        each but the last long chain returns 2 squares, each loop 4
+        :exclude_sq: square, whose chain is being taken, not counted
+        :returns: net square advantage, 0 if no long chains or loops
+        """
+        exclude_root = None
+        if exclude_sq is not None and self.is_link[exclude_sq]:
+            exclude_root = self.find(exclude_sq)
+        value = 0
+        last_return = 0         # Returned squares not required on last
+        for chain in self.get_chains():
+            if exclude_root is not None and self.find(chain.squares[0]) == exclude_root:
+                continue
+            if chain.is_loop:
+                value += len(chain) - 8
+                last_return = max(last_return, 8)
+            elif len(chain) >= self.LONG_CHAIN:
+                value += len(chain) - 4
+                last_return = max(last_return, 4)
+        return value + last_return
+
+
+    def is_control_worth(self, exclude_sq=None):
+        """ Check if keeping control (double dealing) is worth while
+        i.e. no safe moves remain and the control value exceeds the
+        two squares double dealing gives up (vs taking them)
+        :exclude_sq: square, whose chain is being taken, not counted
+        """
+        if len(self.shadow.get_safe_edges()) > 0:
+            return False
+
+        return self.get_control_value(exclude_sq=exclude_sq) > 2
+
+
+    def get_sacrifice_move(self):
+        """ Get move giving away the fewest squares
+        Prefers the middle side of a two chain (leaving no double deal)
+        :returns: edge index, None if no open edges
+        """
+        shadow = self.shadow
+        best_index = None
+        best_cost = None
+        for index in shadow.open_edges[:shadow.nopen_line]:
+            roots = set()
+            nsq = 0                     # Squares given away
+            for sq in shadow.edge_sq_list[index]:
+                if self.is_link[sq]:
+                    root = self.find(sq)
+                    if root not in roots:
+                        roots.add(root)
+                        nsq += len(self.members[root])
+                elif shadow.square_filled[sq] == 3:
+                    nsq += 1
+            cost = (nsq, 0 if nsq == 2 and len(roots) == 1 else 1)
+            if best_cost is None or cost < best_cost:
+                best_cost = cost
+                best_index = index
+        return best_index
+
+
+    def get_chain_move(self, player_num=1, nplayer=2):
+        """ Choose move using the chain analysis
+        :player_num: our playing number (1 - first player)
+        :nplayer: number of players
+        :returns: edge index, None if no legal moves
+        """
+        shadow = self.shadow
+        captures = shadow.get_completing_edges()
+        if len(captures) > 0:
+            free_captures = []
+            deal_captures = []
+            for index in captures:
+                if self.get_double_deal_move(index) is None:
+                    free_captures.append(index)
+                else:
+                    deal_captures.append(index)
+            if free_captures:
+                return free_captures[random.randint(0, len(free_captures)-1)]
+
+            index = deal_captures[0]
+            deal_index = self.get_double_deal_move(index)
+            for other_index in deal_captures:
+                if self.get_double_deal_move(other_index) != deal_index:
+                    return index        # Another strand remains - deal on the last
+            exclude_sq = [sq for sq in shadow.edge_sq_list[deal_index] if self.is_link[sq]]
+            if self.is_control_worth(exclude_sq=exclude_sq[0] if exclude_sq else None):
+                SlTrace.lg(f"chain double deal edge {deal_index}", "play_strategy")
+                return deal_index
+            return index
+
+        safe = shadow.get_safe_edges()
+        if len(safe) > 0:
+            if nplayer == 2 and len(safe) <= self.PARITY_MAX_SAFE:
+                want_parity = 0 if player_num == 1 else 1
+                good = []
+                work = shadow.copy()        # Probe, leaving our board untouched
+                work_chains = work.get_chains()
+                for index in safe:
+                    work.make_move(index, player_num)
+                    if work_chains.get_long_chain_parity() == want_parity:
+                        good.append(index)
+                    work.unmake_move()
+                if good:
+                    return good[random.randint(0, len(good)-1)]
+            return safe[random.randint(0, len(safe)-1)]
+
+        return self.get_sacrifice_move()
+
+
+if __name__ == "__main__":
+    import time
+
+    from dots_shadow import DotsShadow
+
+    def chains_key(chains):
+        return sorted((sorted(chain.squares), chain.is_loop)
+                      for chain in chains.get_chains())
+
+    random.seed(1)
+    for nr, nc in [(3,3), (3,6), (5,5), (15,15)]:
+        shadow = DotsShadow(None, nr, nc)
+        chains = shadow.get_chains()
+        time_beg = time.time()
+        nmove = 0
+        while shadow.get_num_legal_moves() > 0:
+            index = int(shadow.open_edges[random.randint(0, shadow.nopen_line-1)])
+            shadow.make_move(index, 1)
+            nmove += 1
+            chains.get_chains()
+        time_tot = time.time() - time_beg
+        SlTrace.lg(f"{nr}x{nc}: {nmove} moves {nmove/time_tot:.0f} updates/sec")
+
+        nbad = 0                    # Check incremental against rebuilt chains
+        for game in range(20):
+            shadow.reset()
+            chains = shadow.get_chains()
+            while shadow.get_num_legal_moves() > 0:
+                index = int(shadow.open_edges[random.randint(0, shadow.nopen_line-1)])
+                shadow.make_move(index, 1)
+                if chains_key(chains) != chains_key(DotsChains(shadow)):
+                    nbad += 1
+                if random.random() < .3:
+                    shadow.unmake_move()
+                    if chains_key(chains) != chains_key(DotsChains(shadow)):
+                        nbad += 1
+                    shadow.make_move(index, 1)
+        if nbad > 0:
+            SlTrace.lg(f"{nr}x{nc}: incremental chains differ from rebuilt chains"
+                       f" {nbad} times")
@@ -0,0 +1,147 @@
+# dots_edges.py
+"""
+Canonical edge and square indexing, with per board size lookup tables
+
+Edge index
+    The edge index of (row, col, hv), row, col starting at 1,
+    hv: horizontal==0, vertical==1, is the flat index into the
+    DotsShadow.lines array [nrows+1, ncols+1, 2]:
+        index = ((row-1)*(ncols+1) + (col-1))*2 + hv
+    Positions with no edge (horizontal at the right end,
+    vertical at the bottom) are indexes, but never edges.
+
+Square index
+    square (row, col) index = (row-1)*ncols + (col-1)
+    nsquare (nrows*ncols), in the padded tables, is no square
+
+Tables are made once per board size, by get_edge_tables, and shared
+by every board of that size: DotsShadow, DotsBitBoard, MoveList,
+DotsChains, DotsSearch.  They must not be modified.
+"""
+import numpy as np
+
+HV_H = 0                # Horizontal edge
+HV_V = 1                # Vertical edge
+
+
+class DotsEdgeTables:
+    """ Edge / square lookup tables for one board size
+        nindex              number of edge indexes, including non-edges
+        nedge               number of real edges
+        nsquare             number of squares
+        edge_rch[index]     array [nindex, 3] of row, col, hv
+        edge_rchs[index]    (row, col, hv) tuple
+        is_edge[index]      True for a real edge
+        edge_indexes        array of real edge indexes, increasing
+        legal_mask          bit set for each real edge
+        edge_sq[index]      array [nindex, 2] of the (up to two) squares
+                            bordering the edge, nsquare if none
+        edge_sq_list[index] tuple of squares bordering the edge
+        edge_sq_rcs[index]  tuple of (row, col) of squares bordering the edge
+        square_rcs[sq]      (row, col) of square
+        square_edges[sq]    array [nsquare, 4] of square's edges:
+                            top, bottom, left, right
+        square_edge_list[sq] tuple of square's edges
+        square_masks[sq]    bit set for each of the square's edges
+        edge_other_masks[index] for each bordering square, the bits
+                            of the square's other three edges
+    """
+    def __init__(self, nrows, ncols):
+        """ Build tables
+        :nrows: number of rows of squares
+        :ncols: number of columns of squares
+        """
+        self.nrows = nrows
+        self.ncols = ncols
+        nindex = (nrows+1)*(ncols+1)*2
+        nsq = nrows*ncols
+        self.nindex = nindex
+        self.nsquare = nsq
+
+        edge_rch = np.zeros([nrows+1, ncols+1, 2, 3], dtype=int)
+        edge_rch[:,:,:,0] = np.arange(1, nrows+2).reshape(nrows+1, 1, 1)
+        edge_rch[:,:,:,1] = np.arange(1, ncols+2).reshape(1, ncols+1, 1)
+        edge_rch[:,:,:,2] = np.arange(2).reshape(1, 1, 2)
+        self.edge_rch = edge_rch.reshape(-1, 3)
+        self.edge_rchs = [tuple(rch) for rch in self.edge_rch.tolist()]
+
+        is_edge = np.ones([nrows+1, ncols+1, 2], dtype=bool)
+        is_edge[:, ncols, HV_H] = False         # No horizontal edge at right end
+        is_edge[nrows, :, HV_V] = False         # No vertical edge at bottom end
+        self.is_edge = is_edge.ravel()
+        self.edge_indexes = np.flatnonzero(self.is_edge)
+        self.nedge = len(self.edge_indexes)
+        legal_mask = 0
+        for index in self.edge_indexes.tolist():
+            legal_mask |= 1 << index
+        self.legal_mask = legal_mask
+
+        self.square_rcs = [(sq//ncols + 1, sq%ncols + 1) for sq in range(nsq)]
+        self.square_edge_list = [(self.edge_index(row, col, HV_H),       # top
+                                  self.edge_index(row+1, col, HV_H),     # bottom
+                                  self.edge_index(row, col, HV_V),       # left
+                                  self.edge_index(row, col+1, HV_V))     # right
+                                 for row, col in self.square_rcs]
+        self.square_edges = np.array(self.square_edge_list, dtype=int).reshape(nsq, 4)
+        self.square_masks = []
+        edge_sq_list = [()]*nindex
+        edge_other_masks = [()]*nindex
+        for sq, sides in enumerate(self.square_edge_list):
+            sq_mask = 0
+            for side in sides:
+                sq_mask |= 1 << side
+            self.square_masks.append(sq_mask)
+            for side in sides:
+                edge_sq_list[side] += (sq,)
+                edge_other_masks[side] += (sq_mask & ~(1 << side),)
+        self.edge_sq_list = edge_sq_list
+        self.edge_other_masks = edge_other_masks
+        self.edge_sq_rcs = [tuple(self.square_rcs[sq] for sq in sqs)
+                            for sqs in edge_sq_list]
+        self.edge_sq = np.full([nindex, 2], nsq, dtype=int)
+        for index, sqs in enumerate(edge_sq_list):
+            self.edge_sq[index, 0:len(sqs)] = sqs
+        for array in (self.edge_rch, self.is_edge, self.edge_indexes,
+                      self.square_edges, self.edge_sq):
+            array.flags.writeable = False
+
+
+    def edge_index(self, row, col, hv):
+        """ Edge index
+        :row: row number, starting at 1
+        :col: col number, starting at 1
+        :hv: horizontal==0, vertical==1
+        :returns: edge index
+        """
+        return ((row-1)*(self.ncols+1) + (col-1))*2 + hv
+
+
+    def index_edge(self, index):
+        """ Edge (row, col, hv) from index
+        :index: edge index
+        :returns: (row, col, hv) row, col starting at 1
+        """
+        return self.edge_rchs[index]
+
+
+    def square_index(self, row, col):
+        """ Square index
+        :row: square row, starting at 1
+        :col: square col, starting at 1
+        """
+        return (row-1)*self.ncols + (col-1)
+
+
+edge_tables = {}                # DotsEdgeTables by (nrows, ncols)
+
+def get_edge_tables(nrows, ncols):
+    """ Get tables for board size, made on first use
+    :nrows: number of rows of squares
+    :ncols: number of columns of squares
+    :returns: DotsEdgeTables
+    """
+    key = (nrows, ncols)
+    tables = edge_tables.get(key)
+    if tables is None:
+        tables = edge_tables[key] = DotsEdgeTables(nrows, ncols)
+    return tables
@@ -0,0 +1,403 @@
+# dots_engine.py
+"""
+Headless dots game play - complete games between the
+automatic players using only the DotsShadow array state.
+
+No SelectPart, canvas, command/undo or Tk activity is involved,
+so many games can be played quickly e.g. for tournaments and
+board size sweeps.
+
+The playing strategies mirror SelectPlay.auto_play:
+    auto_play_positive, auto_play_negative, auto_play_random
+    with player level and steven (stay even) adjustment.
+Given the same random state, a game played here makes the same
+moves as one played through SelectPlay.new_edge, and produces
+the same move tuples and results recorded by DotsGameFile.
+SelectPlay reseeds random with 1 at the start of each game, so
+seed=1 reproduces its games.
+"""
+import random
+import time
+
+from select_trace import SlTrace
+from select_error import SelectError
+from dots_shadow import DotsShadow
+from move_list import MVP
+from dots_strategy import DotsStrategy
+from dots_game_load import DotsGame
+
+
+class DotsEnginePlayer:
+    """ Minimal automatic player description for headless play
+    Field names follow SelectPlayer, so a SelectPlayer may be used
+    in its place.
+    """
+    def __init__(self, name=None, label=None, level=0, steven=0.0):
+        """ Setup player
+        :name: player's name default: "auto"<playing number>
+        :label: player's label default: first character of name
+        :level: Player level >0 - play stronger to win
+                             0 -> random
+                             <0 - play to loose
+        :steven: stay even - see DotsEngine.adjust_level_to_stay_even
+        """
+        self.name = name
+        self.label = label
+        self.level = level
+        self.steven = steven
+
+
+    def __str__(self):
+        return f"{self.name} level={self.level} steven={self.steven}"
+
+
+class DotsEngine:
+    """ Play complete games on the shadow board
+    """
+    LEVEL_SQUARE = DotsStrategy.LEVEL_SQUARE
+    LEVEL_NO_GIVE_SQUARE = DotsStrategy.LEVEL_NO_GIVE_SQUARE
+
+    def __init__(self, nrows=5, ncols=None, players=None,
+                 results_file=None, seed=None,
+                 game_name="dots", use_bitboard=True,
+                 search_time=DotsStrategy.SEARCH_TIME,
+                 mcts_playouts=None, mcts_time=DotsStrategy.MCTS_TIME,
+                 use_book=True, book_dir=None):
+        """ Setup engine
+        :nrows: number of rows of squares default: 5
+        :ncols: number of columns of squares default: nrows
+        :players: list, in playing order, of players
+                (DotsEnginePlayer or SelectPlayer)
+                default: two level 2 players
+        :results_file: DotsGameFile, if present, to which games are recorded
+        :seed: if present, random is seeded with seed at the start of each game
+                e.g. seed=1 reproduces SelectPlay games
+                default: random is not reseeded
+        :game_name: game name recorded default: "dots"
+        :use_bitboard: shadow uses DotsBitBoard for move queries
+                        default: True
+        :search_time: search player time limit per move, in seconds
+                        default: DotsStrategy.SEARCH_TIME
+        :mcts_playouts: MCTS player playouts per move default: no limit
+        :mcts_time: MCTS player time limit per move, in seconds
+                        default: DotsStrategy.MCTS_TIME
+        :use_book: search / MCTS players, of two players, play positions
+                found in the board size's solved position table (dots_book)
+                        default: True
+        :book_dir: solved position table directory default: dots_book.BOOK_DIR
+        """
+        self.nrows = nrows
+        if ncols is None:
+            ncols = nrows
+        self.ncols = ncols
+        if players is None:
+            players = [DotsEnginePlayer(level=2), DotsEnginePlayer(level=2)]
+        if len(players) == 0:
+            raise SelectError("DotsEngine: no players")
+        for i, player in enumerate(players):
+            if player.name is None:
+                player.name = f"auto{i+1}"
+            if player.label is None:
+                player.label = player.name[0]
+        self.players = players
+        self.results_file = results_file
+        self.seed = seed
+        self.game_name = game_name
+        self.use_bitboard = use_bitboard
+        self.strategy = DotsStrategy(search_time=search_time,
+                                     mcts_playouts=mcts_playouts, mcts_time=mcts_time,
+                                     use_book=use_book, book_dir=book_dir)
+        self.strategy.load_book(nrows, ncols)   # Load, if one, at startup
+        self.ngame = 0
+        self.new_game()
+
+
+    def new_game(self):
+        """ Setup for a new game
+        """
+        self.shadow = DotsShadow(None, nrows=self.nrows, ncols=self.ncols,
+                                 use_bitboard=self.use_bitboard)
+        self.scores = len(self.players)*[0]
+        self.player_index = 0           # Current player index in self.players
+        self.game_moves = []            # (player, row, col) as in DotsGameFile
+
+
+    def play_games(self, numgame, seed=None):
+        """ Play a number of games
+        :numgame: number of games
+        :seed: see play_game
+        :returns: list of DotsGame records
+        """
+        games = []
+        for _ in range(numgame):
+            games.append(self.play_game(seed=seed))
+        return games
+
+
+    def play_game(self, seed=None):
+        """ Play one complete game
+        :seed: if present, seed random before game
+                default: self.seed, if set at setup
+        :returns: DotsGame with game_moves and results
+        """
+        if seed is None:
+            seed = self.seed
+        if seed is not None:
+            random.seed(seed)
+        self.new_game()
+        nplayer = len(self.players)
+        if self.results_file is not None:
+            self.results_file.start_game(game_name=self.game_name,
+                    nplayer=nplayer, nrow=self.nrows, ncol=self.ncols)
+        ts = SlTrace.getTs(dp=4)
+        time_beg = time.time()
+        while True:
+            player = self.players[self.player_index]
+            mvp = self.auto_play(player)
+            if mvp is None:
+                break
+            self.new_edge(mvp)
+        self.ngame += 1
+        if self.results_file is not None:
+            self.results_file.end_game()
+        game = DotsGame(name=self.game_name, game_no=self.ngame,
+                        time=time.time()-time_beg,
+                        nplayer=nplayer, nrow=self.nrows, ncol=self.ncols,
+                        nmove=len(self.game_moves), ts=ts)
+        game.game_moves = self.game_moves
+        game.results = tuple((i+1, score) for i, score in enumerate(self.scores))
+        SlTrace.lg(f"engine game {self.ngame}: results={game.results}", "engine")
+        return game
+
+
+    def get_player_num(self):
+        """ Get current player's order number, starting with 1 for first play
+        """
+        return self.player_index + 1
+
+
+    def get_next_player(self):
+        """ Get next player to move, without changing current player
+        """
+        return self.players[(self.player_index+1) % len(self.players)]
+
+
+    def get_score(self, player):
+        """ Get player's current score
+        :player: player
+        """
+        return self.scores[self.players.index(player)]
+
+
+    def new_edge(self, mvp):
+        """ Make move, adjusting score and current player
+        as done by SelectPlay.new_edge
+        :mvp: move (MVP) row, col, hv
+        :returns: list of completed squares, empty if none
+        """
+        row, col, hv = int(mvp.row), int(mvp.col), int(mvp.hv)
+        pn = self.get_player_num()
+        self.game_moves.append((pn, row, col))
+        if self.results_file is not None:
+            self.results_file.next_move(player=pn, row=row, col=col)
+        shadow = self.shadow
+        shadow.turn_on_edge(row, col, hv, pn)
+        squares = shadow.get_completed_squares(row, col, hv)
+        if squares:
+            for sq in squares:
+                shadow.turn_on_square(sq[0], sq[1], pn)
+            nsq = len(squares)
+            self.scores[self.player_index] += nsq
+            if self.results_file is not None:
+                self.results_file.results_update(player_num=pn, nsquare=nsq)
+        else:
+            self.player_index = (self.player_index+1) % len(self.players)
+        return squares
+
+
+    def auto_play(self, player):
+        """ Choose automatic move based on "level" of player
+        :player: player to move
+        :returns: move(MVP), None if no legal moves
+        """
+        if self.shadow.get_num_legal_moves() == 0:
+            return None
+
+        level = self.adjust_level_to_stay_even(player)
+        if level > 0:
+            return self.auto_play_positive(player)
+        elif level < 0:
+            return self.auto_play_negative(player)
+        return self.auto_play_random(player)
+
+
+    def adjust_level_to_stay_even(self, player):
+        """ Adjust playing level to stay even, if steven != 0
+        See SelectPlay.adjust_level_to_stay_even
+        :player: current player - us
+        :returns: adjusted level
+        """
+        level = player.level
+        steven = player.steven
+        if steven == 0:
+            return level        # No adjustment wanted
+
+        our_score = self.get_score(player)
+        next_score = self.get_score(self.get_next_player())
+        diff = abs(our_score - next_score)
+        steven_abs = abs(steven)
+        diff_limit = steven_abs
+        if steven_abs < 1:
+            diff_limit = steven_abs * (our_score+next_score)/2
+
+        if diff > diff_limit:
+            if our_score > next_score:
+                level = -abs(level)     # reduce our level
+            elif our_score < next_score:
+                level = abs(level)
+        return level
+
+
+    def auto_play_positive(self, player):
+        """ Positive player - trying to "win"
+        :returns: move(MVP)
+        """
+        level = player.level
+        shadow = self.shadow
+        index = self.strategy.get_move(shadow, level, player_num=self.get_player_num(),
+                                       nplayer=len(self.players))
+        if index is not None:
+            row, col, hv = shadow.tables.edge_rchs[index]
+            return MVP(row=row, col=col, hv=hv)
+
+        legal_list = shadow.get_legal_list()
+        if level >= self.LEVEL_SQUARE:
+            square_list = shadow.get_square_moves(legal_list)
+            if square_list.get_nmoves() > 0:
+                return square_list.rand_move()
+
+        if level >= self.LEVEL_NO_GIVE_SQUARE:
+            safe_square_list = shadow.get_square_distance_list(min_dist=2,
+                                                            move_list=legal_list)
+            if safe_square_list.get_nmoves() > 0:
+                return safe_square_list.rand_move()
+
+        return self.auto_play_random(player)         # Default - just play one
+
+
+    def auto_play_negative(self, player):
+        """ Negative player - trying to "loose"
+        :returns: move(MVP)
+        """
+        level = player.level
+        shadow = self.shadow
+        legal_list = shadow.get_legal_list()
+        if abs(level) >= self.LEVEL_SQUARE:
+            dists = shadow.edge_distances(legal_list.get_indexes())
+            not_square_moves = legal_list.filter(dists > 0)
+            not_safe_moves = legal_list.filter(dists == 1)     # give win to next player
+            if abs(level) >= self.LEVEL_NO_GIVE_SQUARE:
+                if len(not_safe_moves) > 0:
+                    return not_safe_moves.rand_move()
+
+            if len(not_square_moves) > 0:
+                return not_square_moves.rand_move()
+
+        return self.auto_play_random(player)
+
+
+    def auto_play_random(self, player):
+        """ Play the random next legal move
+        :returns: move(MVP)
+        """
+        return self.shadow.rand_legal_move()
+
+
+if __name__ == "__main__":
+    import argparse
+    from dots_game_file import DotsGameFile
+
+    nx = 5
+    ny = None
+    numgame = 100
+    play_level = "2,2"
+    steven = "0"
+    seed = None
+    results_dir = None
+    results_files = False
+    trace = ""
+    no_bitboard = False
+    search_time = DotsStrategy.SEARCH_TIME
+    mcts_playouts = None
+    mcts_time = DotsStrategy.MCTS_TIME
+    batch_games = 100
+    background = False
+    max_file_games = None
+    no_book = False
+    book_dir = None
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nx=', type=int, dest='nx', default=nx)
+    parser.add_argument('--ny=', type=int, dest='ny', default=ny)
+    parser.add_argument('--numgame=', type=int, dest='numgame', default=numgame)
+    parser.add_argument('--play_level=', dest='play_level', default=play_level)
+    parser.add_argument('--steven=', dest='steven', default=steven)
+    parser.add_argument('--seed=', type=int, dest='seed', default=seed)
+    parser.add_argument('--results_files', action='store_true', dest='results_files',
+                        default=results_files)
+    parser.add_argument('--results_dir', dest='results_dir', default=results_dir)
+    parser.add_argument('--batch_games=', type=int, dest='batch_games', default=batch_games)
+    parser.add_argument('--background', action='store_true', dest='background',
+                        default=background)
+    parser.add_argument('--max_file_games=', type=int, dest='max_file_games',
+                        default=max_file_games)
+    parser.add_argument('--trace', dest='trace', default=trace)
+    parser.add_argument('--search_time=', type=float, dest='search_time', default=search_time)
+    parser.add_argument('--mcts_playouts=', type=int, dest='mcts_playouts', default=mcts_playouts)
+    parser.add_argument('--mcts_time=', type=float, dest='mcts_time', default=mcts_time)
+    parser.add_argument('--no_bitboard', action='store_true', dest='no_bitboard',
+                        default=no_bitboard)
+    parser.add_argument('--no_book', action='store_true', dest='no_book',
+                        default=no_book)
+    parser.add_argument('--book_dir=', dest='book_dir', default=book_dir)
+    args = parser.parse_args()             # or die "Illegal options"
+    if args.trace:
+        SlTrace.setFlags(args.trace)
+    levels = [int(x) for x in args.play_level.split(",")]
+    stevens = [float(x) for x in args.steven.split(",")]
+    players = []
+    for i, level in enumerate(levels):
+        st = stevens[i] if i < len(stevens) else stevens[-1]
+        players.append(DotsEnginePlayer(level=level, steven=st))
+    rF = None
+    if args.results_files:
+        rF = DotsGameFile(file_dir=args.results_dir, history="dots_engine",
+                          pgm_info=str(args), batch_games=args.batch_games,
+                          background=args.background,
+                          max_file_games=args.max_file_games)
+    engine = DotsEngine(nrows=args.ny if args.ny is not None else args.nx,
+                        ncols=args.nx, players=players,
+                        results_file=rF, seed=args.seed,
+                        use_bitboard=not args.no_bitboard,
+                        search_time=args.search_time,
+                        mcts_playouts=args.mcts_playouts, mcts_time=args.mcts_time,
+                        use_book=not args.no_book, book_dir=args.book_dir)
+    time_beg = time.time()
+    games = engine.play_games(args.numgame)
+    time_tot = time.time() - time_beg
+    if rF is not None:
+        rF.end_file()
+    nwin = len(players)*[0]
+    ntie = 0
+    for game in games:
+        top = max(res[1] for res in game.results)
+        tops = [res[0] for res in game.results if res[1] == top]
+        if len(tops) > 1:
+            ntie += 1
+        else:
+            nwin[tops[0]-1] += 1
+    SlTrace.lg(f"{len(games)} games {engine.nrows}x{engine.ncols}"
+               f" in {time_tot:.3f} sec"
+               f" ({len(games)/time_tot if time_tot > 0 else 0:.1f} games/sec)")
+    for i, player in enumerate(players):
+        SlTrace.lg(f"    player {i+1} {player}: wins={nwin[i]}")
+    SlTrace.lg(f"    ties={ntie}")
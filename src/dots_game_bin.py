@@ -0,0 +1,391 @@
+# dots_game_bin.py
+"""
+Compact binary, columnar, dots game results file (.gmbin)
+Holds the same games as the .gmres files written by DotsGameFile,
+see dots_game_file.py, but is read by memory mapping instead of
+executing the file as python.
+
+    File layout (little endian)
+    "DOTSGMB1"          8 byte file identifier
+    header length       uint32
+    header              JSON text: counts, section offsets, move type,
+                        history, pgm_info
+    games               game header table, one entry per game:
+                            name, game_no, nrow, ncol, nplayer, nmove,
+                            time, ts, move_start, result_start
+                        name (at most 16 bytes UTF-8) and ts (at most 24)
+                        are fixed size fields, longer values are refused
+    results             int32, nplayer squares per game, player 1 first,
+                            starting at game's result_start
+    moves               [nmove, 3] (player, row, col), uint8
+                            (uint16 if any value > 255),
+                            starting at game's move_start
+    Sections start on SECTION_ALIGN byte boundaries.
+
+Reading a file maps the three sections as numpy arrays, so selecting
+games (e.g. by board size) and totaling results is done on the
+arrays without making per game objects.
+"""
+import array
+import json
+import os
+import shutil
+
+import numpy as np
+
+from select_trace import SlTrace
+from select_error import SelectError
+from dots_game_load import DotsGame
+
+FILE_ID = b"DOTSGMB1"
+FILE_VERSION = 1
+SECTION_ALIGN = 64
+GAME_DTYPE = np.dtype([("name", "S16"),
+                       ("game_no", "<i4"),
+                       ("nrow", "<i2"),
+                       ("ncol", "<i2"),
+                       ("nplayer", "<i2"),
+                       ("nmove", "<i4"),
+                       ("time", "<f8"),
+                       ("ts", "S24"),
+                       ("move_start", "<i8"),
+                       ("result_start", "<i8")])
+
+
+class DotsGameBinWriter:
+    """ Write games to a .gmbin file
+    Games are collected in memory CHUNK_GAMES at a time, each chunk's
+    games, results and moves being appended to per section spool files,
+    which are joined into the .gmbin file when it is closed.
+    The file is written under a temporary name and then renamed,
+    so a partial file is never left under the final name.
+    """
+    CHUNK_GAMES = 65536         # Games held in memory before spooling
+    COPY_MOVES = 1 << 20        # Moves converted at a time when joining
+    
+    def __init__(self, file_path, history=None, pgm_info=None):
+        """ Setup file output
+        :file_path: output file path
+        :history: history of program, e.g. features
+        :pgm_info: program information string - args etc.
+        """
+        self.file_path = file_path
+        self.history = history
+        self.pgm_info = pgm_info
+        self.ngame = 0              # Games added
+        self.nresult = 0            # Results added
+        self.nmove = 0              # Moves added
+        self.game_rows = []         # Games, results, moves not yet spooled
+        self.results = array.array("i")
+        self.moves = array.array("i")
+        self.move_max = 0           # Largest move value - selects move type
+        self.tmp_path = file_path + ".tmp"
+        self.spool_paths = dict((name, "%s.%s" % (self.tmp_path, name))
+                                for name in ("games", "results", "moves"))
+        self.spools = dict((name, open(path, "wb"))
+                           for name, path in self.spool_paths.items())
+
+
+    def check_str(self, game, field, value, nbyte):
+        """ Encode string for fixed size game table field
+        :game: DotsGame, for error message
+        :field: field name
+        :value: string, None for empty
+        :nbyte: field size in bytes
+        :returns: encoded value
+        """
+        value_bytes = b"" if value is None else value.encode()
+        if len(value_bytes) > nbyte:
+            raise SelectError("game %s %s %r longer than %d bytes"
+                              % (game.game_no, field, value, nbyte))
+        return value_bytes
+
+
+    def add_game(self, game):
+        """ Add game
+        :game: DotsGame with game_moves and results
+        """
+        name = self.check_str(game, "name", game.name, GAME_DTYPE["name"].itemsize)
+        ts = self.check_str(game, "ts", game.ts, GAME_DTYPE["ts"].itemsize)
+        squares = game.nplayer*[0]
+        for result in game.results:
+            pn = result[0]
+            if pn < 1 or pn > game.nplayer:
+                SlTrace.lg("add_game result player_num:%d not in 1-%d - ignored"
+                           % (pn, game.nplayer))
+                continue
+            squares[pn-1] = result[1]
+        chunk_start = len(self.moves)
+        for move in game.game_moves:
+            self.moves.extend((move[0], move[1], move[2]))
+        nmove = (len(self.moves) - chunk_start)//3
+        if nmove > 0:
+            move_max = max(self.moves[chunk_start:])
+            if move_max > self.move_max:
+                self.move_max = move_max
+        self.results.extend(squares)
+        self.game_rows.append((name, game.game_no,
+                               game.nrow, game.ncol, game.nplayer, nmove,
+                               game.time, ts,
+                               self.nmove, self.nresult))
+        self.ngame += 1
+        self.nresult += game.nplayer
+        self.nmove += nmove
+        if len(self.game_rows) >= self.CHUNK_GAMES:
+            self.spool_chunk()
+
+
+    def spool_chunk(self):
+        """ Append games, results and moves held to the spool files
+        """
+        spools = self.spools
+        spools["games"].write(np.array(self.game_rows, dtype=GAME_DTYPE).tobytes())
+        spools["results"].write(np.frombuffer(self.results, dtype=np.int32)
+                                .astype("<i4").tobytes())
+        spools["moves"].write(np.frombuffer(self.moves, dtype=np.int32)
+                              .astype("<i4").tobytes())
+        self.game_rows = []
+        self.results = array.array("i")
+        self.moves = array.array("i")
+
+
+    def add_games(self, games):
+        """ Add games
+        :games: iterable of DotsGame
+        """
+        for game in games:
+            self.add_game(game)
+
+
+    def get_num_games(self):
+        """ Number of games added
+        """
+        return self.ngame
+
+
+    def close(self):
+        """ Write file
+        """
+        self.spool_chunk()
+        for spool in self.spools.values():
+            spool.close()
+        move_dtype = "<u1" if self.move_max <= 0xff else "<u2"
+        section_nbytes = dict(games=self.ngame*GAME_DTYPE.itemsize,
+                              results=self.nresult*4,
+                              moves=self.nmove*3*np.dtype(move_dtype).itemsize)
+        header = dict(version=FILE_VERSION, ngame=self.ngame,
+                      nresult=self.nresult, nmove=self.nmove,
+                      move_dtype=move_dtype,
+                      history=self.history, pgm_info=self.pgm_info)
+        sections = ("games", "results", "moves")
+        header_len = 1024           # Room for offsets, extended if needed
+        while True:
+            offset = len(FILE_ID) + 4 + header_len
+            for name in sections:
+                offset = (offset + SECTION_ALIGN-1)//SECTION_ALIGN*SECTION_ALIGN
+                header[name] = offset
+                offset += section_nbytes[name]
+            header_bytes = json.dumps(header).encode()
+            if len(header_bytes) <= header_len:
+                break
+            header_len = len(header_bytes)
+        with open(self.tmp_path, "wb") as fout:
+            fout.write(FILE_ID)
+            fout.write(np.array([header_len], dtype="<u4").tobytes())
+            fout.write(header_bytes.ljust(header_len))
+            for name in sections:
+                fout.seek(header[name])
+                with open(self.spool_paths[name], "rb") as fin:
+                    if name == "moves":
+                        while True:
+                            data = fin.read(self.COPY_MOVES*3*4)
+                            if not data:
+                                break
+                            fout.write(np.frombuffer(data, dtype="<i4")
+                                       .astype(move_dtype).tobytes())
+                    else:
+                        shutil.copyfileobj(fin, fout)
+        for path in self.spool_paths.values():
+            os.remove(path)
+        os.replace(self.tmp_path, self.file_path)
+        SlTrace.lg("%s: %d games written" % (self.file_path, self.ngame), "game_bin")
+
+
+class DotsGameBin:
+    """ Memory mapped .gmbin file
+    """
+    def __init__(self, file_path):
+        """ Map file
+        :file_path: .gmbin file path
+        """
+        self.file_path = file_path
+        with open(file_path, "rb") as fin:
+            file_id = fin.read(len(FILE_ID))
+            if file_id != FILE_ID:
+                raise SelectError(f"{file_path} is not a dots game binary file")
+            header_len = int(np.frombuffer(fin.read(4), dtype="<u4")[0])
+            header = json.loads(fin.read(header_len).decode())
+        if header["version"] > FILE_VERSION:
+            raise SelectError(f"{file_path} version {header['version']}"
+                              f" is newer than {FILE_VERSION}")
+        self.header = header
+        self.history = header["history"]
+        self.pgm_info = header["pgm_info"]
+        self.games = self.map_section(GAME_DTYPE, header["games"], (header["ngame"],))
+        self.results = self.map_section("<i4", header["results"], (header["nresult"],))
+        self.moves = self.map_section(header["move_dtype"], header["moves"],
+                                      (header["nmove"], 3))
+
+
+    def map_section(self, dtype, offset, shape):
+        """ Map file section as array
+        :dtype: array type
+        :offset: section offset in file
+        :shape: array shape
+        """
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)     # Empty files can't be mapped
+        return np.memmap(self.file_path, dtype=dtype, mode="r", offset=offset,
+                         shape=shape)
+
+
+    def get_num_games(self):
+        """ Number of games in file
+        """
+        return len(self.games)
+
+
+    def select(self, nrow=None, ncol=None, nplayer=None, ts_min=None, ts_max=None):
+        """ Select games
+        :nrow: if present, only games with nrow rows
+        :ncol: if present, only games with ncol columns
+        :nplayer: if present, only games with nplayer players
+        :ts_min: if present, only games with timestamp >= ts_min
+        :ts_max: if present, only games with timestamp <= ts_max
+        :returns: array of selected game indexes
+        """
+        games = self.games
+        mask = np.ones(len(games), dtype=bool)
+        if nrow is not None:
+            mask &= games["nrow"] == nrow
+        if ncol is not None:
+            mask &= games["ncol"] == ncol
+        if nplayer is not None:
+            mask &= games["nplayer"] == nplayer
+        if ts_min is not None:
+            mask &= games["ts"] >= ts_min.encode()
+        if ts_max is not None:
+            mask &= games["ts"] <= ts_max.encode()
+        return np.nonzero(mask)[0]
+
+
+    def get_results_array(self, indexes=None):
+        """ Squares per player, one row per game
+        :indexes: game indexes default: all games
+        :returns: int array [ngame, maximum nplayer],
+                    0 for players beyond a game's nplayer
+        """
+        games = self.games if indexes is None else self.games[indexes]
+        if len(games) == 0:
+            return np.zeros((0, 0), dtype=np.int32)
+        nplayers = games["nplayer"].astype(np.int64)
+        max_player = int(nplayers.max())
+        players = np.arange(max_player)
+        in_game = players < nplayers[:, None]
+        result_indexes = games["result_start"][:, None] + players
+        result_indexes = np.where(in_game, result_indexes, 0)
+        return np.where(in_game, self.results[result_indexes], 0)
+
+
+    def get_game(self, index):
+        """ Game as DotsGame
+        Moves are an array view into the mapped file, one (player, row, col)
+        row per move
+        :index: game index
+        """
+        entry = self.games[index]
+        nplayer = int(entry["nplayer"])
+        game = DotsGame(name=entry["name"].decode(), game_no=int(entry["game_no"]),
+                        time=float(entry["time"]), nplayer=nplayer,
+                        nrow=int(entry["nrow"]), ncol=int(entry["ncol"]),
+                        nmove=int(entry["nmove"]), ts=entry["ts"].decode())
+        move_start = int(entry["move_start"])
+        game.game_moves = self.moves[move_start:move_start+game.nmove]
+        result_start = int(entry["result_start"])
+        squares = self.results[result_start:result_start+nplayer]
+        game.results = tuple((pn, int(nsquare)) for pn, nsquare in enumerate(squares, start=1))
+        return game
+
+
+    def iter_games(self, indexes=None):
+        """ Generate games as DotsGame
+        :indexes: game indexes default: all games
+        """
+        if indexes is None:
+            indexes = range(len(self.games))
+        for index in indexes:
+            yield self.get_game(index)
+
+
+def bin_file_name(gmres_file):
+    """ .gmbin file name for .gmres file
+    :gmres_file: .gmres file name
+    """
+    return os.path.splitext(gmres_file)[0] + ".gmbin"
+
+
+def convert_gmres(gmres_file, bin_file=None):
+    """ Convert .gmres file to .gmbin
+    :gmres_file: .gmres file path
+    :bin_file: output file path default: gmres_file with .gmbin extension
+    :returns: number of games converted
+    """
+    from dots_game_parser import DotsGameParser
+
+    if bin_file is None:
+        bin_file = bin_file_name(gmres_file)
+    gp = DotsGameParser(gmres_file)
+    writer = DotsGameBinWriter(bin_file)
+    writer.add_games(gp.games())
+    writer.history = gp.history_str
+    writer.pgm_info = gp.pgm_info_str
+    writer.close()
+    return writer.get_num_games()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    convert = None
+    list_file = None
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--convert', dest='convert', default=convert,
+                        help=".gmres file or directory of .gmres files to convert")
+    parser.add_argument('--list', dest='list_file', default=list_file,
+                        help=".gmbin file to summarize")
+    args = parser.parse_args()             # or die "Illegal options"
+    if args.convert is not None:
+        gmres_files = [args.convert]
+        if os.path.isdir(args.convert):
+            gmres_files = [os.path.join(args.convert, file)
+                           for file in sorted(os.listdir(args.convert))
+                           if file.endswith(".gmres")]
+        for gmres_file in gmres_files:
+            time_beg = time.time()
+            ngame = convert_gmres(gmres_file)
+            SlTrace.lg("%s: %d games converted in %.2f sec"
+                       % (gmres_file, ngame, time.time()-time_beg))
+    if args.list_file is not None:
+        time_beg = time.time()
+        gb = DotsGameBin(args.list_file)
+        games = gb.games
+        SlTrace.lg("%s: %d games %d moves" % (args.list_file, gb.get_num_games(),
+                                              len(gb.moves)))
+        sizes = np.unique(np.stack((games["nrow"], games["ncol"]), axis=1), axis=0)
+        for nrow, ncol in sizes:
+            indexes = gb.select(nrow=nrow, ncol=ncol)
+            squares = gb.get_results_array(indexes)
+            SlTrace.lg("%4d %4d %6d games  mean squares: %s" % (nrow, ncol, len(indexes),
+                       " ".join("%.2f" % sq for sq in squares.mean(axis=0))))
+        SlTrace.lg("%.3f sec" % (time.time()-time_beg))
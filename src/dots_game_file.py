@@ -33,10 +33,25 @@ Support for the saving and loading of dots game results
       )
     results((player,nsquare)[, (player,nsquare)]*)
     
+    Writing
+    Each game is formatted, at end_game, as one record: its game(),
+    moves() and results() text.  Records are written whole, by single
+    writes, batch_games at a time, so a crash can leave at most a
+    partial last record, which the loader (DotsGameParser) drops.
+    The file is flushed after each batch, and synced to disk
+    (fsync) every fsync_games games and at file end.
+    With background=True records are written by a writer thread so
+    end_game never waits on file output.
+    Output is rotated to a new file, with its own version/history
+    header, after max_file_games games or max_file_bytes bytes, counted
+    as written i.e. encoded, with the platform's line endings.
+    A writer thread failure stops all further writing and is reported,
+    by a SelectError, from the next write_records or from end_file.
     """
-import sys, traceback
 import re
 import os
+import queue
+import threading
 from pathlib import Path
 from datetime import date
 from datetime import datetime
@@ -54,13 +69,22 @@ class DotsGameFile:
     
     
     def __init__(self, pgm_info=None, history=None, file_dir=None, file_prefix="dotsgame",
-                 file_ext="gmres"):
+                 file_ext="gmres", batch_games=1, background=False,
+                 fsync_games=None, max_file_games=None, max_file_bytes=None):
         """ Setup games file output
         :pgm_info: program information string - args etc.
         :history: history of program, e.g. featurs
         :file_dir: file directory default=..\gmres
         :file_prefix: file prefix default: dotsgame
         :file_ext: file extension default: gmres
+        :batch_games: number of games written together default: 1
+        :background: True - write in a writer thread default: False
+        :fsync_games: if present, sync file to disk every fsync_games games
+                default: sync only at file end
+        :max_file_games: if present, start a new file after this
+                many games default: one file
+        :max_file_bytes: if present, start a new file before file
+                exceeds this size, in bytes default: one file
         """
         self.history = history
         self.pgm_info = pgm_info
@@ -69,23 +93,36 @@ class DotsGameFile:
         self.file_dir = file_dir
         self.file_prefix = file_prefix 
         self.file_ext = file_ext 
+        self.batch_games = max(batch_games, 1)
+        self.fsync_games = fsync_games
+        self.max_file_games = max_file_games
+        self.max_file_bytes = max_file_bytes
         self.moves = []
+        self.records = []       # Game records waiting to be written
+        self.file_paths = []    # Files opened, in order
         self.open_output()
+        self.writer_queue = None
+        self.writer_thread = None
+        self.writer_error = None    # Exception in writer thread
+        if background:
+            self.writer_queue = queue.Queue(maxsize=64)
+            self.writer_thread = threading.Thread(target=self.writer_loop,
+                                                  name="DotsGameFile writer",
+                                                  daemon=True)
+            self.writer_thread.start()
         self.nfile = 0          # Number of files written
         self.nfile_error = 0    # Number of file errors
         self.game_no = 0        # Current game number, starting at 1
-        self.ngame = 0          # Number of games written
+        self.ngame = 0          # Number of games written to file
         self.ngame_error = 0    # Number pf game errors
-        self.preamble = r"""
-from dots_game_file import *
-"""
          
         
     def open_output(self, file_name=None):
         """ Open games file output
         :file_name:  output file name, base name if not absolute
         """
-        if file_name is None:
+        generated = file_name is None
+        if generated:
             file_name = self.file_prefix 
             if not file_name.endswith("_"):
                 file_name += "_"
@@ -94,6 +131,12 @@ from dots_game_file import *
             file_name += "." + self.file_ext
         if not os.path.isabs(file_name):
             file_name = os.path.abspath(os.path.join(self.file_dir, file_name))
+        if generated:
+            base, ext = os.path.splitext(file_name)
+            nsuffix = 1
+            while Path(file_name).is_file():      # e.g. rotated in same second
+                file_name = "%s_%d%s" % (base, nsuffix, ext)
+                nsuffix += 1
         self.file_path = file_name
         path = Path(file_name)
         if path.is_file():
@@ -105,11 +148,20 @@ from dots_game_file import *
             SlTrace.lg("open_output(%s) failed: %s" %
                        (self.file_path, str(ex)))
             raise SelectError("No games files")
-        print("# %s" % self.file_path, file=self.fout)
+        self.file_paths.append(self.file_path)
         d2 = datetime.now().strftime("%B %d, %Y %H:%M")
-        print("# On: %s\n" % d2, file=self.fout)
-        print("# pgm_info = {}".format(self.pgm_info), file=self.fout)
-        print("", file=self.fout)
+        SlTrace.lg(r"""Game file version("%s")""" % self.version_str)
+        header = ("# %s\n" % self.file_path
+                  + "# On: %s\n\n" % d2
+                  + "# pgm_info = {}\n\n".format(self.pgm_info)
+                  + r"""version("%s")""" % self.version_str + "\n"
+                  + r'''history(r"""%s""")''' % self.history + "\n"
+                  + r'''pgm_info(r"""%s""")''' % self.pgm_info + "\n")
+        self.fout.write(header)
+        self.fout.flush()
+        self.file_ngame = 0         # Games in this file
+        self.file_nbytes = self.text_nbytes(header)
+        self.sync_ngame = 0         # Games since last sync
         
     
     def start_game(self, game_name="dots", nplayer=2, nrow=None, ncol=None):
@@ -133,11 +185,6 @@ from dots_game_file import *
         self.time_beg = datetime.now()
 
         self.game_ts = SlTrace.getTs(dp=4)
-        if self.ngame == 0:
-            SlTrace.lg(r"""Game file version("%s")""" % self.version_str)
-            print(r"""version("%s")""" % self.version_str, file=self.fout)
-            print(r'''history(r"""%s""")''' % self.history, file=self.fout)
-            print(r'''pgm_info(r"""%s""")''' % self.pgm_info, file=self.fout)
 
     def next_move(self, player=None, row=None, col=None):
         """ Store next move tuple
@@ -177,58 +224,165 @@ from dots_game_file import *
                 
                 self.game_results[player_num-1] = result[1]
 
-            
-        print("""game(name="%s", game_no=%d, time=%.3f, nplayer=%s, nrow=%d, ncol=%d, nmove=%d, ts="%s")"""
+
+        self.records.append(self.format_game())
+        if len(self.records) >= self.batch_games or SlTrace.trace("flush_outputs"):
+            self.write_records()
+        
+        
+    def format_game(self):
+        """ Current game as a record
+        :returns: record text - game(), moves(), results()
+        """
+        moves = self.moves
+        lines = ["""game(name="%s", game_no=%d, time=%.3f, nplayer=%s, nrow=%d, ncol=%d, nmove=%d, ts="%s")"""
               % (self.game_name,
                  self.game_no,
                  self.time,
                  self.nplayer, self.nrow, self.ncol,
-                 len(self.moves), self.game_ts), 
-              file=self.fout)
-        max_line_len = 70
-        line_str = "moves(["            
-        for i in range(len(self.moves)):
-            move = self.moves[i]
-            move_str = "(%d,%d,%d)" % (move[0], move[1], move[2])
-            if len(line_str) + len(move_str) + 1 > max_line_len:
-                if i > 0:
-                    line_str += ","
-                SlTrace.lg(line_str, "list_moves")
-                print(line_str, file=self.fout)
-                if not line_str.endswith(",") and not line_str.endswith("["):
-                    SlTrace.lg("Possible problem: line_str:%s" % line_str, to_stdout=True)
-                line_str = move_str
-            else:
-                if i > 0:
-                    move_str = ", " + move_str
-                line_str += move_str
-        line_str += "])"
-        SlTrace.lg(line_str, "list_moves")
-        print(line_str, file=self.fout)
-                
-        results_str = ""
-        for i in range(len(self.game_results)):
-            result = self.game_results[i]
-            if results_str == "":
-                results_str = "results("
-            else:
-                results_str += ", "
-            results_str += "(%d,%d)" % (i+1, result)
-        results_str += ")\n"
-        print(results_str, file=self.fout)
-        self.ngame += 1
-        if SlTrace.trace("flush_outputs"):
-            self.fout.flush()
+                 len(moves), self.game_ts)]
+        move_strs = ["(%d,%d,%d)" % move for move in moves]
+        nline_move = 7              # Moves per line, keeping lines under 70
+        move_lines = [", ".join(move_strs[i:i+nline_move])
+                      for i in range(0, len(move_strs), nline_move)]
+        lines.append("moves([" + ",\n".join(move_lines) + "])")
+        if SlTrace.trace("list_moves"):
+            SlTrace.lg(lines[-1], "list_moves")
+        lines.append("results(" + ", ".join("(%d,%d)" % (i+1, result)
+                                             for i, result in enumerate(self.game_results))
+                     + ")\n\n")
+        return "\n".join(lines)
+    
+    
+    def write_records(self):
+        """ Write waiting game records, in the writer thread if one
+        """
+        if not self.records:
+            return
         
+        records = self.records
+        self.records = []
+        if self.writer_queue is not None:
+            if self.writer_error is not None:
+                raise SelectError("results file writer failed: %s" % self.writer_error)
+            self.writer_queue.put(records)
+        else:
+            self.write_block(records)
+    
+    
+    def writer_loop(self):
+        """ Writer thread - write record batches till None
+        After a failure no more batches are written, leaving the file
+        ending with whole records, and the failure is reported by
+        write_records / end_file
+        """
+        while True:
+            records = self.writer_queue.get()
+            if records is None:
+                break
+            if self.writer_error is not None:
+                continue
+            
+            try:
+                self.write_block(records)
+            except Exception as ex:
+                if self.writer_error is None:
+                    self.writer_error = ex
+                    SlTrace.lg("results file writer failed: %s" % str(ex))
+    
+    
+    def write_block(self, records):
+        """ Write game records, each by one write, rotating files as needed
+        :records: list of game record texts
+        """
+        block = []
+        nbyte = 0
+        for record in records:
+            record_nbyte = self.text_nbytes(record)
+            if ((self.max_file_games is not None
+                    and self.file_ngame >= self.max_file_games)
+                or (self.max_file_bytes is not None and self.file_ngame > 0
+                    and self.file_nbytes + nbyte + record_nbyte > self.max_file_bytes)):
+                self.write_file_block(block, nbyte)
+                self.rotate_file()
+                block = []
+                nbyte = 0
+            block.append(record)
+            nbyte += record_nbyte
+            self.file_ngame += 1
+        self.write_file_block(block, nbyte)
+    
+    
+    def text_nbytes(self, text):
+        """ Size of text as written to file
+        :text: text, lines ending with "\n"
+        :returns: number of bytes, encoded with the file's encoding and
+                newlines written as os.linesep
+        """
+        return (len(text.encode(self.fout.encoding))
+                + text.count("\n")*(len(os.linesep) - 1))
         
-    def end_file(self):
-        """ Close results file
+        
+    def write_file_block(self, block, nbyte):
+        """ Write records to current file, syncing if due
+        :block: list of records
+        :nbyte: number of bytes in records, as written
+        """
+        if not block:
+            return
+        
+        self.fout.write("".join(block))
+        self.fout.flush()
+        self.file_nbytes += nbyte
+        self.ngame += len(block)
+        self.sync_ngame += len(block)
+        if self.fsync_games is not None and self.sync_ngame >= self.fsync_games:
+            self.sync_file()
+    
+    
+    def sync_file(self):
+        """ Checkpoint - force file to disk
+        """
+        self.fout.flush()
+        os.fsync(self.fout.fileno())
+        self.sync_ngame = 0
+    
+    
+    def rotate_file(self):
+        """ Close current file, starting a new one
+        """
+        self.close_output()
+        self.open_output()
+    
+    
+    def close_output(self):
+        """ Sync and close current file
         """
         if self.fout is not None:
+            self.sync_file()
             self.fout.close()
             SlTrace.lg("Closeing results file %s" % self.file_path)
             self.fout = None
             self.nfile += 1
+    
+    
+    def end_file(self):
+        """ Write waiting games and close results file
+        """
+        self.write_records()
+        if self.writer_thread is not None:
+            self.writer_queue.put(None)
+            self.writer_thread.join()
+            self.writer_thread = None
+            self.writer_queue = None
+            if self.writer_error is not None:
+                try:
+                    self.close_output()
+                except Exception as ex:
+                    SlTrace.lg("close_output(%s) failed: %s" % (self.file_path, str(ex)))
+                raise SelectError("results file writer failed: %s - %d games written"
+                                  % (self.writer_error, self.ngame))
+        self.close_output()
 
 
     def results_update(self, player_num=None, nsquare=None):
@@ -242,104 +396,6 @@ from dots_game_file import *
             return
         
         self.game_results[player_num-1] += nsquare
-    """
-    Process 
-    """
-    def procFilePyPlus(self, file_name, preamble=None):
-        """ Process python code file, with prefix text
-        :preamble: text string placed before file contents
-                    default: self.preamble (newline appended if none
-        :inFile: input file name
-        """
-        if not os.path.isabs(file_name):
-            file_name = os.path.abspath(os.path.join(self.file_dir, file_name))
-        path = Path(file_name)
-        if not path.is_file():
-            self.error("inFile({} was not found".format(file_name))
-            return False
-        compile_str = ""
-        if preamble is None:
-            preamble = self.preamble
-        if not preamble.endswith("\n"):
-            preamble += "\n"
-        compile_str = preamble
-        try:
-            fin = open(file_name)
-            compile_str += fin.read()
-            fin.close()
-        except Exception as ex:
-            SlTrace.lg("input file %s failed %s" % (file_name, str(ex)))
-            return False
-        tmp_file = r"..\dots_tmp_file.py"
-        ftout = open(tmp_file, "w")
-        print(compile_str, file=ftout)
-        ftout.close()
-        with open(tmp_file) as ftin:
-            try:
-                code = compile(ftin.read(), tmp_file, 'exec')
-            except Exception as e:
-                tbstr = traceback.extract_stack()
-                SlTrace.lg("Compile Error in %s\n    (%s)\n    %s)"
-                        % (tmp_file, file_name, str(e)))
-                return False
-        try:
-            exec(code)
-        except Exception as e:
-            etype, evalue, tb = sys.exc_info()
-            tbs = traceback.extract_tb(tb)
-            SlTrace.lg("Execution Error in %s\n   (%s)\n    %s)"
-                    % (tmp_file, file_name, str(e)))
-            inner_cmds = False
-            for tbfr in tbs:         # skip bottom (in dots_commands.py)
-                tbfmt = 'File "%s", line %d, in %s' % (tbfr.filename, tbfr.lineno, tbfr.name)
-                if not inner_cmds and tbfr.filename.endswith("dots_commands.py"):
-                    inner_cmds = True
-                    SlTrace.lg("    --------------------")         # show bottom (in dots_commands.py)
-                SlTrace.lg("    %s\n       %s" % (tbfmt, tbfr.line))
-            return False
-        return True
-                
-
-    """
-    Basic game file loading functions
-    """
-    def game(self, name=None, nplayer=2,
-                nrow=None, ncol=None, nmove=None, ts=None):
-        """ Start processing of game
-        """
-        SlTrace("game(name=%s, nplayer=%d, nrow=%d, ncol=%d, nmove=%d, ts=%s)"
-                % (name, nplayer, nrow, ncol, nmove, ts), "game")
-        self.moves = []
-        
-        
-    def moves(self, moves):
-        """ Add next set of moves, game or part of game
-        :moves: list of  move  tuples (player number, row(1,..., col(1...)
-        """
-        self.moves.extend(moves)
-
-    def game_results(self, *results):
-        """ End current game's input, specifying results
-        :results: comma separated list of result tuples (player_no, nsquares)
-        """
-        self.game_results = results
-        self.ngame += 1
-        move_no = 0
-        if SlTrace.trace("game_results"):
-            for move in self.moves:
-                move_no += 1
-                SlTrace.lg("%3d: move(player=%d, row=%d, col=%d)" %
-                            (move_no, move[0], move[1], move[2]))
-        results_str = ""
-        for result in self.results:
-            if results_str == "":
-                results_str = "game_results: "
-            else:
-                results_str += ", "
-                
-            results_str += (" player=%d, squares=%d" %
-                        (result[0], result[1]))
-        SlTrace.lg(results_str)
 
         
 if __name__ == "__main__":
@@ -0,0 +1,187 @@
+# dots_game_index.py
+"""
+Per directory index of game results file headers
+
+The index, kept in INDEX_FILE in each results directory, holds for
+each results file:
+    mtime, size     file modification time (ns) and size - entries
+                    whose file has changed are ignored
+    sizes           board sizes [nrow, ncol] of the file's games
+    nplayers        numbers of players of the file's games
+    ngame           number of games
+    ts_min, ts_max  range of game timestamps
+    complete        True if made from all the file's games, False if
+                    the file's reading was stopped early, in which case
+                    only sizes (that of the first game) is known
+The index is made as files are loaded, so files which can't match
+a loader's board size or timestamp selection can be skipped, next
+time, without being opened.
+"""
+import json
+import os
+
+from select_trace import SlTrace
+
+INDEX_FILE = "gmindex.json"
+INDEX_VERSION = 1
+
+
+class DotsGameFileInfo:
+    """ Collect a file's header information as its games are read
+    """
+    def __init__(self):
+        self.sizes = set()
+        self.nplayers = set()
+        self.ngame = 0
+        self.ts_min = None
+        self.ts_max = None
+        self.complete = False
+
+
+    def add_game(self, gm):
+        """ Add game's information
+        :gm: DotsGame
+        """
+        self.sizes.add((gm.nrow, gm.ncol))
+        self.nplayers.add(gm.nplayer)
+        self.ngame += 1
+        ts = gm.ts
+        if ts is not None:
+            if self.ts_min is None or ts < self.ts_min:
+                self.ts_min = ts
+            if self.ts_max is None or ts > self.ts_max:
+                self.ts_max = ts
+
+
+    def add_bin(self, game_bin):
+        """ Add all games of a .gmbin file
+        :game_bin: DotsGameBin
+        """
+        games = game_bin.games
+        if len(games) > 0:
+            self.sizes.update(zip(games["nrow"].tolist(), games["ncol"].tolist()))
+            self.nplayers.update(games["nplayer"].tolist())
+            tss = games["ts"].copy()
+            tss.sort()
+            tss = tss[tss != b""]
+            if len(tss) > 0:
+                self.ts_min = tss[0].decode()
+                self.ts_max = tss[-1].decode()
+        self.ngame = len(games)
+        self.complete = True
+
+
+    def to_entry(self):
+        """ Index entry (without file stat)
+        """
+        return dict(sizes=sorted([int(nrow), int(ncol)] for nrow, ncol in self.sizes),
+                    nplayers=sorted(int(nplayer) for nplayer in self.nplayers),
+                    ngame=self.ngame if self.complete else None,
+                    ts_min=self.ts_min if self.complete else None,
+                    ts_max=self.ts_max if self.complete else None,
+                    complete=self.complete)
+
+
+class DotsGameIndex:
+    """ Header index of the results files in one directory
+    """
+    def __init__(self, file_dir):
+        """ Load index, if present
+        :file_dir: results directory
+        """
+        self.file_dir = file_dir
+        self.index_path = os.path.join(file_dir, INDEX_FILE)
+        self.entries = {}           # By file base name
+        self.changed = False
+        if os.path.isfile(self.index_path):
+            try:
+                with open(self.index_path) as fin:
+                    index = json.load(fin)
+                if index.get("version") == INDEX_VERSION:
+                    self.entries = index["files"]
+            except (IOError, ValueError, KeyError) as ex:
+                SlTrace.lg("Ignoring bad index %s: %s" % (self.index_path, str(ex)))
+
+
+    @staticmethod
+    def file_stat(file_name):
+        """ File's (mtime, size) as recorded in the index
+        """
+        st = os.stat(file_name)
+        return st.st_mtime_ns, st.st_size
+
+
+    def get_entry(self, file_name):
+        """ Get file's entry, if current
+        :file_name: file path
+        :returns: entry, None if none or file has changed
+        """
+        entry = self.entries.get(os.path.basename(file_name))
+        if entry is None:
+            return None
+
+        try:
+            mtime, size = self.file_stat(file_name)
+        except OSError:
+            return None
+        if entry["mtime"] != mtime or entry["size"] != size:
+            return None
+
+        return entry
+
+
+    def set_entry(self, file_name, entry):
+        """ Set file's entry
+        :file_name: file path
+        :entry: entry, from DotsGameFileInfo.to_entry
+        """
+        try:
+            mtime, size = self.file_stat(file_name)
+        except OSError:
+            return
+        entry = dict(entry, mtime=mtime, size=size)
+        base_name = os.path.basename(file_name)
+        if self.entries.get(base_name) != entry:
+            self.entries[base_name] = entry
+            self.changed = True
+
+
+    def save(self):
+        """ Write index, if changed, replacing previous index
+        """
+        if not self.changed:
+            return
+
+        tmp_path = self.index_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as fout:
+                json.dump(dict(version=INDEX_VERSION, files=self.entries), fout,
+                          indent=1, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+            self.changed = False
+        except IOError as ex:
+            SlTrace.lg("Can't write index %s: %s" % (self.index_path, str(ex)))
+
+
+def entry_may_match(entry, nrow=None, ncol=None, ts_min=None, ts_max=None):
+    """ Check if file may have games matching selection
+    :entry: file's index entry
+    :nrow, ncol: if present, board size selected
+    :ts_min, ts_max: if present, timestamp range selected
+    :returns: False if no game in file can match
+    """
+    sizes = entry["sizes"]
+    if nrow is not None and sizes and all(size[0] != nrow for size in sizes):
+        return False
+    if ncol is not None and sizes and all(size[1] != ncol for size in sizes):
+        return False
+    if not entry["complete"]:
+        return True
+
+    if entry["ngame"] == 0:
+        return False
+    if ts_min is not None and entry["ts_max"] is not None and entry["ts_max"] < ts_min:
+        return False
+    if ts_max is not None and entry["ts_min"] is not None and entry["ts_min"] > ts_max:
+        return False
+    return True
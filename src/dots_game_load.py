@@ -6,15 +6,14 @@ See dots_game_file.py for game and file layout
     File Format (Customized to be a small subset of python
                 to ease processing flexibility)
      """
-import sys, traceback
 import re
 import os
-from pathlib import Path
-from datetime import date
+from concurrent.futures import ProcessPoolExecutor
 
 from select_trace import SlTrace
 from select_error import SelectError
-from dots_results_commands import history,pgm_info,version,game,moves,results,SkipFile
+from dots_game_index import (DotsGameIndex, DotsGameFileInfo, entry_may_match,
+                             INDEX_FILE)
 
 class DotsGame:
 
@@ -36,29 +35,40 @@ class DotsGame:
 class DotsGameLoad:
     """ The hook from commands expressed via python command files to 
     the frame worker
-    Make it an "ALL CLASS" to ease access via file based calls
     """
-    
-        
     def __init__(self, file_dir=None, file_prefix="dotsgame",
                  nrow=None,
                  ncol=None,
-                 max_file_size=7e6,     # Files bigger will be split
                  file_ext="gmres",
-                 test_file=None):
+                 test_file=None,
+                 ts_min=None,
+                 ts_max=None,
+                 nproc=1,
+                 stats_only=False,
+                 use_index=True,
+                 log_files=True):
         """ Setup games file output
         :commands: command processor
         :file_dir: file directory default=..\gmres
         :ncol: if present, restrict games to ncol default: load all
         :nrow: if present, restrict games to nrow default: ncol
                 Assume, for restriction, all games in file are the same nrow,ncol
-        :max_file_size: Maximum file size, bigger files will be split
-                    File text before first "game" line will be prepended to each
         :file_prefix: file prefix default: dotsgame
         :file_ext: file extension default: gmres
         :test_file: if present, just load this file
+        :ts_min: if present, restrict games to timestamps >= ts_min
+                e.g. "20190904" - timestamps are compared as strings
+        :ts_max: if present, restrict games to timestamps <= ts_max
+        :nproc: number of processes loading files default: 1 - load
+                in this process
+        :stats_only: True - keep only games' statistics (game_stats),
+                not the games default: keep games
+        :use_index: True - use, and update, each directory's file header
+                index (see dots_game_index.py) to skip files which can't
+                match nrow, ncol, ts_min, ts_max default: True
+        :log_files: True - log each file's history, program information
+                and games summary, as loaded default: True
         """
-        self.max_file_size = max_file_size
         if file_dir is None:
             file_dir = r"..\gmres"
         if nrow is not None or ncol is not None:
@@ -68,134 +78,339 @@ class DotsGameLoad:
                 ncol = nrow
         self.nrow = nrow
         self.ncol = ncol
+        self.ts_min = ts_min
+        self.ts_max = ts_max
             
         self.file_dir = file_dir
         self.file_prefix = file_prefix 
         self.file_ext = file_ext
         self.test_file = test_file
+        self.nproc = nproc
+        self.stats_only = stats_only
+        self.use_index = use_index
+        self.log_files = log_files
+        self.indexes = {}           # DotsGameIndex by directory
         self.nfile = 0
+        self.nfile_error = 0
+        self.nfile_skip = 0         # Files skipped by index
         self.games = []
-        self.loader = None
+        self.stats_list = []        # Files' DotsGameStats, if stats_only
+        self.game_stats = None      # DotsGameStats of all files, if stats_only
         self.history_str = None
         self.pgm_info_str = None
+        self.fgames = []
+        self.fstats = None
+        self.file_info = None
+        self.cur_gm = None
+    
+    
+    def get_loader_args(self):
+        """ Setup arguments, for loading in another process
+        """
+        return dict(file_dir=self.file_dir, file_prefix=self.file_prefix,
+                    nrow=self.nrow, ncol=self.ncol, file_ext=self.file_ext,
+                    ts_min=self.ts_min, ts_max=self.ts_max,
+                    stats_only=self.stats_only, use_index=self.use_index,
+                    log_files=self.log_files)
+    
     
     def load_game_file(self, file_name=None):
         """ load game results
         :file_name: path to file
         """
+        self.add_file_result(self.read_file_result(file_name))
+        
+        
+    def read_file_result(self, file_name):
+        """ Read file's games
+        :file_name: path to file
+        :returns: dictionary of file's games (or statistics) and
+                  information, for add_file_result
+        """
+        if not os.path.isabs(file_name):
+            file_name = os.path.abspath(os.path.join(self.file_dir, file_name))
         self.fgames = []
-        self.skip_file = False      # True if skipping rest of file
+        self.fstats = None
+        self.file_info = DotsGameFileInfo()
         self.cur_gm = None
         self.nfgame = 0         # Number of games in file
         self.ts1 = None         # Timestamp for first game
         self.tsend = None       # timestamp for last game
-        file_size = os.path.getsize(file_name)
-        if file_size > self.max_file_size:
-            SlTrace.lg("%s must be split (%d bytes)"% (file_name, file_size))
-            res = self.split_load_game_file(file_name=file_name)
+        self.version_str = self.history_str = self.pgm_info_str = None
+        if file_name.endswith(".gmbin"):
+            res = self.load_bin_file(file_name=file_name)
         else:
-            res = self.procFilePyPlus(file_name=file_name)
-        if res:
+            res = self.load_text_file(file_name=file_name)
+        if res and self.stats_only and self.fstats is None:
+            from dots_game_stats import DotsGameStats
+            self.fstats = DotsGameStats.from_games(self.fgames)
+            self.fgames = []
+        return dict(file_name=file_name, res=res,
+                    games=self.fgames, stats=self.fstats,
+                    entry=self.file_info.to_entry() if res else None,
+                    summary=self.file_summary(),
+                    version_str=self.version_str, history_str=self.history_str,
+                    pgm_info_str=self.pgm_info_str)
+    
+    
+    def add_file_result(self, result):
+        """ Add file's games, or statistics, to those loaded
+        :result: dictionary from read_file_result
+        """
+        file_name = result["file_name"]
+        if result["res"]:
             self.nfile += 1  # Count if successful
+            self.games.extend(result["games"])
+            if result["stats"] is not None:
+                self.stats_list.append(result["stats"])
+            if self.use_index:
+                self.get_index(os.path.dirname(file_name)).set_entry(file_name,
+                                                                     result["entry"])
         else:
             self.nfile_error += 1
+        self.version_str = result["version_str"]
+        self.history_str = result["history_str"]
+        self.pgm_info_str = result["pgm_info_str"]
+        if not self.log_files:
+            return
+        
         if self.history_str is not None:
             SlTrace.lg("\npgm history {}".format(self.history_str))
         if self.pgm_info_str is not None:
             SlTrace.lg("run_info {}".format(self.pgm_info_str))
+        SlTrace.lg("    file %s%s" % (file_name, result["summary"]))
+    
+    
+    def file_summary(self):
+        """ Summary of the games of the file just read
+        """
+        if self.fstats is not None and self.fstats.get_num_games() > 0:
+            times = self.fstats.time.tolist()
+            nrow, ncol = int(self.fstats.nrow[0]), int(self.fstats.ncol[0])
+        elif self.cur_gm is not None and self.fgames:
+            times = [gm.time for gm in self.fgames]
+            nrow, ncol = self.cur_gm.nrow, self.cur_gm.ncol
+        else:
+            return " - skipped"
         
-        sum_str = " - skipped"
-        if self.cur_gm is not None:
-            nsq_pgm = self.cur_gm.nrow * self.cur_gm.ncol
-            tmin = tmax = self.fgames[0].time
-            ttot = 0.
-            for gm in self.fgames:
-                ttot += gm.time
-                if gm.time < tmin:
-                    tmin = gm.time
-                if gm.time > tmax:
-                    tmax = gm.time
-            tavg = ttot/len(self.fgames)
-            tsqavg = tavg/nsq_pgm
-            sum_str = ("     ngame=%d nrow=%d ncol=%d gmavg=%.3f sec (min=%.3f max=%.3f) sqavg=%.3f sec"
-                % (self.nfgame, self.cur_gm.nrow, self.cur_gm.ncol, tavg, tmin, tmax, tsqavg))
-        SlTrace.lg("    file %s%s" % (file_name, sum_str))
-    
-    
-    def split_load_game_file(self, file_name=None):
-        """ load game results, splitting file into self.max_file_size parts,
-        placing prefix of portion from beginning to before first "game" line
+        nsq_pgm = nrow * ncol
+        tavg = sum(times)/len(times)
+        tsqavg = tavg/nsq_pgm
+        return ("     ngame=%d nrow=%d ncol=%d gmavg=%.3f sec (min=%.3f max=%.3f) sqavg=%.3f sec"
+            % (len(times), nrow, ncol, tavg, min(times), max(times), tsqavg))
+    
+    
+    def get_index(self, file_dir):
+        """ Get directory's file header index
+        :file_dir: directory
+        """
+        index = self.indexes.get(file_dir)
+        if index is None:
+            index = self.indexes[file_dir] = DotsGameIndex(file_dir)
+        return index
+    
+    
+    def file_may_match(self, file_name):
+        """ Check, by index, if file may have games selected
         :file_name: path to file
+        :returns: False if file can be skipped
         """
-        preamble = ""
-        with open(file_name) as fin:
-            while True:
-                line = fin.readline()
-                if not line.endswith("\n"):
-                    SlTrace.lg("{} Premature EOF"
-                               .format(file_name))
-                    return False
-                if line.startswith("game("):
-                    break
-                preamble += line
-            npart = 0           # Count split parts
-            more_base_file = True
-            while more_base_file:         # Process splits
-                compile_str = preamble
-                if line is not None:
-                    compile_str += line
-                    line = None
-                while True:
-                    line = fin.readline()
-                    if not line.endswith("\n"):
-                        more_base_file = False               # EOF
-                        break
-                    if line.startswith("game("):
-                        if len(compile_str) > self.max_file_size:
-                            break
-                    compile_str += line
-                tmp_file = r"..\dots_tmp_load_file.py"
-                with open(tmp_file, "w") as ftout:
-                    print(compile_str, file=ftout)
-
-                if self.procFilePyPlus(file_name=tmp_file):
-                    npart += 1      # Count parts
-                else:
-                    SlTrace.lg("split failed")
-                    return False
-                compile_str += line     # Add in first game line        
+        if not self.use_index:
+            return True
+        
+        entry = self.get_index(os.path.dirname(file_name)).get_entry(file_name)
+        if entry is None:
+            return True
+        
+        return entry_may_match(entry, nrow=self.nrow, ncol=self.ncol,
+                               ts_min=self.ts_min, ts_max=self.ts_max)
+    
+    
+    def is_ts_selected(self, ts):
+        """ Check if game timestamp is selected
+        :ts: game timestamp, None if unknown
+        """
+        if ts is None:
+            return self.ts_min is None and self.ts_max is None
+        
+        if self.ts_min is not None and ts < self.ts_min:
+            return False
+        if self.ts_max is not None and ts > self.ts_max:
+            return False
+        return True
+    
+    
+    def load_bin_file(self, file_name=None):
+        """ load game results from binary (.gmbin) file
+        See dots_game_bin.py
+        :file_name: path to file
+        """
+        from dots_game_bin import DotsGameBin
 
-        SlTrace.lg("End loading split file {} {:d} parts "
-                   .format(file_name, npart))
-        return True    
+        try:
+            gb = DotsGameBin(file_name)
+        except Exception as ex:
+            SlTrace.lg("input file %s failed %s" % (file_name, str(ex)))
+            return False
         
+        self.version_str = "bin%d" % gb.header["version"]
+        self.history_str = gb.history
+        self.pgm_info_str = gb.pgm_info
+        self.file_info.add_bin(gb)
+        indexes = gb.select(nrow=self.nrow, ncol=self.ncol,
+                            ts_min=self.ts_min, ts_max=self.ts_max)
+        if self.stats_only:
+            from dots_game_stats import DotsGameStats
+            self.fstats = DotsGameStats.from_bin(gb, indexes)
+            return True
+        
+        for gm in gb.iter_games(indexes):
+            self.add_game(gm)
+        return True
+    
+    
+    def load_text_file(self, file_name=None):
+        """ load game results from .gmres file, one game at a time
+        See dots_game_parser.py
+        :file_name: path to file
+        """
+        from dots_game_parser import DotsGameParser, GameParseError
+        
+        if not os.path.isabs(file_name):
+            file_name = os.path.abspath(os.path.join(self.file_dir, file_name))
+        if not os.path.isfile(file_name):
+            SlTrace.lg("file_name {} was not found".format(file_name))
+            return False
+        
+        gp = DotsGameParser(file_name)
+        games = gp.games()
+        try:
+            for gm in games:
+                self.file_info.add_game(gm)
+                if ((self.nrow is not None and gm.nrow != self.nrow)
+                        or (self.ncol is not None and gm.ncol != self.ncol)):
+                    SlTrace.lg("    Skipping file", "SkipFile")
+                    break       # Assume all games in file are the same nrow,ncol
+                
+                if not self.is_ts_selected(gm.ts):
+                    continue
+                
+                SlTrace.lg("game(name=%s, game_no=%d, time=%.3f, nplayer=%d, nrow=%d, ncol=%d, nmoves=%d, ts=%s)"
+                        % (gm.name, gm.game_no, gm.time, gm.nplayer, gm.nrow, gm.ncol,
+                           gm.nmove, gm.ts), "game")
+                self.add_game(gm)
+            else:
+                self.file_info.complete = True
+        except GameParseError as ex:
+            SlTrace.lg("Error while loading %s\n    %s" % (file_name, str(ex)))
+            return False
+        
+        finally:
+            games.close()
+            self.version_str = gp.version_str
+            self.history_str = gp.history_str
+            self.pgm_info_str = gp.pgm_info_str
+        return True
+    
+    
+    def get_game_files(self, file_pat=None):
+        """ Get results files in file_dir and its subdirectories
+        :file_pat:  Additional filter (rex) pattern default: All
+            Files with a converted binary (.gmbin) file, are loaded
+            from the binary file - see dots_game_bin.py - unless the
+            binary file is older than the text file, e.g. converted
+            while the text file was still being written
+        :returns: list of file paths
+        """
+        file_names = []
+        for root, _, files in os.walk(self.file_dir):
+            for file in files:
+                if file_pat is not None and not re.match(file_pat, file):
+                    continue
+                base, ext = os.path.splitext(file)
+                if ext == "." + self.file_ext and base + ".gmbin" in files:
+                    if self.is_bin_current(os.path.join(root, base)):
+                        continue    # Use converted binary file
+                if ext == ".gmbin" and base + "." + self.file_ext in files:
+                    if not self.is_bin_current(os.path.join(root, base)):
+                        SlTrace.lg("Ignoring out of date %s" % os.path.join(root, file))
+                        continue    # Use text file
+                if ext == ".tmp":
+                    continue        # Partial binary file
+                if file == INDEX_FILE:
+                    continue
+                file_names.append(os.path.join(root, file))
+        return file_names
+    
+    
+    def is_bin_current(self, base_path):
+        """ Check if converted binary file is up to date with its text file
+        :base_path: file path without extension
+        :returns: True if binary file was modified no earlier than the text file
+        """
+        try:
+            text_mtime = os.stat(base_path + "." + self.file_ext).st_mtime_ns
+            bin_mtime = os.stat(base_path + ".gmbin").st_mtime_ns
+        except OSError:
+            return False
+        return bin_mtime >= text_mtime
+    
     
     def load_game_files(self, file_pat=None):
         """ Load games
         :file_pat:  Additional filter (rex) pattern default: All
+            Files with a converted binary (.gmbin) file, are loaded
+            from the binary file - see dots_game_bin.py
+        Files are loaded by self.nproc processes, if more than one,
+        their games merged in file order.
         """
         self.games = []
+        self.stats_list = []
         self.nfile = 0  # Number of files loaded
         self.nfile_error = 0  # Number of file errors
+        self.nfile_skip = 0  # Number of files skipped by index
         self.ngame = 0  # Number of games loaded
         self.ngame_error = 0  # Number pf game errors
 
         if self.test_file is not None:
             SlTrace.lg("Loading only test file: %s" % self.test_file)
             self.load_game_file(file_name=self.test_file) 
+            self.end_load()
             SlTrace.lg("End loading %d files" % self.nfile)
             return
         
         SlTrace.lg("Files loaded from directory: {}".format(self.file_dir))
-        for root, _, files in os.walk(self.file_dir):
-            for file in files:
-                if file_pat is not None and not re.match(file_pat, file):
-                    continue
-                file_name = os.path.join(root, file)
-                self.load_game_file(file_name=file_name) 
-        SlTrace.lg("End loading %d files" % self.nfile)
+        file_names = []
+        for file_name in self.get_game_files(file_pat=file_pat):
+            if self.file_may_match(file_name):
+                file_names.append(file_name)
+            else:
+                self.nfile_skip += 1
+        if self.nproc > 1 and len(file_names) > 1:
+            loader_args = self.get_loader_args()
+            with ProcessPoolExecutor(max_workers=self.nproc) as executor:
+                for result in executor.map(load_file_worker,
+                                           [(file_name, loader_args)
+                                            for file_name in file_names]):
+                    self.add_file_result(result)
+        else:
+            for file_name in file_names:
+                self.load_game_file(file_name=file_name)
+        self.end_load()
+        SlTrace.lg("End loading %d files (%d skipped by index)"
+                   % (self.nfile, self.nfile_skip))
     
     
+    def end_load(self):
+        """ Complete loading - save indexes, join statistics
+        """
+        for index in self.indexes.values():
+            index.save()
+        if self.stats_only:
+            from dots_game_stats import DotsGameStats
+            self.game_stats = DotsGameStats.concat(self.stats_list)
+            self.stats_list = []
+    
     
     def get_num_files(self):
         """ Get number of results files loaded
@@ -207,160 +422,21 @@ class DotsGameLoad:
     def get_num_games(self):
         """ Get number of games loaded
         """
-        return len(self.games)
-    
-    """
-    Process command file 
-    """
-
-    
-    def procFilePyPlus(self, file_name=None, prefix=None):
-        """ Process python code file, with prefix text
-        :inFile: input file name
-        :prefix: optional string to prefix file for compile
-        """
-        if not os.path.isabs(file_name):
-            file_name = os.path.abspath(os.path.join(self.file_dir, file_name))
-        path = Path(file_name)
-        if not path.is_file():
-            SlTrace.lg("file_name {} was not found".format(file_name))
-            return False
-        compile_str = ""
-        if prefix is not None:
-            compile_str = prefix
-            if not prefix.endswith("\n"):
-                compile_str += "\n"         # Insure ending newline
-
-        try:
-            fin = open(file_name)
-            compile_str += fin.read()
-            fin.close()
-        except Exception as ex:
-            SlTrace.lg("input file %s failed %s" % (file_name, str(ex)))
-            return False
-                
-        try:
-            exec(compile_str)
-        except SkipFile as e:
-            SlTrace.lg("    Skipping file", "SkipFile")
-            return True
-        
-        except Exception as e:
-            _, _, tb = sys.exc_info()
-            tbs = traceback.extract_tb(tb)
-            SlTrace.lg("Error while executing text from %s\n    %s)"
-                    % (file_name, str(e)))
-            inner_cmds = False
-            for tbfr in tbs:  # skip bottom (in dots_commands.py)
-                tbfmt = 'File "%s", line %d, in %s' % (tbfr.filename, tbfr.lineno, tbfr.name)
-                if not inner_cmds and tbfr.filename.endswith("dots_commands.py"):
-                    inner_cmds = True
-                    SlTrace.lg("    --------------------")  # show bottom (in dots_commands.py)
-                SlTrace.lg("    %s\n       %s" % (tbfmt, tbfr.line))
-            return False
-        return True
-
-
-        
-                
-    """
-    Basic game file loading functions
-    Generally one per file command
-    """
-    
-    
-    def version(self, version_str):
-        if self.loader is not None:
-            return self.loader.version(version_str)
-            
-        self.version_str = version_str
-    
-    
-    def history(self, history_str):
-        if self.loader is not None:
-            return self.loader.history(history_str)
-            
-        self.history_str = history_str
-    
-    
-    def pgm_info(self, info_str):
-        if self.loader is not None:
-            return self.loader.pgm_info(info_str)
-            
-        self.pgm_info_str = info_str
+        if self.game_stats is not None:
+            return self.game_stats.get_num_games()
         
+        return len(self.games)
     
-    def game(self, name=None, game_no=0, time=0, nplayer=2,
-                nrow=None, ncol=None, nmove=None, ts=None):
-        """ Start processing of game
-        :returns:  False if not processing this game
+    def add_game(self, gm):
+        """ Add loaded game, with moves and results, to the file's games
+        :gm: DotsGame
         """
-        if self.loader is not None:
-            return self.loader.game(name=name, game_no=0, time=0, nplayer=nplayer,
-                nrow=nrow, ncol=ncol, nmove=nmove, ts=ts)
-
-        if self.skip_file:
-            return False
-        
-        
-        if self.nrow is not None:
-            if nrow != self.nrow:
-                self.skip_file = True   # Optimize
-                raise SkipFile("skipping file")
-
-        if self.ncol is not None:
-            if ncol != self.ncol:
-                self.skip_file = True   # Optimize
-                raise SkipFile("skipping file")
-                        
-        SlTrace.lg("game(name=%s, game_no=%d, time=%.3f, nplayer=%d, nrow=%d, ncol=%d, nmoves=%d, ts=%s)"
-                % (name, game_no, time, nplayer, nrow, ncol, nmove, ts), "game")
-        gm = DotsGame(name=name, game_no=game_no, time=time, nplayer=nplayer, nrow=nrow, ncol=ncol, nmove=nmove, ts=ts)
         self.cur_gm = gm         # Current game
         self.nfgame += 1        # Count game
         if self.nfgame == 1:
-            self.ts1 = ts
-        self.tsend = ts         # last (most recent
-        return True
-    
-    def moves(self, *moves):
-        """ Add next set of moves, game or part of game
-        :moves: argument list
-            Each argument is either:
-                a move tuple (original format) (player number, row(1,..., col(1...)
-                OR
-                a list of  move  tuples, supporting larger (than 255) moves
-        """
-        if self.loader is not None:
-            return self.loader.moves(*moves)
-
-
-        if self.skip_file:
-            return False
-
-        for move in moves:
-            if isinstance(move, tuple):
-                self.cur_gm.game_moves.append(move) # List of tuples
-            elif isinstance(move, list):
-                self.cur_gm.game_moves.extend(move) # One move tuple
-                SlTrace.lg("Adding list of %d moves" % len(move), "adding_list")
-                
-                
-    def results(self, *res):
-        """ End current game's input, specifying results
-        :res: comma separated list of result tuples (player_no, nsquares)
-        """
-        if self.loader is not None:
-            return self.loader.results(*res)
-        
-
-        if self.skip_file:
-            return False
-
-        self.cur_gm.results = res
-        gm = self.cur_gm
-        self.games.append(gm)            # Add to loaded games
-        self.fgames.append(gm)            # Add to file's count
+            self.ts1 = gm.ts
+        self.tsend = gm.ts         # last (most recent
+        self.fgames.append(gm)            # Add to file's games
         if SlTrace.trace("game_results"):
             move_no = 0
             for move in gm.game_moves:
@@ -374,10 +450,22 @@ class DotsGameLoad:
             SlTrace.lg(results_str)
 
 
+def load_file_worker(file_args):
+    """ Read one results file, in a loading process
+    :file_args: (file path, DotsGameLoad setup arguments)
+    :returns: file result (see DotsGameLoad.read_file_result)
+    """
+    file_name, loader_args = file_args
+    loader = DotsGameLoad(**loader_args)
+    result = loader.read_file_result(file_name)
+    for gm in result["games"]:
+        if not isinstance(gm.game_moves, list):     # .gmbin array view
+            gm.game_moves = list(map(tuple, gm.game_moves.tolist()))
+    return result
+
 
 
 if __name__ == "__main__":
-    from dots_results_commands import DotsResultsCommands
     file_dir = r"..\test_gmres"
     test_file = None
     do_test_gmres = False
@@ -386,28 +474,20 @@ if __name__ == "__main__":
     
     if do_test_err1_file:
         test_file = r"..\dots_load_file_err1.gmres"
-        rC = DotsResultsCommands()
         rF = DotsGameLoad(file_dir=file_dir, test_file=test_file)
-        rC.set_loader(rF)
         rF.load_game_files()
         SlTrace.lg("%d games in %d files" % (rF.get_num_games(), rF.get_num_files()))
     
     if do_test_file:
-        max_file_size = 15000
         file_dir = r"..\gmres"
         test_file = r".\t2.gmres"
-        rC = DotsResultsCommands()
-        rF = DotsGameLoad(file_dir=file_dir, test_file=test_file,
-                          max_file_size=max_file_size)
-        rC.set_loader(rF)
+        rF = DotsGameLoad(file_dir=file_dir, test_file=test_file)
         rF.load_game_files()
         SlTrace.lg("%d games in %d files" % (rF.get_num_games(), rF.get_num_files()))
         
     if do_test_gmres:
         file_dir = r"..\test_gmres"
-        rC = DotsResultsCommands()
         rF = DotsGameLoad(file_dir=file_dir, test_file=test_file)
-        rC.set_loader(rF)
         rF.load_game_files()
         SlTrace.lg("%d games in %d files" % (rF.get_num_games(), rF.get_num_files()))
             
@@ -0,0 +1,318 @@
+# dots_game_parser.py
+"""
+Streaming parser for .gmres game results files
+See dots_game_file.py for game and file layout
+
+The file is read a line at a time, split into tokens and parsed
+as a sequence of calls:
+    version(str)
+    history(str)
+    pgm_info(str)
+    game(name=, game_no=, time=, nplayer=, nrow=, ncol=, nmove=, ts=)
+    moves(arg, ...) each arg a move tuple (player, row, col)
+                    or a list of move tuples
+    results((player, nsquare), ...)
+Call arguments may be numbers, strings, None/True/False, tuples
+and lists - nothing is executed.  "import" / "from" lines, which
+may head files made with a python preamble, are ignored.
+
+Games are generated one at a time, at their results() call, so
+memory use is that of one game, not of the file.
+Errors are raised as GameParseError with the file line number.
+A file ending within a call, as when its writer was stopped while
+writing, is not an error: its games before the partial call are
+generated, the partial last game being dropped.
+"""
+import ast
+import re
+
+from select_trace import SlTrace
+from select_error import SelectError
+from dots_game_load import DotsGame
+
+TOKEN_RE = re.compile(r"""
+     (?P<space>\s+)
+    |(?P<ints>\((?:\s*[-+]?\d+\s*,)+\s*[-+]?\d+\s*\))
+    |(?P<comment>\#.*)
+    |(?P<string>[rRuUbBfF]{0,2}(?:'''(?:[^\\]|\\.)*?'''|\"\"\"(?:[^\\]|\\.)*?\"\"\"))
+    |(?P<tstart>[rRuUbBfF]{0,2}(?:'''|\"\"\"))
+    |(?P<string1>[rRuUbBfF]{0,2}(?:'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*"))
+    |(?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    |(?P<name>[A-Za-z_]\w*)
+    |(?P<op>[()\[\],=])
+    """, re.VERBOSE | re.DOTALL)
+
+NAME_VALUES = {"None" : None, "True" : True, "False" : False}
+
+
+class GameParseError(SelectError):
+    """ Error in game results file
+    """
+    pass
+
+
+class GameTruncatedError(GameParseError):
+    """ Game results file ends within a call
+    """
+    pass
+
+
+class DotsGameParser:
+    """ Parse .gmres file, generating games
+    """
+    def __init__(self, file_name):
+        """ Setup parser
+        :file_name: .gmres file path
+        """
+        self.file_name = file_name
+        self.version_str = None
+        self.history_str = None
+        self.pgm_info_str = None
+        self.ngame = 0              # Games generated
+        self.line_no = 0            # Current line number
+
+
+    def error(self, msg, line_no=None):
+        """ Parse error, with file and line
+        :msg: error message
+        :line_no: line number default: current line
+        """
+        if line_no is None:
+            line_no = self.line_no
+        return GameParseError(f"{self.file_name}:{line_no}: {msg}")
+
+
+    def truncated(self, msg, line_no=None):
+        """ End of file within a call
+        :msg: error message
+        :line_no: line number default: current line
+        """
+        if line_no is None:
+            line_no = self.line_no
+        return GameTruncatedError(f"{self.file_name}:{line_no}: {msg}")
+
+
+    def tokens(self, fin):
+        """ Generate tokens
+        :fin: open input file
+        :returns: generator of (kind, text, line number)
+            kind: "string", "number", "name", "op",
+                "ints" - tuple of integers e.g. a move, the bulk of a file
+        """
+        for line in fin:
+            self.line_no += 1
+            line_no = self.line_no
+            pos = 0
+            while pos < len(line):
+                match = TOKEN_RE.match(line, pos)
+                if match is None:
+                    if not line.endswith("\n"):      # Partial last line
+                        raise self.truncated(f"Unexpected text: {line[pos:].strip()[:20]}")
+                    raise self.error(f"Unexpected text: {line[pos:].strip()[:20]}")
+                kind = match.lastgroup
+                if kind == "tstart":            # Triple quoted string over lines
+                    text = line[pos:]
+                    while True:
+                        line = fin.readline()
+                        if line == "":
+                            raise self.truncated("Unterminated string", line_no)
+                        self.line_no += 1
+                        text += line
+                        match = TOKEN_RE.match(text)
+                        if match.lastgroup == "string":
+                            break
+                    line = text
+                    pos = 0
+                    kind = "string"
+                pos = match.end()
+                if kind == "space" or kind == "comment":
+                    continue
+                if kind == "string1":
+                    yield "string", match.group(kind), line_no
+                    continue
+                yield kind, match.group(kind), line_no
+
+
+    def parse_value(self, tok, toks):
+        """ Parse value starting at token
+        :tok: first token
+        :toks: token iterator
+        :returns: (value, next token)
+        """
+        kind, text, line_no = tok
+        if kind == "ints":
+            return tuple(map(int, text[1:-1].split(","))), next(toks, None)
+
+        if kind == "number":
+            try:
+                value = int(text)
+            except ValueError:
+                value = float(text)
+            return value, next(toks, None)
+
+        if kind == "string":
+            try:
+                value = ast.literal_eval(text)
+            except (ValueError, SyntaxError):
+                raise self.error(f"Bad string {text[:20]}", line_no)
+            return value, next(toks, None)
+
+        if kind == "name":
+            if text not in NAME_VALUES:
+                raise self.error(f"Unexpected name: {text}", line_no)
+            return NAME_VALUES[text], next(toks, None)
+
+        if text == "(" or text == "[":
+            close = ")" if text == "(" else "]"
+            items = []
+            has_comma = False
+            tok = next(toks, None)
+            while True:
+                if tok is None:
+                    raise self.truncated(f"Missing {close}", line_no)
+                if tok[1] == close:
+                    break
+                value, tok = self.parse_value(tok, toks)
+                items.append(value)
+                if tok is not None and tok[1] == ",":
+                    has_comma = True
+                    tok = next(toks, None)
+                elif tok is None:
+                    raise self.truncated(f"Expected , or {close}", line_no)
+                elif tok[1] != close:
+                    raise self.error(f"Expected , or {close}", tok[2])
+            tok = next(toks, None)
+            if close == "]":
+                return items, tok
+            if len(items) == 1 and not has_comma:
+                return items[0], tok        # Parenthesized value
+            return tuple(items), tok
+
+        raise self.error(f"Unexpected {text}", line_no)
+
+
+    def statements(self, fin):
+        """ Generate calls
+        :fin: open input file
+        :returns: generator of (name, args, kwargs, line number)
+        """
+        toks = self.tokens(fin)
+        tok = next(toks, None)
+        while tok is not None:
+            kind, text, line_no = tok
+            if kind != "name":
+                raise self.error(f"Expected command, found {text}", line_no)
+            if text == "import" or text == "from":
+                while tok is not None and tok[2] == line_no:
+                    tok = next(toks, None)      # Skip python preamble
+                continue
+
+            tok = next(toks, None)
+            if tok is None:
+                raise self.truncated(f"Expected ( after {text}", line_no)
+            if tok[1] != "(":
+                raise self.error(f"Expected ( after {text}", line_no)
+            args = []
+            kwargs = {}
+            tok = next(toks, None)
+            while True:
+                if tok is None:
+                    raise self.truncated(f"Missing ) for {text}", line_no)
+                if tok[1] == ")":
+                    break
+                tok2 = None
+                if tok[0] == "name" and tok[1] not in NAME_VALUES:
+                    tok2 = next(toks, None)
+                    if tok2 is None:
+                        raise self.truncated(f"Missing ) for {text}", line_no)
+                    if tok2[1] != "=":
+                        raise self.error(f"Unexpected name {tok[1]}", tok[2])
+                    keyword = tok[1]
+                    tok = next(toks, None)
+                    if tok is None:
+                        raise self.truncated(f"Missing value for {keyword}", line_no)
+                    value, tok = self.parse_value(tok, toks)
+                    kwargs[keyword] = value
+                else:
+                    value, tok = self.parse_value(tok, toks)
+                    args.append(value)
+                if tok is not None and tok[1] == ",":
+                    tok = next(toks, None)
+                elif tok is None:
+                    raise self.truncated(f"Expected , or ) in {text}", line_no)
+                elif tok[1] != ")":
+                    raise self.error(f"Expected , or ) in {text}", tok[2])
+            yield text, args, kwargs, line_no
+            tok = next(toks, None)
+
+
+    def games(self):
+        """ Generate games in file
+        :returns: generator of DotsGame with game_moves and results
+        """
+        self.line_no = 0
+        gm = None
+        with open(self.file_name) as fin:
+            try:
+                for name, args, kwargs, line_no in self.statements(fin):
+                    if name == "version" or name == "history" or name == "pgm_info":
+                        if len(args) != 1:
+                            raise self.error(f"{name} takes one string", line_no)
+                        setattr(self, name + "_str", args[0])
+                    elif name == "game":
+                        if gm is not None:
+                            SlTrace.lg(f"{self.file_name}:{gm.line_no}: game has no results"
+                                       " - ignored")
+                        try:
+                            gm = DotsGame(*args, **kwargs)
+                        except TypeError as ex:
+                            raise self.error(f"game: {str(ex)}", line_no)
+                        gm.line_no = line_no
+                    elif name == "moves":
+                        if gm is None:
+                            raise self.error("moves before game", line_no)
+                        for move in args:
+                            if isinstance(move, tuple):
+                                moves = [move]
+                            elif isinstance(move, list):
+                                moves = move
+                            else:
+                                raise self.error(f"Bad move {move}", line_no)
+                            for mv in moves:
+                                if not isinstance(mv, tuple) or len(mv) != 3:
+                                    raise self.error(f"Bad move {mv}", line_no)
+                            gm.game_moves.extend(moves)
+                    elif name == "results":
+                        if gm is None:
+                            raise self.error("results before game", line_no)
+                        for res in args:
+                            if not isinstance(res, tuple) or len(res) != 2:
+                                raise self.error(f"Bad result {res}", line_no)
+                        gm.results = tuple(args)
+                        self.ngame += 1
+                        yield gm
+                        gm = None
+                    else:
+                        raise self.error(f"Unrecognized command {name}", line_no)
+            except GameTruncatedError as ex:
+                SlTrace.lg(f"{str(ex)} - file ends within a call, partial last game ignored")
+                gm = None
+        if gm is not None:
+            SlTrace.lg(f"{self.file_name}:{gm.line_no}: game has no results - ignored")
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    file_name = r"..\test_gmres\dotsgame_20190904_143304.gmres"
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file', dest='file_name', default=file_name)
+    args = parser.parse_args()             # or die "Illegal options"
+    time_beg = time.time()
+    gp = DotsGameParser(args.file_name)
+    nmove = 0
+    for gm in gp.games():
+        nmove += len(gm.game_moves)
+    SlTrace.lg("%s: %d games %d moves in %.3f sec" % (args.file_name, gp.ngame,
+                                                      nmove, time.time()-time_beg))
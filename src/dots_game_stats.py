@@ -0,0 +1,316 @@
+# dots_game_stats.py
+"""
+Game results statistics on columnar (numpy) arrays
+
+Games are held as columns, one entry per game:
+    nrow, ncol, nplayer, time, nmove, ts
+    squares     [ngame, max nplayer] squares per player, player 1 first,
+                0 for players beyond the game's nplayer
+Statistics are made for each group of games with the same board
+size and number of players, using grouped array operations, not
+per game python:
+    win, loss, tie counts and percentages per player, in play order
+    squares, as a percentage of the board, in wins, losses, ties
+    game time min, mean, p50, p95, max and mean number of moves
+    first mover advantage - player 1's win and square share
+        above the even share (1/nplayer)
+A game is won by the player with the most squares, if no other
+player has as many, tied by the players sharing the most squares,
+else lost.
+
+Games may be taken from DotsGame records, e.g. DotsGameLoad.games,
+or directly from the arrays of a .gmbin file (DotsGameBin).
+"""
+import array
+
+import numpy as np
+
+from select_trace import SlTrace
+
+
+class DotsGameStats:
+    """ Game results as columns
+    """
+    def __init__(self, nrow=None, ncol=None, nplayer=None, squares=None,
+                 time=None, nmove=None, ts=None):
+        """ Setup from columns
+        :nrow, ncol, nplayer, time, nmove, ts: arrays, one entry per game
+        :squares: array [ngame, max nplayer]
+                default: empty
+        """
+        if nrow is None:
+            nrow = ncol = nplayer = nmove = np.zeros(0, dtype=np.int32)
+            time = np.zeros(0)
+            ts = np.zeros(0, dtype="S24")
+            squares = np.zeros((0, 0), dtype=np.int32)
+        self.nrow = np.asarray(nrow, dtype=np.int32)
+        self.ncol = np.asarray(ncol, dtype=np.int32)
+        self.nplayer = np.asarray(nplayer, dtype=np.int32)
+        self.squares = np.asarray(squares, dtype=np.int32)
+        self.time = np.asarray(time, dtype=np.float64)
+        self.nmove = np.asarray(nmove, dtype=np.int32)
+        self.ts = np.asarray(ts, dtype="S24")
+
+
+    @classmethod
+    def from_games(cls, games):
+        """ Columns from games
+        :games: iterable of DotsGame with results
+        """
+        nrows = array.array("i")
+        ncols = array.array("i")
+        nplayers = array.array("i")
+        times = array.array("d")
+        nmoves = array.array("i")
+        tss = []
+        results = []
+        for gm in games:
+            nrows.append(gm.nrow)
+            ncols.append(gm.ncol)
+            nplayers.append(gm.nplayer)
+            times.append(gm.time)
+            nmoves.append(gm.nmove if gm.nmove is not None else len(gm.game_moves))
+            tss.append("" if gm.ts is None else gm.ts)
+            results.append(gm.results)
+        nplayer = np.frombuffer(nplayers, dtype=np.int32) if nplayers else np.zeros(0)
+        max_player = int(nplayer.max()) if len(nplayer) > 0 else 0
+        squares = np.zeros((len(results), max_player), dtype=np.int32)
+        for ig, res in enumerate(results):
+            for pn, nsquare in res:
+                if pn < 1 or pn > nplayers[ig]:
+                    SlTrace.lg("game stats: result player %d not in 1-%d - ignored"
+                               % (pn, nplayers[ig]))
+                    continue
+                squares[ig, pn-1] = nsquare
+        return cls(nrow=nrows, ncol=ncols, nplayer=nplayers, squares=squares,
+                   time=times, nmove=nmoves, ts=np.array(tss, dtype="S24"))
+
+
+    @classmethod
+    def from_bin(cls, game_bin, indexes=None):
+        """ Columns from .gmbin file arrays, without making game objects
+        :game_bin: DotsGameBin
+        :indexes: game indexes default: all games
+        """
+        games = game_bin.games if indexes is None else game_bin.games[indexes]
+        return cls(nrow=games["nrow"], ncol=games["ncol"], nplayer=games["nplayer"],
+                   squares=game_bin.get_results_array(indexes),
+                   time=games["time"], nmove=games["nmove"], ts=games["ts"])
+
+
+    @classmethod
+    def concat(cls, stats_list):
+        """ Join columns
+        :stats_list: list of DotsGameStats
+        """
+        stats_list = [st for st in stats_list if st.get_num_games() > 0]
+        if not stats_list:
+            return cls()
+        max_player = max(st.squares.shape[1] for st in stats_list)
+        squares = np.concatenate([np.pad(st.squares,
+                                         ((0, 0), (0, max_player-st.squares.shape[1])))
+                                  for st in stats_list])
+        return cls(nrow=np.concatenate([st.nrow for st in stats_list]),
+                   ncol=np.concatenate([st.ncol for st in stats_list]),
+                   nplayer=np.concatenate([st.nplayer for st in stats_list]),
+                   squares=squares,
+                   time=np.concatenate([st.time for st in stats_list]),
+                   nmove=np.concatenate([st.nmove for st in stats_list]),
+                   ts=np.concatenate([st.ts for st in stats_list]))
+
+
+    def get_num_games(self):
+        """ Number of games
+        """
+        return len(self.nrow)
+
+
+    def select(self, nrow=None, ncol=None, nplayer=None, ts_min=None, ts_max=None):
+        """ Select games
+        :nrow: if present, only games with nrow rows
+        :ncol: if present, only games with ncol columns
+        :nplayer: if present, only games with nplayer players
+        :ts_min: if present, only games with timestamp >= ts_min
+                e.g. "20190904" - timestamps are compared as strings
+        :ts_max: if present, only games with timestamp <= ts_max
+        :returns: DotsGameStats of selected games
+        """
+        mask = np.ones(self.get_num_games(), dtype=bool)
+        if nrow is not None:
+            mask &= self.nrow == nrow
+        if ncol is not None:
+            mask &= self.ncol == ncol
+        if nplayer is not None:
+            mask &= self.nplayer == nplayer
+        if ts_min is not None:
+            mask &= self.ts >= ts_min.encode()
+        if ts_max is not None:
+            mask &= self.ts <= ts_max.encode()
+        return DotsGameStats(nrow=self.nrow[mask], ncol=self.ncol[mask],
+                             nplayer=self.nplayer[mask], squares=self.squares[mask],
+                             time=self.time[mask], nmove=self.nmove[mask],
+                             ts=self.ts[mask])
+
+
+    def get_outcomes(self):
+        """ Win, tie, loss of each player in each game
+        :returns: (win, tie, loss, in_game) bool arrays [ngame, max nplayer]
+                in_game: player is in game
+        """
+        squares = self.squares
+        max_player = squares.shape[1]
+        in_game = np.arange(max_player) < self.nplayer[:, None]
+        in_squares = np.where(in_game, squares, -1)
+        top = in_squares.max(axis=1, initial=-1)[:, None]
+        at_top = in_game & (in_squares == top)
+        ntop = at_top.sum(axis=1)[:, None]
+        win = at_top & (ntop == 1)
+        tie = at_top & (ntop > 1)
+        loss = in_game & ~at_top
+        return win, tie, loss, in_game
+
+
+    def get_groups(self):
+        """ Group games by board size and number of players
+        :returns: (keys, group) keys: array [ngroup, 3] of nrow, ncol, nplayer
+                            group: group index of each game
+        """
+        keys = np.stack((self.nrow, self.ncol, self.nplayer), axis=1)
+        if len(keys) == 0:
+            return keys, np.zeros(0, dtype=np.int64)
+        keys, group = np.unique(keys, axis=0, return_inverse=True)
+        return keys, group.reshape(-1)
+
+
+    def group_percentiles(self, values, group, ngroup, pcts):
+        """ Percentiles of values within each group
+        :values: array, one per game
+        :group: group index of each game
+        :ngroup: number of groups
+        :pcts: list of percentiles (0-100)
+        :returns: array [ngroup, len(pcts)]
+        """
+        counts = np.bincount(group, minlength=ngroup)
+        order = np.lexsort((values, group))
+        sorted_values = values[order]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        res = np.zeros((ngroup, len(pcts)))
+        has = counts > 0
+        for ip, pct in enumerate(pcts):
+            offsets = np.floor((counts-1)*pct/100.).astype(np.int64)
+            res[has, ip] = sorted_values[(starts + offsets)[has]]
+        return res
+
+
+    def get_stats(self):
+        """ Statistics by board size and number of players
+        :returns: list, by group, of dictionaries:
+            nrow, ncol, nplayer, ngame,
+            time_min, time_mean, time_p50, time_p95, time_max, nmove_mean,
+            players: list, in play order, of dictionaries:
+                nwin, nloss, ntie, pct_win, pct_loss, pct_tie,
+                pct_win_sq, pct_loss_sq, pct_tie_sq - squares as a
+                    percentage of the board, in wins, losses, ties
+            first_win_adv: player 1 win percentage above 100/nplayer
+            first_sq_adv: player 1 square percentage above 100/nplayer
+        """
+        keys, group = self.get_groups()
+        ngroup = len(keys)
+        if ngroup == 0:
+            return []
+
+        ngames = np.bincount(group, minlength=ngroup)
+        win, tie, loss, in_game = self.get_outcomes()
+        squares = self.squares
+        max_player = squares.shape[1]
+
+        def group_sum(values):
+            return np.bincount(group, weights=values, minlength=ngroup)
+
+        def pct(num, den):
+            den = np.asarray(den, dtype=np.float64)
+            return np.divide(100.*num, den, out=np.zeros(ngroup), where=den > 0)
+
+        board_sq = keys[:, 0]*keys[:, 1]
+        player_cols = []
+        for ip in range(max_player):
+            col = dict(nwin=group_sum(win[:, ip]), ntie=group_sum(tie[:, ip]),
+                       nloss=group_sum(loss[:, ip]),
+                       win_sq=group_sum(np.where(win[:, ip], squares[:, ip], 0)),
+                       tie_sq=group_sum(np.where(tie[:, ip], squares[:, ip], 0)),
+                       loss_sq=group_sum(np.where(loss[:, ip], squares[:, ip], 0)))
+            for kind in ("win", "tie", "loss"):
+                col["pct_" + kind] = pct(col["n" + kind], ngames)
+                col["pct_%s_sq" % kind] = pct(col[kind + "_sq"], col["n" + kind]*board_sq)
+            player_cols.append(col)
+
+        time_sum = group_sum(self.time)
+        time_min = np.full(ngroup, np.inf)
+        np.minimum.at(time_min, group, self.time)
+        time_max = np.full(ngroup, -np.inf)
+        np.maximum.at(time_max, group, self.time)
+        time_pcts = self.group_percentiles(self.time, group, ngroup, (50, 95))
+        nmove_sum = group_sum(self.nmove)
+        first_sq = group_sum(squares[:, 0]) if max_player > 0 else np.zeros(ngroup)
+        total_sq = group_sum(np.where(in_game, squares, 0).sum(axis=1))
+        even_pct = 100./keys[:, 2]
+
+        stats = []
+        for ig in range(ngroup):
+            nrow, ncol, nplayer = (int(v) for v in keys[ig])
+            ngame = int(ngames[ig])
+            players = []
+            for ip in range(nplayer):
+                col = player_cols[ip]
+                players.append({name : (int(col[name][ig]) if name.startswith("n")
+                                        else float(col[name][ig]))
+                                for name in ("nwin", "nloss", "ntie",
+                                             "pct_win", "pct_loss", "pct_tie",
+                                             "pct_win_sq", "pct_loss_sq", "pct_tie_sq")})
+            first_sq_pct = 100.*first_sq[ig]/total_sq[ig] if total_sq[ig] > 0 else 0.
+            stats.append(dict(nrow=nrow, ncol=ncol, nplayer=nplayer, ngame=ngame,
+                              time_min=float(time_min[ig]),
+                              time_mean=float(time_sum[ig]/ngame),
+                              time_p50=float(time_pcts[ig, 0]),
+                              time_p95=float(time_pcts[ig, 1]),
+                              time_max=float(time_max[ig]),
+                              nmove_mean=float(nmove_sum[ig]/ngame),
+                              players=players,
+                              first_win_adv=players[0]["pct_win"] - even_pct[ig],
+                              first_sq_adv=first_sq_pct - even_pct[ig]))
+        return stats
+
+
+    def log_stats(self, stats=None):
+        """ List statistics
+        :stats: statistics from get_stats default: get_stats()
+        """
+        if stats is None:
+            stats = self.get_stats()
+        SlTrace.lg(" Game Statistics by number of rows, cols, players")
+        SlTrace.lg("%4s %4s %3s %7s %9s %9s %9s %9s %9s %7s %8s %8s"
+                   % ("rows", "cols", "pls", "games", "tmin", "tavg", "t50",
+                      "t95", "tmax", "moves", "1st win", "1st sq"))
+        for st in stats:
+            SlTrace.lg("%4d %4d %3d %7d %9.3f %9.3f %9.3f %9.3f %9.3f %7.1f %+8.1f %+8.1f"
+                       % (st["nrow"], st["ncol"], st["nplayer"], st["ngame"],
+                          st["time_min"], st["time_mean"], st["time_p50"],
+                          st["time_p95"], st["time_max"], st["nmove_mean"],
+                          st["first_win_adv"], st["first_sq_adv"]))
+
+        SlTrace.lg(" Detailed Game Statistics by number of rows, cols")
+        fmt_str = 3 * "{:4s}({:4s}) [({:4s})]  "
+        stat_str = fmt_str.format(" win","%","%sqs",  "loss","%","%sqs",  "tie","%","%sqs")
+        SlTrace.lg("%4s %4s %5s  %2s  %s" % ("rows", "cols", "games", "pl", stat_str))
+        for st in stats:
+            for pl, pl_stat in enumerate(st["players"], start=1):
+                fmt_str = 3 * " {:4d}({:4.1f}) [({:4.1f})]"
+                stat_str = fmt_str.format(pl_stat["nwin"], pl_stat["pct_win"],
+                                          pl_stat["pct_win_sq"],
+                                          pl_stat["nloss"], pl_stat["pct_loss"],
+                                          pl_stat["pct_loss_sq"],
+                                          pl_stat["ntie"], pl_stat["pct_tie"],
+                                          pl_stat["pct_tie_sq"])
+                SlTrace.lg("%4d %4d %5d  %2d %s" % (st["nrow"], st["ncol"], st["ngame"],
+                                                    pl, stat_str))
+            SlTrace.lg(70*"-")
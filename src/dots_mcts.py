@@ -0,0 +1,286 @@
+# dots_mcts.py
+"""
+Monte Carlo Tree Search (UCT) dots player
+
+Playouts are made on a copy of the DotsShadow, using its
+make_move / unmake_move to go down the tree and play out the game and
+then to return to the root position, so no board is copied
+per playout.
+
+The search covers the opening / middle game only: when a square can
+be completed, or no safe move (giving no square) remains, the move is
+taken from the chain analysis (DotsChains.get_chain_move).
+Tree moves are safe moves, or squares which can be completed.
+
+Rollout policy
+    Until no safe move remains the rollout plays as
+    SelectPlay.auto_play_positive at LEVEL_NO_GIVE_SQUARE: complete a
+    square if possible, else make a random safe move.  With two players
+    the rest of the game is not played out with that policy (random
+    sacrifices) but estimated: the remaining squares are split by chain
+    control, the player not to move, who is left in control, being
+    credited with half the remaining squares plus half the
+    DotsChains.get_control_value net.  Random endgame play gives
+    results unrelated to who controls the chains, the deciding factor
+    of the game, and left the search weaker than LEVEL_NO_GIVE_SQUARE.
+    With more players the rollout plays on to the end, making random
+    moves once no safe move remains.
+
+A playout's reward to a player is its score margin, from 0 to 1:
+1/2 + (score - best other score) / (2 * number of squares),
+so 1/2 for a tie.  A node's wins are the sum of the rewards, from the
+view of the player who made the node's move.
+
+The tree is kept between moves.  It is keyed on the position's drawn
+edges, with the player drawing each, and the player to move.  On the
+next get_move the root is moved down through the children for the
+moves made since, and the tree is dropped only when one of them is not
+found.
+"""
+import math
+import random
+import time
+
+import numpy as np
+
+from dots_chains import DotsChains
+from select_trace import SlTrace
+
+
+class MCTSNode:
+    """ Search tree node - position after move
+    """
+    def __init__(self, move=None, player=None, to_move=1, parent=None):
+        """ Setup node
+        :move: edge index of move to this node, None for root
+        :player: playing number of player making move, None for root
+        :to_move: playing number of player to move at this node
+        :parent: parent node, None for root
+        """
+        self.move = move
+        self.player = player
+        self.to_move = to_move
+        self.parent = parent
+        self.children = []
+        self.untried = None             # Moves not yet expanded, set on first visit
+        self.visits = 0
+        self.wins = 0.0
+
+
+    def best_uct(self, c):
+        """ Child with best upper confidence bound
+        :c: exploration constant
+        """
+        log_n = math.log(self.visits)
+        best = None
+        best_value = None
+        for child in self.children:
+            value = child.wins/child.visits + c*math.sqrt(log_n/child.visits)
+            if best_value is None or value > best_value:
+                best_value = value
+                best = child
+        return best
+
+
+class DotsMCTS:
+    """ UCT search on the shadow board
+    """
+    def __init__(self, playouts=None, time_limit=1.0, c=1.4):
+        """ Setup search
+        :playouts: maximum number of playouts per move
+                default: no limit (use time_limit)
+        :time_limit: time limit per move, in seconds
+                default: 1.0, None - no limit (use playouts)
+        :c: UCT exploration constant default: 1.4
+        """
+        if playouts is None and time_limit is None:
+            time_limit = 1.0
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.c = c
+        self.root = None                # Tree kept from previous move
+        self.root_drawn = None          # Drawn (edge index, player) at root
+        self.nplayout = 0               # Playouts made for most recent move
+
+
+    def drawn_moves(self, shadow):
+        """ Position's drawn edges
+        :shadow: board
+        :returns: set of (edge index, playing number of player drawing)
+        """
+        lines_flat = shadow.lines_flat
+        return set((int(index), int(lines_flat[index]))
+                   for index in np.flatnonzero(lines_flat))
+
+
+    def reuse_root(self, shadow, player_num):
+        """ Find root, for current position, in tree kept from previous move
+        :shadow: current board
+        :player_num: player to move
+        :returns: node, None if not found
+        """
+        if self.root is None:
+            return None
+
+        drawn = self.drawn_moves(shadow)
+        if not self.root_drawn <= drawn:
+            return None                 # Not a later position in the same game
+
+        made = drawn - self.root_drawn
+        node = self.root
+        while made:
+            for child in node.children:
+                if (child.move, child.player) in made:
+                    break
+            else:
+                return None
+
+            node = child
+            made.remove((child.move, child.player))
+        if node.to_move != player_num:
+            return None
+        return node
+
+
+    def candidate_moves(self, shadow):
+        """ Moves to consider at a tree node
+        Squares which can be completed are taken, else safe moves
+        are made.  The search does not go past the last safe move.
+        :shadow: board at node
+        :returns: list of edge indexes, empty if none of these remain
+        """
+        indexes = shadow.open_edges[:shadow.nopen_line]
+        dists = shadow.edge_distances(indexes)
+        moves = indexes[dists == 0]
+        if len(moves) == 0:
+            moves = indexes[dists >= 2]
+        return [int(index) for index in moves]
+
+
+    def rollout(self, shadow, pn, nplayer):
+        """ Play game out, then undo the playout moves
+        With two players play stops when no square can be completed
+        and no safe move remains, the rest being estimated from the
+        chain control.
+        :shadow: board
+        :pn: player to move
+        :nplayer: number of players
+        :returns: scores, indexed by playing number
+        """
+        nmove = 0
+        while shadow.nopen_line > 0:
+            indexes = shadow.open_edges[:shadow.nopen_line]
+            dists = shadow.edge_distances(indexes)
+            moves = indexes[dists == 0]             # Complete a square
+            if len(moves) == 0:
+                moves = indexes[dists >= 2]         # Safe
+                if len(moves) == 0:
+                    if nplayer == 2:
+                        break
+                    moves = indexes
+            index = int(moves[random.randint(0, len(moves)-1)])
+            if not shadow.make_move(index, pn):
+                pn = pn % nplayer + 1
+            nmove += 1
+        scores = np.bincount(shadow.squares.ravel(), minlength=nplayer+1).astype(float)
+        remaining = scores[0]
+        if remaining > 0:
+            net = DotsChains(shadow).get_control_value()
+            net = min(max(net, -remaining), remaining)
+            scores[pn] += (remaining - net)/2
+            scores[pn % nplayer + 1] += (remaining + net)/2
+        for _ in range(nmove):
+            shadow.unmake_move()
+        return scores
+
+
+    def get_rewards(self, scores):
+        """ Playout reward for each player, from 0 to 1:
+        1/2 + (score - best other score) / (2 * number of squares)
+        :scores: scores, indexed by playing number, entry 0 unused
+        :returns: list of rewards, indexed by playing number
+        """
+        scores = [float(score) for score in scores]
+        scores[0] = 0.0
+        nsquare = sum(scores)
+        rewards = [0.0]
+        for pn in range(1, len(scores)):
+            other = max(scores[1:pn] + scores[pn+1:])
+            rewards.append(.5 + (scores[pn] - other)/(2*nsquare))
+        return rewards
+
+
+    def get_move(self, shadow, player_num=1, nplayer=2):
+        """ Choose move for shadow board position
+        :shadow: DotsShadow, not changed
+        :player_num: playing number of player to move
+        :nplayer: number of players
+        :returns: edge index, None if no legal moves
+        """
+        if shadow.nopen_line == 0:
+            return None
+
+        self.nplayout = 0
+        if len(shadow.get_completing_edges()) > 0 or len(shadow.get_safe_edges()) == 0:
+            self.root = None
+            work = shadow.copy()            # Chain analysis, leaving our board untouched
+            return int(work.get_chains().get_chain_move(player_num=player_num, nplayer=nplayer))
+
+        root = self.reuse_root(shadow, player_num)
+        if root is None:
+            root = MCTSNode(to_move=player_num)
+        root.parent = None
+        work = shadow.copy()
+        time_end = None
+        if self.time_limit is not None:
+            time_end = time.time() + self.time_limit
+        nplayout = 0
+        while True:
+            if self.playouts is not None and nplayout >= self.playouts:
+                break
+            if time_end is not None and nplayout & 15 == 0 and time.time() > time_end:
+                break
+
+            node = root
+            depth = 0
+            while node.untried is not None and not node.untried and node.children:
+                node = node.best_uct(self.c)        # Select
+                work.make_move(node.move, node.player)
+                depth += 1
+            if node.untried is None:
+                node.untried = self.candidate_moves(work)
+                random.shuffle(node.untried)
+            if node.untried:                        # Expand
+                index = node.untried.pop()
+                pn = node.to_move
+                to_move = pn if work.make_move(index, pn) else pn % nplayer + 1
+                depth += 1
+                child = MCTSNode(move=index, player=pn, to_move=to_move, parent=node)
+                node.children.append(child)
+                node = child
+            scores = self.rollout(work, node.to_move, nplayer)
+            rewards = self.get_rewards(scores)
+            while node is not None:                 # Back propagate
+                node.visits += 1
+                if node.player is not None:
+                    node.wins += rewards[node.player]
+                node = node.parent
+            for _ in range(depth):
+                work.unmake_move()
+            nplayout += 1
+
+        self.nplayout = nplayout
+        best = None
+        for child in root.children:
+            if best is None or child.visits > best.visits:
+                best = child
+        if best is None:                            # No playouts made
+            self.root = None
+            return int(shadow.open_edges[0])
+
+        self.root = best                            # Keep tree below our move
+        self.root_drawn = self.drawn_moves(shadow)
+        self.root_drawn.add((best.move, best.player))
+        SlTrace.lg(f"mcts: move={best.move} visits={best.visits}"
+                   f" win={best.wins/best.visits:.3f} playouts={nplayout}", "mcts")
+        return best.move
@@ -0,0 +1,34 @@
+# dots_mcts_timeit.py
+""" Timing of DotsMCTS playouts on the shadow board
+Reports playouts/sec per board size, for bare rollouts
+and for the full tree search from the empty board
+"""
+import argparse
+import time
+
+from select_trace import SlTrace
+from dots_shadow import DotsShadow
+from dots_mcts import DotsMCTS
+
+sizes = "3,5,8,10,15"
+seconds = 2.0
+parser = argparse.ArgumentParser()
+parser.add_argument('--sizes=', dest='sizes', default=sizes)
+parser.add_argument('--seconds=', type=float, dest='seconds', default=seconds)
+args = parser.parse_args()             # or die "Illegal options"
+
+for size in [int(x) for x in args.sizes.split(",")]:
+    shadow = DotsShadow(None, nrows=size, ncols=size)
+    mcts = DotsMCTS(time_limit=args.seconds)
+    nrollout = 0
+    time_beg = time.time()
+    while time.time() - time_beg < args.seconds:
+        mcts.rollout(shadow, 1, 2)
+        nrollout += 1
+    rollout_rate = nrollout/(time.time() - time_beg)
+
+    time_beg = time.time()
+    mcts.get_move(shadow, player_num=1, nplayer=2)
+    search_rate = mcts.nplayout/(time.time() - time_beg)
+    SlTrace.lg(f"{size}x{size}: rollouts {rollout_rate:.1f}/sec"
+               f"  tree playouts {search_rate:.1f}/sec")
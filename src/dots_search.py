@@ -0,0 +1,361 @@
+# dots_search.py
+"""
+Search based dots player - negamax with alpha-beta pruning
+
+The position is the set of drawn edges, held as a Python int as in
+DotsBitBoard.  The value of a position is the net number of the
+remaining squares the player to move can get, so it does not depend
+on the scores so far.  A move completing a square keeps the move
+with the same player, so its value is added, not negated.
+
+    Iterative deepening under a per move time limit
+    Zobrist hashed transposition table, fixed number of slots,
+        replacing an entry if the new one is from a deeper search
+        or the old one is from an earlier move's search
+    Move ordering: square completions, then safe moves (giving no
+        square), then the rest, with the transposition table's
+        best move first
+    Positions searched to the end of the game (depth >= open edges)
+        are exact and are kept, per board size, in a solved cache
+        shared by all DotsSearch instances, so small boards
+        (e.g. 3x3, 4x4 endgames) are solved once and then looked up
+
+For two players only.
+"""
+import random
+import time
+
+from select_trace import SlTrace
+from select_error import SelectError
+from dots_bitboard import DotsBitBoard
+
+
+class SearchTimeout(Exception):
+    """ Per move time limit reached
+    """
+    pass
+
+
+class DotsSearch:
+    """ Negamax alpha-beta search of shadow board positions
+    """
+    TT_EXACT = 0                    # Transposition table entry value types
+    TT_LOWER = 1
+    TT_UPPER = 2
+    SOLVED_MAX = 2000000            # Maximum solved cache entries per board size
+    solved_caches = {}              # Solved positions by (nrows, ncols): {edges : value}
+
+    def __init__(self, nrows, ncols=None, time_limit=1.0, tt_size=1<<18,
+                 seed=1):
+        """ Setup search for board size
+        :nrows: number of rows of squares
+        :ncols: number of columns of squares default: nrows
+        :time_limit: time limit per move, in seconds default: 1.0
+        :tt_size: number of transposition table slots,
+                rounded up to power of 2 default: 2**18
+        :seed: Zobrist key generation seed - uses own random generator
+                default: 1
+        """
+        if ncols is None:
+            ncols = nrows
+        self.nrows = nrows
+        self.ncols = ncols
+        self.time_limit = time_limit
+        board = DotsBitBoard(nrows, ncols)
+        self.board = board
+        self.legal_mask = board.legal_mask
+        self.edge_squares = board.edge_squares
+        self.edge_bits = [1 << index for index in range(board.nindex)]
+        rng = random.Random(seed)
+        self.zobrist = [rng.getrandbits(64) for _ in range(board.nindex)]
+        nslot = 1
+        while nslot < tt_size:
+            nslot *= 2
+        self.tt_mask = nslot - 1
+        self.tt = [None]*nslot       # (edges, depth, value, type, best, generation)
+        self.generation = 0
+        size_key = (nrows, ncols)
+        if size_key not in DotsSearch.solved_caches:
+            DotsSearch.solved_caches[size_key] = {}
+        self.solved = DotsSearch.solved_caches[size_key]
+        self.nodes = 0
+
+
+    def set_position(self, shadow):
+        """ Set search position from shadow board
+        :shadow: DotsShadow
+        """
+        if shadow.nrows != self.nrows or shadow.ncols != self.ncols:
+            raise SelectError(f"DotsSearch: board {shadow.nrows}x{shadow.ncols}"
+                              f" not {self.nrows}x{self.ncols}")
+        open_edges = 0
+        for index in shadow.open_edges[:shadow.nopen_line]:
+            open_edges |= self.edge_bits[index]
+        self.edges = self.legal_mask & ~open_edges
+        self.nopen = shadow.nopen_line
+        self.filled = [int(n) for n in shadow.square_filled[:shadow.nsquare]]
+        self.hash = 0
+        edges = self.edges
+        while edges:
+            low = edges & -edges
+            self.hash ^= self.zobrist[low.bit_length()-1]
+            edges ^= low
+
+
+    def make(self, index):
+        """ Draw edge
+        :index: edge index
+        :returns: number of squares completed
+        """
+        self.edges |= self.edge_bits[index]
+        self.hash ^= self.zobrist[index]
+        self.nopen -= 1
+        filled = self.filled
+        nsq = 0
+        for sq in self.edge_squares[index]:
+            filled[sq] += 1
+            if filled[sq] == 4:
+                nsq += 1
+        return nsq
+
+
+    def unmake(self, index):
+        """ Remove edge drawn by make
+        :index: edge index
+        """
+        self.edges &= ~self.edge_bits[index]
+        self.hash ^= self.zobrist[index]
+        self.nopen += 1
+        filled = self.filled
+        for sq in self.edge_squares[index]:
+            filled[sq] -= 1
+
+
+    def ordered_moves(self, first=None):
+        """ Open edges, square completions first, then safe moves, then the rest
+        :first: move to put first e.g. transposition table best move
+        :returns: list of edge indexes
+        """
+        filled = self.filled
+        edge_squares = self.edge_squares
+        completing = []
+        safe = []
+        rest = []
+        open_edges = self.legal_mask & ~self.edges
+        while open_edges:
+            low = open_edges & -open_edges
+            open_edges ^= low
+            index = low.bit_length() - 1
+            most = 0
+            for sq in edge_squares[index]:
+                if filled[sq] > most:
+                    most = filled[sq]
+            if most == 3:
+                completing.append(index)
+            elif most <= 1:
+                safe.append(index)
+            else:
+                rest.append(index)
+        moves = completing + safe + rest
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+
+    def quiesce(self):
+        """ Value at search horizon: squares the player to move can take now
+        """
+        taken = []
+        ntaken = 0
+        while True:
+            index = None
+            for sq, nfill in enumerate(self.filled):
+                if nfill == 3:
+                    for edge in self.board.square_edges[sq]:
+                        if not self.edges & self.edge_bits[edge]:
+                            index = edge
+                            break
+                    break
+            if index is None:
+                break
+            ntaken += self.make(index)
+            taken.append(index)
+        for index in reversed(taken):
+            self.unmake(index)
+        return ntaken
+
+
+    def negamax(self, depth, alpha, beta):
+        """ Negamax alpha-beta search
+        :depth: remaining depth, in moves
+        :alpha: lower bound
+        :beta: upper bound
+        :returns: value for player to move
+        """
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.time() > self.time_end:
+            raise SearchTimeout()
+
+        if self.nopen == 0:
+            return 0
+
+        edges = self.edges
+        exact = depth >= self.nopen
+        if edges in self.solved:
+            return self.solved[edges]
+
+        best_move = None
+        slot = self.hash & self.tt_mask
+        entry = self.tt[slot]
+        if entry is not None and entry[0] == edges:
+            best_move = entry[4]
+            if entry[1] >= depth:
+                value = entry[2]
+                if entry[3] == self.TT_EXACT:
+                    return value
+                if entry[3] == self.TT_LOWER and value >= beta:
+                    return value
+                if entry[3] == self.TT_UPPER and value <= alpha:
+                    return value
+
+        if depth <= 0:
+            return self.quiesce()
+
+        alpha_orig = alpha
+        best = None
+        for index in self.ordered_moves(first=best_move):
+            nsq = self.make(index)
+            try:
+                if nsq > 0:
+                    value = nsq + self.negamax(depth-1, alpha-nsq, beta-nsq)
+                else:
+                    value = -self.negamax(depth-1, -beta, -alpha)
+            finally:
+                self.unmake(index)
+            if best is None or value > best:
+                best = value
+                best_move = index
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                break
+
+        if best <= alpha_orig:
+            vtype = self.TT_UPPER
+        elif best >= beta:
+            vtype = self.TT_LOWER
+        else:
+            vtype = self.TT_EXACT
+            if exact:
+                if len(self.solved) >= self.SOLVED_MAX:
+                    self.solved.clear()
+                self.solved[edges] = best
+        if (entry is None or entry[5] != self.generation
+                or depth >= entry[1]):
+            self.tt[slot] = (edges, depth, best, vtype, best_move, self.generation)
+        return best
+
+
+    def search(self, time_limit=None):
+        """ Iterative deepening search of current position
+        :time_limit: seconds, default: self.time_limit
+        :returns: (best move edge index, value, depth reached)
+                    move is None if no open edges
+        """
+        if time_limit is None:
+            time_limit = self.time_limit
+        self.generation += 1
+        self.nodes = 0
+        self.time_end = time.time() + time_limit
+        moves = self.ordered_moves()
+        if len(moves) == 0:
+            return None, 0, 0
+
+        best_move = moves[0]
+        best_value = 0
+        depth_done = 0
+        depth = 1
+        while depth_done < self.nopen:
+            try:
+                value, move = self.search_root(depth, best_move)
+            except SearchTimeout:
+                break
+            best_move, best_value, depth_done = move, value, depth
+            depth += 1
+        SlTrace.lg(f"search: move={self.board.index_edge(best_move)} value={best_value}"
+                   f" depth={depth_done}/{self.nopen} nodes={self.nodes}", "search")
+        return best_move, best_value, depth_done
+
+
+    def search_root(self, depth, first=None):
+        """ Search root to depth
+        :depth: search depth
+        :first: move to try first e.g. best of previous iteration
+        :returns: (value, best move)
+        """
+        alpha = -(self.nopen + len(self.filled))
+        beta = -alpha
+        best = None
+        best_move = None
+        for index in self.ordered_moves(first=first):
+            nsq = self.make(index)
+            try:
+                if nsq > 0:
+                    value = nsq + self.negamax(depth-1, alpha-nsq, beta-nsq)
+                else:
+                    value = -self.negamax(depth-1, -beta, -alpha)
+            finally:
+                self.unmake(index)
+            if best is None or value > best:
+                best = value
+                best_move = index
+            if best > alpha:
+                alpha = best
+        return best, best_move
+
+
+    def get_move(self, shadow, time_limit=None):
+        """ Choose move for shadow board position
+        :shadow: DotsShadow
+        :time_limit: seconds, default: self.time_limit
+        :returns: edge index, None if no open edges
+        """
+        self.set_position(shadow)
+        move, _, _ = self.search(time_limit=time_limit)
+        return move
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from dots_shadow import DotsShadow
+
+    nx = 3
+    ny = None
+    time_limit = 1.0
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nx=', type=int, dest='nx', default=nx)
+    parser.add_argument('--ny=', type=int, dest='ny', default=ny)
+    parser.add_argument('--time_limit=', type=float, dest='time_limit', default=time_limit)
+    args = parser.parse_args()             # or die "Illegal options"
+    nrows = args.ny if args.ny is not None else args.nx
+    shadow = DotsShadow(None, nrows, args.nx)
+    search = DotsSearch(nrows, args.nx, time_limit=args.time_limit)
+    pn = 1
+    while shadow.get_num_legal_moves() > 0:
+        time_beg = time.time()
+        search.set_position(shadow)
+        index, value, depth = search.search()
+        row, col, hv = shadow.tables.edge_rchs[index]
+        SlTrace.lg(f"player {pn}: row={row} col={col} hv={hv} value={value}"
+                   f" depth={depth} nodes={search.nodes}"
+                   f" {time.time()-time_beg:.2f} sec")
+        shadow.turn_on_edge(row, col, hv, pn)
+        squares = shadow.get_completed_squares(row, col, hv)
+        for sq in squares:
+            shadow.turn_on_square(sq[0], sq[1], pn)
+        if not squares:
+            pn = 3 - pn
+    SlTrace.lg(f"squares: player 1={(shadow.squares == 1).sum()}"
+               f" player 2={(shadow.squares == 2).sum()}")
@@ -7,12 +7,19 @@ import numpy as np
 
 from select_trace import SlTrace
 from select_error import SelectError
-from select_edge import SelectEdge
-from select_region import SelectRegion
 from move_list import MoveList, MVP
+from dots_edges import get_edge_tables
+from dots_bitboard import DotsBitBoard
+from dots_chains import DotsChains
+from trace_lazy import trace_flag, lg
+
+TR_COMPLETE_SQUARE = trace_flag("complete_square")
+TR_COMPLETE_SQUARE_LOOKING = trace_flag("complete_square looking")
 """
 Dots Square / Edge numbering
 Squares are numbered row, col starting at 1,1 in upper left
+Edges and squares are indexed as in dots_edges, whose per board size
+tables give each edge's squares and each square's edges
 Edges, bordering a square are numbered as follows:
 
     Lve_row = sq_row          (Left vertical edge)
@@ -33,36 +40,354 @@ Edges, bordering a square are numbered as follows:
 class DotsShadow:
     """ Shadow of Dots structure to facilitate testing speed when display is not required
     """
-    def __init__(self, select_dots, nrows=None, ncols=None):
+    def __init__(self, select_dots, nrows=None, ncols=None, use_bitboard=False):
+        """ Setup shadow
+        :select_dots: board, None for headless play
+        :nrows: number of rows of squares
+        :ncols: number of columns of squares
+        :use_bitboard: True - keep edges also in a DotsBitBoard which is used
+                        for square completion, distance and legal move queries
+                        default: use lines array only
+        """
         self.select_dots = select_dots
         self.nrows = nrows
         self.ncols = ncols
-        self.squares = np.zeros([nrows, ncols], dtype=int)
-        self.lines = np.zeros([nrows+1, ncols+1, 2], dtype=int)     # row, col, [horiz=0, vert=1]
+        self.tables = get_edge_tables(nrows, ncols)     # Shared by boards of our size
+        self.setup_state()
+        self.lines_flat[:] = ~self.tables.is_edge  # Illegal edges are marked as used
+                                                    # Parts, if any, are filled in by set_part
+        self.square_parts = [None]*self.tables.nsquare  # By square index
+        self.edge_parts = [None]*self.tables.nindex     # By edge index
+        self.setup_open_edges()
+        self.setup_square_counts()
+        self.chains = None                  # DotsChains, set up by get_chains
+        self.bitboard = None
+        if use_bitboard:
+            self.bitboard = DotsBitBoard(nrows, ncols)
+        self.undo_stack = []                # make_move / unmake_move entries
+
+
+    def setup_state(self):
+        """ Setup board state, held in one int array so a board is copied
+        by a single array copy.  The state arrays are views of it:
+            squares[row-1, col-1]       square owner's playing number, 0 if open
+            lines[row-1, col-1, hv]     edge's playing number, 0 if open
+            squares_flat, lines_flat    the same, by square / edge index
+            open_edges, open_pos        open edge set (setup_open_edges)
+            square_filled               sides drawn by square (setup_square_counts)
+        State arrays are only changed in place, never replaced.
+        """
+        nsq = self.tables.nsquare
+        nindex = self.tables.nindex
+        nedge = self.tables.nedge
+        self.state = np.zeros(nsq + nindex + nedge + nindex + nsq+1, dtype=int)
+        self.setup_views()
+
+
+    def setup_views(self):
+        """ Setup state array views, of self.state
+        """
+        nsq = self.tables.nsquare
+        nindex = self.tables.nindex
+        nedge = self.tables.nedge
+        state = self.state
+        beg = 0
+        self.squares_flat = state[beg:beg+nsq]
+        self.squares = self.squares_flat.reshape(self.nrows, self.ncols)
+        beg += nsq
+        self.lines_flat = state[beg:beg+nindex]
+        self.lines = self.lines_flat.reshape(self.nrows+1, self.ncols+1, 2)
+        beg += nindex
+        self.open_edges = state[beg:beg+nedge]
+        beg += nedge
+        self.open_pos = state[beg:beg+nindex]
+        beg += nindex
+        self.square_filled = state[beg:beg+nsq+1]
+
+
+    def reset(self):
+        """ Clear board state for a new game, in place
+        Per board tables and parts are kept
+        """
+        self.state.fill(0)
+        self.lines_flat[:] = ~self.tables.is_edge     # Illegal edges as used
+        self.open_edges[:] = self.tables.edge_indexes
+        self.nopen_line = len(self.open_edges)
+        self.open_pos.fill(-1)
+        self.open_pos[self.open_edges] = np.arange(self.nopen_line)
+        self.legal_list = None
+        self.chains = None
+        if self.bitboard is not None:
+            self.bitboard.clear()
+        self.undo_stack = []
+
+
+    def copy(self):
+        """ Copy of board state for trial play (e.g. search, playouts)
+        The state is copied by one array copy, per board tables and
+        parts (set once per board, only read after) are shared.
+        The copy has no SelectDots or chain analysis,
+        the undo stack is copied.
+        :returns: DotsShadow
+        """
+        new_shadow = DotsShadow.__new__(DotsShadow)
+        new_shadow.__dict__.update(self.__dict__)
+        new_shadow.state = self.state.copy()
+        new_shadow.setup_views()
+        new_shadow.select_dots = None
+        new_shadow.legal_list = None
+        new_shadow.chains = None
+        if self.bitboard is not None:
+            new_shadow.bitboard = self.bitboard.copy()
+        new_shadow.undo_stack = list(self.undo_stack)
+        return new_shadow
+
+
+    def clone(self):
+        """ Copy of shadow for trial play, as copy, but with an empty
+        undo stack
+        :returns: DotsShadow
+        """
+        new_shadow = self.copy()
+        new_shadow.undo_stack = []
+        return new_shadow
+
+
+    def make_move(self, index, pn):
+        """ Make move: draw edge and mark any completed squares
+        Undone by unmake_move.  The undo stack holds, for each move,
+        the squares completed followed by index*3 + number completed.
+        :index: edge index
+        :pn: player's playing number 1,2,...
+        :returns: number of squares completed 0,1,2
+        """
+        open_pos = self.open_pos
+        pos = open_pos[index]
+        if pos < 0:
+            raise SelectError(f"make_move: edge {index} is not open")
+
+        self.lines_flat[index] = pn
+        undo_stack = self.undo_stack
+        square_filled = self.square_filled
+        ncomplete = 0
+        for sq in self.edge_sq_list[index]:
+            square_filled[sq] += 1
+            if square_filled[sq] == 4:
+                self.squares_flat[sq] = pn
+                undo_stack.append(sq)
+                ncomplete += 1
+        last = self.nopen_line - 1          # Remove from open edges
+        last_index = self.open_edges[last]
+        self.open_edges[pos] = last_index
+        open_pos[last_index] = pos
+        open_pos[index] = -1
+        self.nopen_line = last
+        self.legal_list = None
+        if self.chains is not None:
+            self.chains.edge_changed(index)
+        if self.bitboard is not None:
+            self.bitboard.turn_on(index)
+        undo_stack.append(index*3 + ncomplete)
+        return ncomplete
+
+
+    def unmake_move(self):
+        """ Undo most recent make_move
+        :returns: edge index of move undone, None if none
+        """
+        undo_stack = self.undo_stack
+        if not undo_stack:
+            return None
+
+        index, ncomplete = divmod(undo_stack.pop(), 3)
+        for _ in range(ncomplete):
+            self.squares_flat[undo_stack.pop()] = 0
+        self.lines_flat[index] = 0
+        square_filled = self.square_filled
+        for sq in self.edge_sq_list[index]:
+            square_filled[sq] -= 1
+        pos = self.nopen_line               # Add to open edges
+        self.open_edges[pos] = index
+        self.open_pos[index] = pos
+        self.nopen_line = pos + 1
+        self.legal_list = None
+        if self.chains is not None:
+            self.chains.edge_changed(index)
+        if self.bitboard is not None:
+            self.bitboard.turn_off(index)
+        return index
+
+
+    def move(self, row, col, hv, pn):
+        """ Make move, by row, col, hv, as make_move
+        :row: row number, starting at 1
+        :col: col number, starting at 1
+        :hv: horizontal==0, vertical==1
+        :pn: player's playing number 1,2,...
+        :returns: list of completed (row, col) squares, empty if none
+        """
+        ncomplete = self.make_move(self.edge_index(row, col, hv), pn)
+        if ncomplete == 0:
+            return []
+        square_rcs = self.tables.square_rcs
+        return [square_rcs[sq] for sq in self.undo_stack[-1-ncomplete:-1]]
+
+
+    def unmove(self):
+        """ Undo most recent move, as unmake_move
+        :returns: (row, col, hv) of move undone, None if none
+        """
+        index = self.unmake_move()
+        if index is None:
+            return None
+        return self.tables.edge_rchs[index]
+
+
+    def setup_open_edges(self):
+        """ Setup set of open (legal) edges
+        The set is kept up to date by turn_on / turn_off:
+            open_edges[0:nopen_line] - edge index, as lines.ravel(), of each open edge
+            open_pos[edge index] - position in open_edges, -1 if not open
+        Removal swaps the last entry into the removed entry's place
+        so removal, addition and random choice are O(1).
+        Initial order is that of scanning lines.
+        """
+        self.edge_rch = self.tables.edge_rch        # row, col, hv of index
+        self.open_edges[:] = self.tables.edge_indexes
+        self.open_pos.fill(-1)
+        self.nopen_line = len(self.open_edges)
+        self.open_pos[self.open_edges] = np.arange(self.nopen_line)
+        self.legal_list = None              # Cached get_legal_list, None if stale
+
+
+    def setup_square_counts(self):
+        """ Setup per square count of drawn sides, kept up to date by
+        turn_on_edge / turn_off_edge, and the per edge square table
+            square_filled[sq] - number of sides drawn of square sq
+                                sq = (row-1)*ncols + (col-1)
+                                square_filled[nrows*ncols] - no square, always 0
+            edge_sq[edge index] - the (up to two) squares bordering the edge,
+                                nrows*ncols if none
+        """
+        self.nsquare = self.tables.nsquare
+        self.square_filled.fill(0)
+        self.edge_sq = self.tables.edge_sq
+        self.edge_sq_list = self.tables.edge_sq_list     # Python tuples for scalar use
+
+
+    def edge_index(self, row, col, hv):
+        """ Edge index, into lines.ravel()
+        :row: row number, starting at 1
+        :col: col number, starting at 1
+        :hv: horizontal==0, vertical==1
+        """
+        return ((row-1)*(self.ncols+1) + (col-1))*2 + hv
+
+
+    def open_edge_remove(self, index):
+        """ Remove edge from open edge set
+        :index: edge index
+        """
+        pos = self.open_pos[index]
+        if pos < 0:
+            return                          # Not open
         
-                                                    # Mark illegal edges as used
-        for ir in range(nrows+1):
-            self.lines[ir, ncols, MVP.HV_H] = 1     # No horizontal edge at right end
-        for ic in range(ncols+1):
-            self.lines[nrows, ic, MVP.HV_V] = 1     # No vertical edge at bottom end
+        last = self.nopen_line - 1
+        last_index = self.open_edges[last]
+        self.open_edges[pos] = last_index   # Move last entry into hole
+        self.open_pos[last_index] = pos
+        self.open_pos[index] = -1
+        self.nopen_line = last
+        self.legal_list = None
 
-        self.squares_obj =  np.zeros([nrows, ncols], dtype=SelectRegion)
-        self.lines_obj = np.zeros([nrows+1, ncols+1, 2], dtype=SelectEdge)     # row, col, [horiz=0, vert=1]
-        ###self.lines_obj = np.zeros([nrows+1+1, ncols+1+1, 2], dtype=SelectEdge)     # row, col, [horiz=0, vert=1]
-        self.nopen_line = 2*nrows*ncols + nrows + ncols
+
+    def open_edge_add(self, index):
+        """ Add edge to open edge set
+        :index: edge index
+        """
+        if self.open_pos[index] >= 0:
+            return                          # Already open
+        
+        pos = self.nopen_line
+        self.open_edges[pos] = index
+        self.open_pos[index] = pos
+        self.nopen_line = pos + 1
+        self.legal_list = None
 
 
     def get_legal_list(self):
-        """ Return MoveList of legal moves
+        """ Return MoveList of legal moves, read from the open edge set
+        The list is shared by calls until the next turn_on/turn_off
+        so it must not be modified by the caller.
         :returns: list(MoveList) of moves(MoveList)
         """
-        legals = MoveList(self)
-        for ir in range(0, self.nrows+1):
-            for ic in range(0, self.ncols+1):
-                for hv in [MVP.HV_H, MVP.HV_V]:
-                    if self.lines[ir, ic, hv] == 0:
-                        legals.add_move(MVP(row=ir+1, col=ic+1, hv=hv))    # unused
-        return legals
+        if self.legal_list is None:
+            self.legal_list = MoveList(self, indexes=self.open_edges[:self.nopen_line].copy())
+        return self.legal_list
+
+
+    def move_list_indexes(self, move_list):
+        """ Edge indexes of moves in list
+        :move_list: MoveList
+        :returns: array of edge indexes
+        """
+        return move_list.get_indexes()
+
+
+    def edge_distances(self, indexes):
+        """ Minimum number of moves, after each open edge, to complete a square
+        Vector form of distance_from_square
+        :indexes: array of open edge indexes
+        :returns: array of distances 0 => edge completes a square
+        """
+        return 3 - self.square_filled[self.edge_sq[indexes]].max(axis=1)
+
+
+    def get_completing_edges(self):
+        """ All open edges which complete a square
+        :returns: array of edge indexes
+        """
+        indexes = self.open_edges[:self.nopen_line]
+        return indexes[self.edge_distances(indexes) == 0]
+
+
+    def get_safe_edges(self, min_dist=2):
+        """ All open edges which leave squares at least min_dist moves from completion
+        :min_dist: minimum distance default: 2 - next player can't complete a square
+        :returns: array of edge indexes
+        """
+        indexes = self.open_edges[:self.nopen_line]
+        return indexes[self.edge_distances(indexes) >= min_dist]
+
+
+    def get_two_sided_squares(self):
+        """ All squares with exactly two sides drawn
+        :returns: array [n, 2] of square row, col, starting at 1
+        """
+        sqs = np.flatnonzero(self.square_filled[:self.nsquare] == 2)
+        return np.column_stack(divmod(sqs, self.ncols)) + 1
+
+
+    def get_chains(self):
+        """ Get chain / loop analysis, kept up to date from now on
+        :returns: DotsChains
+        """
+        if self.chains is None:
+            self.chains = DotsChains(self)
+        return self.chains
+
+
+    def rand_legal_move(self):
+        """ Get random legal move, directly from the open edge set
+        Same random choice as get_legal_list().rand_move()
+        :returns: move(MVP), None if no legal moves
+        """
+        if self.nopen_line == 0:
+            return None
+        
+        index = self.open_edges[random.randint(0, self.nopen_line-1)]
+        row, col, hv = self.tables.edge_rchs[index]
+        return MVP(row=row, col=col, hv=hv)
 
 
     def get_legal_moves(self):
@@ -89,15 +414,8 @@ class DotsShadow:
         """
         if move_list is None:
             move_list = self.get_legal_list()
-        square_move_list = MoveList(self, max_move=move_list.nmove)
-        
-        for mvp in move_list:
-            nr = mvp.row
-            nc = mvp.col
-            hv = mvp.hv    
-            if self.does_complete_square(nr, nc, hv):
-                square_move_list.add_move(mvp)
-        return square_move_list
+        dists = self.edge_distances(move_list.get_indexes())
+        return move_list.filter(dists == 0)
 
 
     def get_square_distance_list(self, min_dist=2, move_list=None):
@@ -107,20 +425,13 @@ class DotsShadow:
                 complete a square, 2: two moves required to complete
                 a square default: 2 moves
         :move_list: list of candidate moves(MoveList)
-                    default: use legal moves (get_legal_moves)
+                    default: use legal moves (get_legal_list)
         :returns: list(MoveList) of moves that will complete a square
         """
         if move_list is None:
-            move_list = self.get_legal_moves()
-        dist_move_list = MoveList(self, max_move=move_list.nmove)
-        
-        for mvp in move_list:
-            nr = mvp.row
-            nc = mvp.col
-            hv = mvp.hv    
-            if self.distance_from_square(nr, nc, hv) >= min_dist:
-                dist_move_list.add_move(mvp)
-        return dist_move_list
+            move_list = self.get_legal_list()
+        dists = self.edge_distances(move_list.get_indexes())
+        return move_list.filter(dists >= min_dist)
     
 
     def distance_from_square(self, nr, nc, hv):
@@ -130,71 +441,20 @@ class DotsShadow:
         0 => a completed square
         1 => sets up opponent to complete square
         """
-        ir = nr - 1     # index
-        ic = nc - 1
+        if self.bitboard is not None:
+            return self.bitboard.distance_from_square(
+                                self.bitboard.edge_index(nr, nc, hv))
+        
+        index = self.edge_index(nr, nc, hv)
+        nopen = 3 if self.open_pos[index] >= 0 else 4   # Not counting this edge
+        square_filled = self.square_filled
         min_dist = None
-        if hv == 0:     # Horizontal
-            if ir > 0:
-                                                            # Square above
-                dist = 0
-                if self.lines[ir, ic, 1] == 0:               # left vertical edge
-                    dist += 1
-                if self.lines[ir-1, ic, 0] == 0:            # top horizontal edge
-                    dist += 1
-                if self.lines[ir, ic+1, 1] == 0:            # right vertical edge
-                    dist += 1
-                if dist == 0:
-                    return dist                             # At min
-                            
-                if min_dist is None or dist < min_dist:
-                    min_dist = dist
-
-
-            if ir < self.nrows:     
-                                                            # Square below
-                dist = 0
-                
-                if self.lines[ir+1, ic, 1] == 0:            # left vertical edge
-                    dist += 1
-                if self.lines[ir+1, ic, 0] == 0:            # bottom horizontal edge
-                    dist += 1
-                if self.lines[ir+1, ic, 1] > 0:             # right vertical edge
-                    dist += 1
-                if dist == 0:
-                    return dist                             # At min
-
-                if min_dist is None or dist < min_dist:
-                    min_dist = dist
-                    
-        else:     # Vertical
-            if ic > 0:
-                                                            # Square to left
-                dist = 0
-                if self.lines[ir+1, ic-1, 0] > 0:           # bottom horizontal edge
-                    dist += 1
-                if self.lines[ir, ic-1, 1] > 0:             # left vertical edge
-                    dist += 1
-                if self.lines[ir, ic-1, 0] > 0:   # top horizontal edge
-                    dist += 1
-                if dist == 0:
-                    return dist                             # At min
-                if min_dist is None or dist < min_dist:
-                    min_dist = dist
-
-            if ic < self.ncols:            
-                                                            # Square to right
-                dist = 0
-                if self.lines[ir+1, ic, 0] == 0:            # bottom horizontal edge
-                    dist += 1
-                if self.lines[ir+1, ic, 1] == 0:            # right vertical edge
-                    dist += 1     
-                if self.lines[ir+1, ic, 0] == 0:            # top horizontal edge
-                    dist += 1
-                if dist == 0:
-                    return dist                             # At min
-                if min_dist is None or dist < min_dist:
-                    min_dist = dist
-                    
+        for sq in self.edge_sq_list[index]:
+            dist = nopen - square_filled[sq]
+            if dist == 0:
+                return dist                                 # At min
+            if min_dist is None or dist < min_dist:
+                min_dist = dist
         return min_dist
 
     def get_player(self):
@@ -219,61 +479,25 @@ class DotsShadow:
             raise SelectError(f"col:{nc} out of range")
         if hv < 0 or hv > 1:
             raise SelectError(f"hv:{hv} out of range")
-        ir = nr - 1
-        ic = nc - 1
-        SlTrace.lg(f"ir={ir} ic={ic} hv={hv}", "complete_square looking")
-        if hv == 0:     # Horizontal
-            if ir > 0:
-                                                            # Square above
-                if (self.lines[ir-1, ic, 1] > 0               # left vertical edge
-                        and self.lines[ir-1, ic, 0] > 0     # top horizontal edge
-                        and self.lines[ir-1, ic+1, 1] == 0):  # right vertical edge
-                    if SlTrace.trace("complete_square"):
-                        self.show_play(nr, nc, hv, desc="Square above")
-                        self.line_desc(nr, nc, hv, desc="Completing line before")
-                        self.line_desc(ir-1, ic, 0, index=True, desc="left vertical edge")
-                        self.line_desc(ir-1, ic, 0, index=True, desc="top horizontal edge")
-                        self.line_desc(ir-1, ic+1, 1, index=True, desc="right vertical edge")
-                    return True            
-                
-            if ir < self.nrows:                             # Square below
-                if (self.lines[ir+1, ic, 1] > 0             # left vertical edge
-                        and self.lines[ir+1, ic, 0] > 0       # bottom horizontal edge
-                        and  self.lines[ir, ic+1, 1] > 0): # right vertical edge
-                    if SlTrace.trace("complete_square"):
-                        self.show_play(nr, nc, hv, desc="Square below")
-                        self.line_desc(nr, nc, hv, desc="Completing line before")
-                        self.line_desc(ir+1, ic, 1, index=True, desc="left vertical edge")
-                        self.line_desc(ir+1, ic,0, index=True, desc="bottom horizontal edge")
-                        self.line_desc(ir+1, ic+1,1, index=True, desc="right vertical edge")
-                    return True
-                
-        else:     # Vertical
-            if ic > 0:
-                                                            # Square to left
-                if (self.lines[ir+1, ic-1, 0] > 0           # bottom horizontal edge
-                        and self.lines[ir, ic-1, 1] > 0     # left vertical edge
-                        and self.lines[ir, ic-1, 0] > 0):   # top horizontal edge
-                    if SlTrace.trace("complete_square"):
-                        self.show_play(nr, nc, hv, desc="Square to left")
-                        self.line_desc(nr, nc, hv, desc="Completing line before")
-                        self.line_desc(ir+1, ic-1, 0, index=True, desc="bottom horizontal edgee")
-                        self.line_desc(ir, ic-1, 1, index=True, desc="left vertical edge")
-                        self.line_desc(ir, ic-1, 0, index=True, desc="top horizontal edge")
-                    return True     # complete sq on left
-
-                                                            # Square to right
-            if ic < self.ncols:                             # but not right most column
-                if (self.lines[ir+1, ic, 0] > 0             # bottom horizontal edge
-                        and self.lines[ir, ic+1, 1] > 0     # right vertical edge     
-                        and self.lines[ir, ic, 0] > 0):    # top horizontal edge
-                    if SlTrace.trace("complete_square"):
-                        self.show_play(nr, nc, hv, desc="Square to right")
-                        self.line_desc(nr, nc, hv, desc="Completing line before")
-                        self.line_desc(ir+1, ic, 0, index=True, desc="bottom horizontal edge")
-                        self.line_desc(ir+1, ic, 1, index=True, desc="right vertical edge")
-                        self.line_desc(ir+1, ic, 0, index=True, desc="top horizontal edge")
-                    return True     # complete sq on right
+        if self.bitboard is not None:
+            return self.bitboard.does_complete_square(
+                                self.bitboard.edge_index(nr, nc, hv))
+        
+        lg(TR_COMPLETE_SQUARE_LOOKING, lambda: f"ir={nr-1} ic={nc-1} hv={hv}")
+        index = self.edge_index(nr, nc, hv)
+        nfilled = 3 if self.open_pos[index] >= 0 else 4     # Not counting this edge
+        for sq in self.edge_sq_list[index]:
+            if self.square_filled[sq] == nfilled:           # Other three sides drawn
+                if TR_COMPLETE_SQUARE.on:
+                    sq = self.tables.square_rcs[sq]
+                    self.show_play(nr, nc, hv, desc=f"Square row={sq[0]} col={sq[1]}")
+                    self.line_desc(nr, nc, hv, desc="Completing line before")
+                    ir, ic = sq[0]-1, sq[1]-1
+                    self.line_desc(ir, ic, 0, index=True, desc="top horizontal edge")
+                    self.line_desc(ir+1, ic, 0, index=True, desc="bottom horizontal edge")
+                    self.line_desc(ir, ic, 1, index=True, desc="left vertical edge")
+                    self.line_desc(ir, ic+1, 1, index=True, desc="right vertical edge")
+                return True
                     
         return False            # Completed squares            
 
@@ -284,15 +508,14 @@ class DotsShadow:
         :col: col number, starting with 1
         :hv: horizontal==0, vertical==1
         """
-        return self.lines_obj[row-1, col-1, hv]
+        return self.edge_parts[((row-1)*(self.ncols+1) + (col-1))*2 + hv]
     
     def get_mvpart(self, mvpart=None):
         """ get shadowed part (edge only)
         :mvpart: MoveList entry designation
         """
         if mvpart is not None:
-            ir, ic, hv = mvpart.row-1, mvpart.col-1, mvpart.hv
-            return self.lines_obj[ir, ic, hv]
+            return self.get_edge(mvpart.row, mvpart.col, mvpart.hv)
         
         return None
 
@@ -326,7 +549,8 @@ class DotsShadow:
         if desc is None:
             desc = ""
         SlTrace.lg(f"line row={row} col={col} {direct} : lines[{ir},{ic},{hv}] = {line_val} {desc}")
-        part = self.lines_obj[ir, ic, hv]
+        part = self.get_edge(row, col, hv) if self.tables.is_edge[
+                                self.edge_index(row, col, hv)] else None
         SlTrace.lg(f"        part: {part}") 
             
 
@@ -337,12 +561,10 @@ class DotsShadow:
         row = part.row 
         col =  part.col
         if part.is_region():
-            self.squares_obj[row-1,col-1] = part 
+            self.square_parts[self.tables.square_index(row, col)] = part 
         elif part.is_edge():
-            if part.sub_type() == 'h':
-                self.lines_obj[row-1, col-1, 0] = part
-            elif part:
-                self.lines_obj[row-1, col-1, 1] = part
+            hv = MVP.HV_H if part.sub_type() == 'h' else MVP.HV_V
+            self.edge_parts[self.edge_index(row, col, hv)] = part
 
     def turn_on(self, part=None, player=None, move_no=None):
         """ Shadow part turn on operation to facilitate speed when display is not required
@@ -357,21 +579,105 @@ class DotsShadow:
         if pn is None:
             return
         
-        row = part.row 
+        row = part.row
         col = part.col
         sub_type = part.sub_type()
         if part.is_edge():
-            if sub_type == 'h':
-                self.lines[row-1, col-1, 0] = pn
-            else:
-                self.lines[row-1, col-1, 1] = pn
+            hv = MVP.HV_H if sub_type == 'h' else MVP.HV_V
+            self.turn_on_edge(row, col, hv, pn)
         elif part.is_region():
-            self.squares[row-1, col-1] = pn
+            self.turn_on_square(row, col, pn)
         else:
             raise SelectError("turn_on Can't shadow part type {} at row={:d} col={;d}"
                               .format(part, row, col))
-        self.nopen_line -= 1            # Reduce number of open lines by 1
-        
+
+
+    def turn_on_edge(self, row, col, hv, pn):
+        """ Turn on edge without reference to a part
+        Used directly by headless play (DotsEngine)
+        :row: row number, starting at 1
+        :col: col number, starting at 1
+        :hv: horizontal==0, vertical==1
+        :pn: player's playing number 1,2,...
+        """
+        ir = row - 1
+        ic = col - 1
+        self.lines[ir, ic, hv] = pn
+        index = self.edge_index(row, col, hv)
+        if self.open_pos[index] >= 0:
+            for sq in self.edge_sq_list[index]:
+                self.square_filled[sq] += 1
+            self.open_edge_remove(index)
+            if self.chains is not None:
+                self.chains.edge_changed(index)
+        if self.bitboard is not None:
+            self.bitboard.turn_on(self.bitboard.edge_index(row, col, hv))
+
+
+    def turn_on_square(self, row, col, pn):
+        """ Mark square as completed without reference to a part
+        :row: row number, starting at 1
+        :col: col number, starting at 1
+        :pn: player's playing number 1,2,...
+        """
+        self.squares[row-1, col-1] = pn
+
+
+    def get_adjacent_squares(self, nr, nc, hv):
+        """ Get squares bordering an edge
+        :nr: row number, starting at 1
+        :nc: col number, starting at 1
+        :hv: horizontal==0, vertical==1
+        :returns: list of (row, col) squares, starting at 1
+        """
+        return list(self.tables.edge_sq_rcs[self.edge_index(nr, nc, hv)])
+
+
+    def get_square_open(self, nr, nc):
+        """ Get number of open (not yet drawn) sides of square
+        :nr: square row number, starting at 1
+        :nc: square col number, starting at 1
+        :returns: number of open sides 0-4
+        """
+        return 4 - self.square_filled[(nr-1)*self.ncols + nc-1]
+
+
+    def get_completed_squares(self, nr, nc, hv, ifadd=False):
+        """ Get squares completed by this edge
+        Shadow counterpart of SelectArea.is_square_complete
+        :nr: row number, starting at 1
+        :nc: col number, starting at 1
+        :hv: horizontal==0, vertical==1
+        :ifadd: True - edge is treated as if it were drawn
+                default: edge must already be drawn
+        :returns: list of completed (row, col) squares, empty if none
+        """
+        index = self.edge_index(nr, nc, hv)
+        min_filled = 3 if ifadd and self.open_pos[index] >= 0 else 4
+        square_filled = self.square_filled
+        square_rcs = self.tables.square_rcs
+        return [square_rcs[sq] for sq in self.edge_sq_list[index]
+                if square_filled[sq] >= min_filled]
+
+
+    def square_complete_distance(self, nr, nc, hv):
+        """ Determine minimum number of moves, including this
+        move, to complete a square
+        Shadow counterpart of SelectArea.square_complete_distance
+        :nr: row number, starting at 1
+        :nc: col number, starting at 1
+        :hv: horizontal==0, vertical==1
+        :returns: closest distance, NOT_CLOSE if no squares
+        """
+        NOT_CLOSE = 99
+        min_dist = NOT_CLOSE
+        square_filled = self.square_filled
+        for sq in self.edge_sq_list[self.edge_index(nr, nc, hv)]:
+            dist = 4 - square_filled[sq]
+            if dist < min_dist:
+                min_dist = dist
+        return min_dist
+
         
     def turn_off(self, part=None):
         """ Shadow part turn on operation to facilitate speed when display is not required
@@ -383,16 +689,28 @@ class DotsShadow:
         col = part.col
         sub_type = part.sub_type()
         if part.is_edge():
-            if sub_type == 'h':
-                if self.lines[row-1, col-1, 0] > 0:
-                    self.nopen_line += 1
-                self.lines[row-1, col-1, 0] = 0
-            else:
-                self.lines[row-1, col-1, 1] = 0
-                if self.lines[row-1, col-1, 1] > 0:
-                    self.nopen_line += 1
+            hv = MVP.HV_H if sub_type == 'h' else MVP.HV_V
+            self.turn_off_edge(row, col, hv)
         elif part.is_region():
             self.squares[row-1, col-1] = 0
         else:
             raise SelectError("turn_off Can't shadow part type {} at row={:d} col={;d}"
                               .format(part, row, col))
+
+
+    def turn_off_edge(self, row, col, hv):
+        """ Turn off edge without reference to a part
+        :row: row number, starting at 1
+        :col: col number, starting at 1
+        :hv: horizontal==0, vertical==1
+        """
+        self.lines[row-1, col-1, hv] = 0
+        index = self.edge_index(row, col, hv)
+        if self.open_pos[index] < 0:
+            for sq in self.edge_sq_list[index]:
+                self.square_filled[sq] -= 1
+            self.open_edge_add(index)
+            if self.chains is not None:
+                self.chains.edge_changed(index)
+        if self.bitboard is not None:
+            self.bitboard.turn_off(self.bitboard.edge_index(row, col, hv))
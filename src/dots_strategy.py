@@ -0,0 +1,104 @@
+# dots_strategy.py
+"""
+Positive (trying to win) player levels, shared by SelectPlay and
+DotsEngine so both play the same strategy at each level:
+
+    LEVEL_SQUARE            complete a square
+    LEVEL_NO_GIVE_SQUARE    make a safe move (giving no square)
+    LEVEL_CHAIN             chain analysis - double dealing, long chain parity
+    LEVEL_SEARCH            alpha-beta search (two players)
+    LEVEL_MCTS              Monte Carlo tree search
+
+Levels LEVEL_CHAIN and above choose their move here, on the DotsShadow;
+with two players, levels LEVEL_SEARCH and above first look the position
+up in the board size's solved position table (dots_book).
+The lower levels work on each caller's own move lists, keeping the
+random choices of the two callers in step, and are left to them.
+"""
+from select_trace import SlTrace
+from dots_search import DotsSearch
+from dots_mcts import DotsMCTS
+from dots_book import get_book
+
+
+class DotsStrategy:
+    """ Move choice for the higher player levels
+    """
+    LEVEL_SQUARE = 1                # Complete a square
+    LEVEL_NO_GIVE_SQUARE = 2        # Provide possible square to next play
+    LEVEL_CHAIN = 3                 # Chain analysis - double dealing, long chain parity
+    LEVEL_SEARCH = 4                # Alpha-beta search (two players)
+    LEVEL_MCTS = 5                  # Monte Carlo tree search
+
+    SEARCH_TIME = 1.0               # Default search time limit per move, in seconds
+    MCTS_TIME = 1.0                 # Default MCTS time limit per move, in seconds
+
+    def __init__(self, search_time=SEARCH_TIME, mcts_playouts=None,
+                 mcts_time=MCTS_TIME, use_book=True, book_dir=None):
+        """ Setup strategy
+        :search_time: search player (LEVEL_SEARCH) time limit per move, in seconds
+                        default: SEARCH_TIME
+        :mcts_playouts: MCTS player (LEVEL_MCTS) playouts per move
+                        default: no limit
+        :mcts_time: MCTS player (LEVEL_MCTS) time limit per move, in seconds
+                        default: MCTS_TIME
+        :use_book: search / MCTS players, of two players, play positions
+                found in the board size's solved position table (dots_book)
+                        default: True
+        :book_dir: solved position table directory default: dots_book.BOOK_DIR
+        """
+        self.search_time = search_time
+        self.dots_search = None         # Search player, setup when needed
+        self.dots_mcts = DotsMCTS(playouts=mcts_playouts, time_limit=mcts_time)
+        self.use_book = use_book
+        self.book_dir = book_dir
+
+
+    def load_book(self, nrows, ncols):
+        """ Load solved position table, if in use and one exists,
+        e.g. at startup rather than on the first move
+        :nrows: number of rows of squares
+        :ncols: number of columns of squares
+        """
+        if self.use_book:
+            get_book(nrows, ncols, book_dir=self.book_dir)
+
+
+    def get_move(self, shadow, level, player_num=1, nplayer=2):
+        """ Choose move for player level
+        :shadow: DotsShadow, current position
+        :level: player level
+        :player_num: playing number of player to move
+        :nplayer: number of players
+        :returns: edge index, None if level is below LEVEL_CHAIN
+        """
+        if level >= self.LEVEL_SEARCH and nplayer == 2 and self.use_book:
+            book = get_book(shadow.nrows, shadow.ncols, book_dir=self.book_dir)
+            index = None if book is None else book.get_move(shadow)
+            if index is not None:
+                SlTrace.lg(f"book move edge {index}", "play_strategy")
+                return index
+
+        if level >= self.LEVEL_MCTS:
+            index = self.dots_mcts.get_move(shadow, player_num=player_num,
+                                            nplayer=nplayer)
+            SlTrace.lg(f"mcts move edge {index}", "play_strategy")
+            return index
+
+        if level >= self.LEVEL_SEARCH and nplayer == 2:
+            if (self.dots_search is None
+                    or self.dots_search.nrows != shadow.nrows
+                    or self.dots_search.ncols != shadow.ncols):
+                self.dots_search = DotsSearch(shadow.nrows, shadow.ncols,
+                                              time_limit=self.search_time)
+            index = self.dots_search.get_move(shadow)
+            SlTrace.lg(f"search move edge {index}", "play_strategy")
+            return index
+
+        if level >= self.LEVEL_CHAIN:
+            index = shadow.get_chains().get_chain_move(player_num=player_num,
+                                                      nplayer=nplayer)
+            SlTrace.lg(f"chain move edge {index}", "play_strategy")
+            return index
+
+        return None
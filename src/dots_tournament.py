@@ -0,0 +1,454 @@
+# dots_tournament.py
+"""
+Headless self-play tournament - a matrix of player configurations
+by board sizes, played with DotsEngine over a process pool
+
+The run is split into tasks of up to batch games, each task being
+one player configuration on one board size.  Each task:
+    seeds random with its own seed (run seed + task number), so the
+    games do not depend on which worker plays them or in what order
+    writes its games to its own .gmres file via DotsGameFile,
+    file prefix "<run>_t<task number>", in the run's directory
+    returns per player win/loss/tie counts to the main process
+
+Resume
+    Each finished task is appended, with its counts, to the run's
+    progress file (<run>.progress) in the results directory.
+    Rerunning with the same run name and settings plays only the
+    tasks not listed; partial .gmres files of unlisted tasks
+    (e.g. from an interrupted run) are removed first.
+
+Player configuration string
+    configurations separated by ";", players in playing order
+    separated by ",", each player: [name=]level[:steven]
+    e.g. "2,2;3,2;2,3:0.1"
+Board sizes
+    separated by ",", each size: n (n by n) or <rows>x<cols>
+    e.g. "3,5,3x4"
+"""
+import json
+import multiprocessing
+import os
+import random
+import re
+import time
+
+from select_trace import SlTrace
+from select_error import SelectError
+from dots_engine import DotsEngine, DotsEnginePlayer
+from dots_strategy import DotsStrategy
+from dots_game_file import DotsGameFile
+
+NSTAT = 6                       # Per player counts: nwin, nloss, ntie,
+                                # nwin_square, nloss_square, ntie_square
+
+def parse_players(config_str):
+    """ Parse player configuration string
+    :config_str: configuration string - see module description
+    :returns: list of configurations, each a list of (name, level, steven)
+    """
+    configs = []
+    for cfg_str in config_str.split(";"):
+        cfg_str = cfg_str.strip()
+        if cfg_str == "":
+            continue
+        config = []
+        for pl_str in cfg_str.split(","):
+            name = None
+            steven = 0.0
+            pl_str = pl_str.strip()
+            if "=" in pl_str:
+                name, pl_str = pl_str.split("=", 1)
+            if ":" in pl_str:
+                pl_str, steven_str = pl_str.split(":", 1)
+                steven = float(steven_str)
+            try:
+                level = int(pl_str)
+            except ValueError:
+                raise SelectError(f"Bad player level in {cfg_str}")
+            config.append((name, level, steven))
+        configs.append(config)
+    if len(configs) == 0:
+        raise SelectError(f"No player configurations in {config_str}")
+    return configs
+
+
+def parse_sizes(sizes_str):
+    """ Parse board sizes string
+    :sizes_str: sizes string - see module description
+    :returns: list of (nrow, ncol)
+    """
+    sizes = []
+    for size_str in sizes_str.split(","):
+        size_str = size_str.strip().lower()
+        if size_str == "":
+            continue
+        match = re.match(r"^(\d+)(x(\d+))?$", size_str)
+        if not match:
+            raise SelectError(f"Bad board size {size_str}")
+        nrow = int(match.group(1))
+        ncol = nrow if match.group(3) is None else int(match.group(3))
+        sizes.append((nrow, ncol))
+    if len(sizes) == 0:
+        raise SelectError(f"No board sizes in {sizes_str}")
+    return sizes
+
+
+def game_stats(results, nplayer):
+    """ Win/loss/tie counts, by player, for one game
+    A player wins with more squares than any other player,
+    ties with the most squares shared with another player,
+    otherwise loses
+    :results: game results tuples (player, nsquare)
+    :nplayer: number of players
+    :returns: list, by player, of NSTAT counts
+    """
+    squares = nplayer*[0]
+    for pn, nsquare in results:
+        squares[pn-1] = nsquare
+    top = max(squares)
+    ntop = squares.count(top)
+    stats = []
+    for nsquare in squares:
+        stat = NSTAT*[0]
+        if nsquare < top:
+            stat[1] += 1
+            stat[4] += nsquare
+        elif ntop > 1:
+            stat[2] += 1
+            stat[5] += nsquare
+        else:
+            stat[0] += 1
+            stat[3] += nsquare
+        stats.append(stat)
+    return stats
+
+
+def add_stats(stats, stats2):
+    """ Add counts stats2 into stats
+    :stats: list, by player, of counts - updated
+    :stats2: list, by player, of counts to add
+    """
+    for stat, stat2 in zip(stats, stats2):
+        for i in range(NSTAT):
+            stat[i] += stat2[i]
+
+
+def run_task(task):
+    """ Play one task's games - called in worker process
+    :task: dictionary of task settings - see DotsTournament.get_tasks
+    :returns: (task number, number of games, stats, seconds)
+    """
+    time_beg = time.time()
+    random.seed(task["seed"])
+    players = [DotsEnginePlayer(name=name, level=level, steven=steven)
+               for name, level, steven in task["players"]]
+    rF = None
+    if task["file_dir"] is not None:
+        rF = DotsGameFile(file_dir=task["file_dir"], file_prefix=task["file_prefix"],
+                          history="dots_tournament", pgm_info=task["pgm_info"])
+    engine = DotsEngine(nrows=task["nrow"], ncols=task["ncol"], players=players,
+                        results_file=rF, **task["engine_kw"])
+    stats = [NSTAT*[0] for _ in players]
+    for _ in range(task["ngame"]):
+        game = engine.play_game()
+        add_stats(stats, game_stats(game.results, len(players)))
+    if rF is not None:
+        rF.end_file()
+    return task["task_no"], task["ngame"], stats, time.time() - time_beg
+
+
+class DotsTournament:
+    """ Player configurations by board sizes, played over a process pool
+    """
+    def __init__(self, configs=None, sizes=None, numgame=100, batch=50,
+                 nworker=None, seed=1, run_name="tournament",
+                 results_dir=None, results_files=True, resume=True,
+                 engine_kw=None):
+        """ Setup tournament
+        :configs: list of player configurations, each a list, in playing
+                order, of (name, level, steven), name None for default
+                default: [[(None,2,0.), (None,2,0.)]]
+        :sizes: list of board sizes (nrow, ncol) default: [(5,5)]
+        :numgame: number of games per configuration per board size
+                default: 100
+        :batch: maximum number of games per task default: 50
+        :nworker: number of worker processes default: number of cpus
+        :seed: run seed, task seed is seed + task number default: 1
+        :run_name: run name, prefix of results and progress files
+                default: "tournament"
+        :results_dir: results directory default: ..\gmres
+        :results_files: True - write .gmres files default: True
+        :resume: True - skip tasks finished by an earlier run
+                with the same name default: True
+        :engine_kw: additional DotsEngine arguments
+                e.g. search_time, mcts_playouts default: none
+        """
+        if configs is None:
+            configs = [[(None,2,0.), (None,2,0.)]]
+        if sizes is None:
+            sizes = [(5,5)]
+        if nworker is None:
+            nworker = os.cpu_count()
+        if results_dir is None:
+            results_dir = r"..\gmres"
+        if engine_kw is None:
+            engine_kw = {}
+        self.configs = configs
+        self.sizes = sizes
+        self.numgame = numgame
+        self.batch = batch
+        self.nworker = nworker
+        self.seed = seed
+        self.run_name = run_name
+        self.results_dir = results_dir
+        self.results_files = results_files
+        self.resume = resume
+        self.engine_kw = engine_kw
+        self.progress_path = os.path.join(results_dir, run_name + ".progress")
+        self.stats = {}             # Counts by (config index, nrow, ncol)
+        self.ngames = {}            # Games by (config index, nrow, ncol)
+        self.ngame_played = 0       # Games played in this run
+
+
+    def get_settings(self):
+        """ Run settings which must match for resume
+        """
+        return dict(configs=[[list(pl) for pl in config] for config in self.configs],
+                    sizes=[list(size) for size in self.sizes],
+                    numgame=self.numgame, batch=self.batch, seed=self.seed,
+                    engine_kw=self.engine_kw)
+
+
+    def get_tasks(self):
+        """ Task list, in task number order
+        :returns: list of task settings dictionaries
+        """
+        tasks = []
+        file_dir = self.results_dir if self.results_files else None
+        for ci, config in enumerate(self.configs):
+            for nrow, ncol in self.sizes:
+                ngame_left = self.numgame
+                while ngame_left > 0:
+                    ngame = min(ngame_left, self.batch)
+                    ngame_left -= ngame
+                    task_no = len(tasks)
+                    tasks.append(dict(task_no=task_no, config_index=ci,
+                                      players=config, nrow=nrow, ncol=ncol,
+                                      ngame=ngame, seed=self.seed+task_no,
+                                      file_dir=file_dir,
+                                      file_prefix=self.task_file_prefix(task_no),
+                                      pgm_info=f"run={self.run_name} task={task_no}",
+                                      engine_kw=self.engine_kw))
+        return tasks
+
+
+    def task_file_prefix(self, task_no):
+        """ Results file prefix for task
+        :task_no: task number
+        """
+        return f"{self.run_name}_t{task_no:05d}_"
+
+
+    def load_progress(self):
+        """ Load finished tasks from progress file
+        :returns: set of finished task numbers
+        """
+        done = set()
+        if not os.path.exists(self.progress_path):
+            return done
+
+        with open(self.progress_path) as fin:
+            for line_no, line in enumerate(fin, start=1):
+                line = line.strip()
+                if line == "":
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    SlTrace.lg(f"{self.progress_path}:{line_no} unreadable - ignored")
+                    continue
+                if "settings" in entry:
+                    if entry["settings"] != self.get_settings():
+                        raise SelectError(f"Run {self.run_name} settings differ"
+                                          f" from {self.progress_path}")
+                    continue
+                done.add(entry["task_no"])
+                self.add_task_stats(entry["key"], entry["ngame"], entry["stats"])
+        return done
+
+
+    def remove_partial_files(self, tasks):
+        """ Remove results files of unfinished tasks
+        :tasks: unfinished tasks
+        """
+        if not self.results_files or not os.path.isdir(self.results_dir):
+            return
+
+        prefixes = tuple(task["file_prefix"] for task in tasks)
+        for file in os.listdir(self.results_dir):
+            if file.startswith(prefixes):
+                SlTrace.lg(f"Removing partial results file {file}")
+                os.remove(os.path.join(self.results_dir, file))
+
+
+    def add_task_stats(self, key, ngame, stats):
+        """ Add task counts to totals
+        :key: (config index, nrow, ncol)
+        :ngame: number of games
+        :stats: per player counts
+        """
+        key = tuple(key)
+        if key not in self.stats:
+            self.stats[key] = [NSTAT*[0] for _ in stats]
+            self.ngames[key] = 0
+        add_stats(self.stats[key], stats)
+        self.ngames[key] += ngame
+
+
+    def run(self):
+        """ Play tournament, resuming if requested
+        :returns: number of games played in this run
+        """
+        progress_dir = os.path.dirname(self.progress_path)
+        if progress_dir != "":
+            os.makedirs(progress_dir, exist_ok=True)    # Progress is kept even without results files
+        tasks = self.get_tasks()
+        done = set()
+        if self.resume:
+            done = self.load_progress()
+        elif os.path.exists(self.progress_path):
+            os.remove(self.progress_path)
+        todo = [task for task in tasks if task["task_no"] not in done]
+        SlTrace.lg(f"Tournament {self.run_name}: {len(tasks)} tasks,"
+                   f" {len(done)} done, {len(todo)} to play"
+                   f" with {self.nworker} workers")
+        self.remove_partial_files(todo)
+        with open(self.progress_path, "a") as fout:
+            if len(done) == 0:
+                print(json.dumps(dict(settings=self.get_settings())), file=fout)
+                fout.flush()
+            if len(todo) > 0:
+                self.run_tasks(todo, fout)
+        return self.ngame_played
+
+
+    def run_tasks(self, tasks, fout):
+        """ Play tasks over process pool, recording each as finished
+        :tasks: tasks to play
+        :fout: progress file
+        """
+        tasks_by_no = {task["task_no"] : task for task in tasks}
+        time_beg = time.time()
+        chunksize = max(1, len(tasks)//(8*self.nworker))
+        with multiprocessing.Pool(self.nworker) as pool:
+            for task_no, ngame, stats, task_time in pool.imap_unordered(
+                                            run_task, tasks, chunksize):
+                task = tasks_by_no[task_no]
+                key = (task["config_index"], task["nrow"], task["ncol"])
+                self.add_task_stats(key, ngame, stats)
+                print(json.dumps(dict(task_no=task_no, key=key, ngame=ngame,
+                                      stats=stats, time=round(task_time, 3))),
+                      file=fout)
+                fout.flush()
+                self.ngame_played += ngame
+                SlTrace.lg(f"task {task_no} {task['nrow']}x{task['ncol']}"
+                           f" config {task['config_index']+1}: {ngame} games"
+                           f" {task_time:.2f} sec", "tournament")
+        time_tot = time.time() - time_beg
+        SlTrace.lg(f"{self.ngame_played} games in {time_tot:.2f} sec"
+                   f" ({self.ngame_played/time_tot if time_tot > 0 else 0:.1f} games/sec)")
+
+
+    def config_desc(self, ci):
+        """ Short description of configuration
+        :ci: configuration index
+        """
+        descs = []
+        for name, level, steven in self.configs[ci]:
+            desc = str(level)
+            if steven != 0:
+                desc += f":{steven:g}"
+            if name is not None:
+                desc = name + "=" + desc
+            descs.append(desc)
+        return ",".join(descs)
+
+
+    def list_stats(self):
+        """ List win/loss/tie tables, as done by crs_dots_load
+        """
+        SlTrace.lg(" Tournament Statistics by player configuration, rows, cols")
+        fmt_str = 3 * "{:4s}({:4s}) [({:4s})]  "
+        stat_str = fmt_str.format(" win","%","%sqs",  "loss","%","%sqs",  "tie","%","%sqs")
+        SlTrace.lg("%-12s %4s %4s %5s  %2s  %s" % ("players", "rows", "cols", "games",
+                                                    "pl", stat_str))
+        for key in sorted(self.stats):
+            ci, nrow, ncol = key
+            ngame = self.ngames[key]
+            gm_sq = nrow*ncol
+            for pl, pl_stat in enumerate(self.stats[key], start=1):
+                nwin, nloss, ntie, nwin_sq, nloss_sq, ntie_sq = pl_stat
+                pcts = []
+                for count, nsquare in ((nwin, nwin_sq), (nloss, nloss_sq), (ntie, ntie_sq)):
+                    pct = 0. if ngame == 0 else 100.*count/ngame
+                    pct_sq = 0. if count == 0 else 100.*nsquare/(count*gm_sq)
+                    pcts.extend((count, pct, pct_sq))
+                fmt_str = 3 * " {:4d}({:4.1f}) [({:4.1f})]"
+                stat_str = fmt_str.format(*pcts)
+                SlTrace.lg("%-12s %4d %4d %5d  %2d %s" % (self.config_desc(ci), nrow, ncol,
+                                                         ngame, pl, stat_str))
+            SlTrace.lg(70*"-")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    players = "2,2"
+    sizes = "5"
+    numgame = 100
+    batch = 50
+    nworker = None
+    seed = 1
+    run_name = "tournament"
+    results_dir = None
+    results_files = True
+    no_resume = False
+    trace = ""
+    search_time = DotsStrategy.SEARCH_TIME
+    mcts_playouts = None
+    mcts_time = DotsStrategy.MCTS_TIME
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--players=', dest='players', default=players)
+    parser.add_argument('--sizes=', dest='sizes', default=sizes)
+    parser.add_argument('--numgame=', type=int, dest='numgame', default=numgame)
+    parser.add_argument('--batch=', type=int, dest='batch', default=batch)
+    parser.add_argument('--nworker=', type=int, dest='nworker', default=nworker)
+    parser.add_argument('--seed=', type=int, dest='seed', default=seed)
+    parser.add_argument('--run=', dest='run_name', default=run_name)
+    parser.add_argument('--results_dir', dest='results_dir', default=results_dir)
+    parser.add_argument('--no_results_files', action='store_false', dest='results_files',
+                        default=results_files)
+    parser.add_argument('--no_resume', action='store_true', dest='no_resume',
+                        default=no_resume)
+    parser.add_argument('--trace', dest='trace', default=trace)
+    parser.add_argument('--search_time=', type=float, dest='search_time', default=search_time)
+    parser.add_argument('--mcts_playouts=', type=int, dest='mcts_playouts', default=mcts_playouts)
+    parser.add_argument('--mcts_time=', type=float, dest='mcts_time', default=mcts_time)
+    args = parser.parse_args()             # or die "Illegal options"
+    SlTrace.lg("args: %s\n" % args)
+    if args.trace:
+        SlTrace.setFlags(args.trace)
+    tournament = DotsTournament(configs=parse_players(args.players),
+                                sizes=parse_sizes(args.sizes),
+                                numgame=args.numgame, batch=args.batch,
+                                nworker=args.nworker, seed=args.seed,
+                                run_name=args.run_name,
+                                results_dir=args.results_dir,
+                                results_files=args.results_files,
+                                resume=not args.no_resume,
+                                engine_kw=dict(search_time=args.search_time,
+                                               mcts_playouts=args.mcts_playouts,
+                                               mcts_time=args.mcts_time))
+    tournament.run()
+    tournament.list_stats()
@@ -1,13 +1,21 @@
 # move_list.py
 """
 Support for MoveList an iterable list of move specfications (row,col,hv)
+
+Moves are held as edge indexes, in a numpy int array sized, up front,
+for every edge of the board:
+    edge index = ((row-1)*(ncols+1) + (col-1))*2 + hv
+the index, of dots_edges, used by DotsShadow and DotsBitBoard.
+Lists may be sliced, filtered by a boolean mask and randomly sampled
+as arrays, without Python loops.  Iteration gives (row, col, hv)
+tuples, taken from a per board size table, so no objects are made
+per move.
 """
 import random
 import numpy as np
 
 from select_error import SelectError
-from select_edge import SelectEdge
-from select_region import SelectRegion
+from dots_edges import get_edge_tables
 
 """
 Dots Square / Edge numbering
@@ -16,13 +24,13 @@ Edges, bordering a square are numbered as follows:
 
     Lve_row = sq_row          (Left vertical edge)
     Lve_col = sq_col
-    
+
     Rve_row = sq_row          (Right vertical edge)
     Rve_col = sq_col + 1
-     
+
     The_row = sq_row          (Top horizontal edge)
     The_col = sq_col
-    
+
     Bhe_row = sq_row + 1      (Botom horizontal edge)
     Bhe_col = sq_col
 
@@ -37,67 +45,93 @@ class MVP:
         self.col = col
         self.hv = hv
 
-class MoveListIterator:
-    ''' Iterator class '''
-    def __init__(self, move_list):
-        # Team object reference
-        self._move_list = move_list
-        # member variable to keep track of current index
-        self._index = 0
-        
-    def __next__(self):
-        """Returns the next MVP entry from MoveList """
-        if self._index < self._move_list.nmove:
-            result = self._move_list.get_mvp(self._index)
-            self._index +=1
-            return result
-        # End of Iteration
-        raise StopIteration
- 
- 
-
-    
-    
+
 class MoveList:
     """ List of moves (edge specifications) which can be efficiently manipulated
     """
-    def __init__(self, shadow, max_move=None, moves=None):
+    def __init__(self, shadow, max_move=None, moves=None, indexes=None):
         """ Setup list
-        :shadow:  Playing shadow data control
+        :shadow:  Playing shadow data control e.g. DotsShadow, DotsBitBoard
             shadow must support:
-                    obj = self.shadow.lines_obj[irt]
+                    shadow.nrows, shadow.ncols
                     move = self.shadow.get_edge(row, col, hv)
 
         :max_move: Maximum number of moves
-        :moves: if present, initialize list
+                default: number of board edge indexes
+        :moves: if present, initialize list with moves: MVP, (row, col, hv)
+                or edge part
+        :indexes: if present, initialize list with this array of edge
+                indexes, used in place, not copied
         """
         self.shadow = shadow
+        self.ncols = shadow.ncols
+        self.rchs = get_edge_tables(shadow.nrows, shadow.ncols).edge_rchs
+        if indexes is not None:
+            self.indexes = indexes
+            self.nmove = len(indexes)
+            self.nmove_max = self.nmove
+            return
+
         if max_move is None:
-            if moves is not None:
-                max_move = len(moves)
-            else:
-                max_move = 10
-        self.moves = np.zeros([max_move, 3], dtype=int)     #  [row, col, hv(0-horizontal, 1-vertical]
+            max_move = len(self.rchs)
+        self.indexes = np.zeros(max_move, dtype=int)     # Edge index of each move
         self.nmove = 0                          # Empty
         self.nmove_max = max_move
         if moves is not None:
             for move in moves:
                 self.add_move(move)
- 
+
+
+    def new_list(self, indexes):
+        """ MoveList, on our shadow, of edge indexes
+        :indexes: array of edge indexes, used in place
+        """
+        return MoveList(self.shadow, indexes=indexes)
+
+
+    def __len__(self):
+        return self.nmove
+
+
     def __iter__(self):
-        """ Returns the Iterator object MoveListIterator
+        """ Iterate over moves as (row, col, hv) tuples
         """
-        return MoveListIterator(self)
+        rchs = self.rchs
+        for index in self.indexes[:self.nmove].tolist():
+            yield rchs[index]
+
+
+    def __getitem__(self, key):
+        """ Get move (row, col, hv) at index or MoveList of slice
+        :key: move index in list or slice
+        """
+        if isinstance(key, slice):
+            return self.new_list(self.get_indexes()[key])
+
+        if key < 0:
+            key += self.nmove
+        if key < 0 or key >= self.nmove:
+            raise IndexError("MoveList index %d out of range" % key)
+        return self.rchs[self.indexes[key]]
+
+
+    def edge_index(self, row, col, hv):
+        """ Edge index
+        :row: row number, starting at 1
+        :col: col number, starting at 1
+        :hv: horizontal==0, vertical==1
+        """
+        return ((row-1)*(self.ncols+1) + (col-1))*2 + hv
+
 
     def get_mvp(self, mindex):
         """ Retrieve move at index (zero starting)
         :mindex: move index in list
         """
-        mv = self.moves[mindex]
-        row, col, hv = mv
-        mvp = MVP(row=row, col=col, hv = hv)
-        return mvp
-    
+        row, col, hv = self[mindex]
+        return MVP(row=row, col=col, hv=hv)
+
+
     def move2mvp(self, move):
         """ Generate MVP from move
         :move: move part
@@ -109,22 +143,28 @@ class MoveList:
 
 
     def add_move(self, move_mvp=None):
-        """ Add move Move/MVP to move list
-        Currently no check or handling for overflow
-        :move: move (tuple) to add
+        """ Add move to move list
+        :move_mvp: move to add: MVP, (row, col, hv) or edge part
         """
         if isinstance(move_mvp, MVP):
-            mvp = move_mvp
+            index = self.edge_index(move_mvp.row, move_mvp.col, move_mvp.hv)
+        elif isinstance(move_mvp, tuple):
+            index = self.edge_index(*move_mvp)
         else:
-            hv = MVP.HV_H if move_mvp.is_horizontal() else MVP_HV_V
-            mvp = MVP(row=move_mvp.row, col = move_mvp.row, hv = hv)
+            hv = MVP.HV_H if move_mvp.is_horizontal() else MVP.HV_V
+            index = self.edge_index(move_mvp.row, move_mvp.col, hv)
+        self.add_index(index)
+
+
+    def add_index(self, index):
+        """ Add move, by edge index
+        :index: edge index
+        """
         if self.nmove >= self.nmove_max:
             self.expand_moves()
-        self.moves[self.nmove, 0] = mvp.row
-        self.moves[self.nmove, 1] = mvp.col
-        self.moves[self.nmove, 2] = mvp.hv
+        self.indexes[self.nmove] = index
         self.nmove += 1
-        
+
 
     def expand_moves(self, new_max=None):
         """ Expand list
@@ -135,75 +175,88 @@ class MoveList:
             new_max = 2*self.nmove
             if new_max < 20:
                 new_max = 20
-        new_moves = np.zeros([new_max, 3], dtype=int)       # Create zeroed enlarged array
-        new_moves[0:self.nmove, 0:3] = self.moves          # Copy existing array to beginning
-        self.moves = new_moves                              # Place new array in place
+        new_indexes = np.zeros(new_max, dtype=int)     # Create zeroed enlarged array
+        new_indexes[:self.nmove] = self.indexes[:self.nmove]
+        self.indexes = new_indexes
         self.nmove_max = new_max
-        
+
+
+    def set_indexes(self, indexes):
+        """ Set list contents from array
+        :indexes: array of edge indexes - used in place, not copied
+        """
+        self.indexes = indexes
+        self.nmove = len(indexes)
+        self.nmove_max = self.nmove
+
+
+    def get_indexes(self):
+        """ Edge indexes of moves
+        :returns: array view of list's edge indexes
+        """
+        return self.indexes[:self.nmove]
+
+
+    def filter(self, mask):
+        """ Moves selected by mask
+        :mask: boolean array, by move in list
+        :returns: MoveList of selected moves
+        """
+        return self.new_list(self.get_indexes()[mask])
+
+
     def number(self):
         """ Get number in list
         :returns: number in list
         """
         return self.nmove
-    
-    
+
+
     def rand_move(self):
         """ Get random list entry
         """
         ir = random.randint(0,self.nmove-1)
         mvp = self.get_mvp(ir)
         return mvp
-    
-    
+
+
     def rand_obj(self):
         """ Get random list entry object e.g. edge
         """
-        mvp = self.rand_move()
-        row, col, hv = mvp.row, mvp.col, mvp.hv
-        obj = self.shadow.lines_obj[row-1, col-1, hv]
-        return obj
+        ir = random.randint(0,self.nmove-1)
+        row, col, hv = self[ir]
+        return self.shadow.get_edge(row, col, hv)
 
 
-    def get_entry_array(self):
-        """ Provide access to entry array
+    def rand_moves(self, nchoice, replace=False, rng=None):
+        """ Get random selection of moves
+        :nchoice: number of moves chosen
+        :replace: True - a move may be chosen more than once
+                    default: no repeats
+        :rng: numpy random Generator default: numpy global random state
+        :returns: MoveList of chosen moves
         """
-        return self.moves
+        if rng is None:
+            rng = np.random
+        return self.new_list(rng.choice(self.get_indexes(), nchoice, replace=replace))
 
 
-    def get_moves(self):
-        """ Provide python list of moves(part)
+    def get_entry_array(self):
+        """ Provide moves as array
+        :returns: array [nmove, 3] of row, col, hv
         """
-        moves = []
-        for i in range(self.nmove):
-            row = self.moves[i,0]
-            col = self.moves[i,1]
-            hv = self.moves[i,2]
-            move = self.shadow.get_edge(row, col, hv)
-            moves.append(move)
-        return moves
+        indexes = self.get_indexes()
+        rc, hv = np.divmod(indexes, 2)
+        ir, ic = np.divmod(rc, self.ncols+1)
+        return np.column_stack((ir+1, ic+1, hv))
 
 
-    def get_mvps(self):
-        """ Provide MoveList of moves(part)
+    def get_moves(self):
+        """ Provide python list of moves(part)
         """
-        mvps = MoveList(self, max_move=self.nmove)
-        for i in range(self.nmove):
-            mvp = self.get_mvp(i)
-            mvps.add_move(mvp)
-        return mvps
-
+        get_edge = self.shadow.get_edge
+        return [get_edge(row, col, hv) for row, col, hv in self]
 
-    def get_moves(self):
-        """ Provide MoveList of moves(part)
-        """
-        moves = []
-        mvps = self.get_mvps()
-        
-        for i in range(mvps.get_nmoves()):
-            mvp = mvps.get_mvp(i)
-            move = self.shadow.get_edge(mvp.row, mvp.col, mvp.hv)
-            moves.append(move)
-        return moves
 
     def get_nmoves(self):
         """ fast count of moves
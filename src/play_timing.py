@@ -0,0 +1,272 @@
+# play_timing.py
+"""
+Always on, low overhead, timing of the phases of play
+
+Each phase duration is added to a latency histogram, kept by
+(phase, board size, player level).  Phases timed by SelectPlay:
+    running_loop    one pass of the running loop
+    make_move       move by the current player, including auto play pause
+    auto_play       automatic player's move choice and move
+    new_edge        making the move, with undo command and scoring
+    display_update  command display update
+    score_window    score window update
+Phases nest e.g. new_edge time is part of the auto_play time.
+
+Histograms are HDR (high dynamic range) style: values, in microseconds,
+are counted in buckets whose width grows with the value, so the
+percentiles (p50, p95, p99) are kept to within about 3% of the value,
+from a microsecond to hours, in a few hundred counters, independent
+of the number of values.
+
+A snapshot, the percentiles of each histogram, may be written
+periodically to the log or to a JSON file.
+"""
+import json
+import os
+import time
+
+from select_trace import SlTrace
+
+SUB_BITS = 5                    # Bits of precision kept in each bucket
+SUB_COUNT = 1 << SUB_BITS       # Buckets per doubling of value
+
+
+class LatencyHistogram:
+    """ Counts of values in logarithmic, sub-divided, buckets
+    Values below 2*SUB_COUNT microseconds are counted exactly,
+    above that each doubling of value is divided into SUB_COUNT buckets.
+    """
+    def __init__(self):
+        self.counts = []            # Count by bucket index
+        self.count = 0
+        self.total = 0              # Total of values, in usec
+        self.min_value = None       # usec
+        self.max_value = 0
+
+
+    @staticmethod
+    def value_index(value):
+        """ Bucket index of value
+        :value: non-negative int
+        """
+        if value < 2*SUB_COUNT:
+            return value
+        shift = value.bit_length() - SUB_BITS - 1
+        return shift*SUB_COUNT + (value >> shift)
+
+
+    @staticmethod
+    def index_value(index):
+        """ Middle value of bucket
+        :index: bucket index
+        """
+        if index < 2*SUB_COUNT:
+            return index
+        shift = index//SUB_COUNT - 1
+        return ((index - shift*SUB_COUNT) << shift) + (1 << shift)//2
+
+
+    def record(self, sec):
+        """ Add value
+        :sec: value, in seconds
+        """
+        value = int(sec*1e6)
+        if value < 0:
+            value = 0
+        index = self.value_index(value)
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend([0]*(index+1-len(counts)))
+        counts[index] += 1
+        self.count += 1
+        self.total += value
+        if self.min_value is None or value < self.min_value:
+            self.min_value = value
+        if value > self.max_value:
+            self.max_value = value
+
+
+    def merge(self, other):
+        """ Add other histogram's counts to ours
+        :other: LatencyHistogram
+        """
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0]*(len(other.counts)-len(self.counts)))
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        if other.min_value is not None:
+            if self.min_value is None or other.min_value < self.min_value:
+                self.min_value = other.min_value
+        if other.max_value > self.max_value:
+            self.max_value = other.max_value
+
+
+    def percentile(self, pct):
+        """ Value at percentile
+        :pct: percentile 0-100
+        :returns: value, in seconds, 0 if no values
+        """
+        if self.count == 0:
+            return 0.
+
+        limit = self.count*pct/100.
+        nvalue = 0
+        for index, count in enumerate(self.counts):
+            nvalue += count
+            if count > 0 and nvalue >= limit:
+                value = min(max(self.index_value(index), self.min_value),
+                            self.max_value)
+                return value/1e6
+        return self.max_value/1e6
+
+
+    def mean(self):
+        """ Mean value, in seconds
+        """
+        if self.count == 0:
+            return 0.
+        return self.total/self.count/1e6
+
+
+    def to_dict(self):
+        """ Summary, times in milliseconds
+        """
+        return dict(count=self.count,
+                    mean_ms=self.mean()*1e3,
+                    min_ms=(self.min_value or 0)/1e3,
+                    p50_ms=self.percentile(50)*1e3,
+                    p95_ms=self.percentile(95)*1e3,
+                    p99_ms=self.percentile(99)*1e3,
+                    max_ms=self.max_value/1e3)
+
+
+class PlayTiming:
+    """ Latency histograms of play phases, by board size and player level
+    Usage:
+        time_beg = time.perf_counter()
+        ...
+        play_timing.add("new_edge", time.perf_counter()-time_beg, level=2)
+    """
+    def __init__(self, snapshot_interval=None, snapshot_file=None,
+                 enabled=True):
+        """ Setup timing
+        :snapshot_interval: seconds between snapshots, made by check_snapshot
+                default: no periodic snapshots
+        :snapshot_file: JSON file to which snapshots are written
+                default: snapshots are written to the log
+        :enabled: True - record timing default: True
+        """
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_file = snapshot_file
+        self.enabled = enabled
+        self.histograms = {}            # By (phase, size, level)
+        self.size = None                # Board size e.g. "5x5"
+        self.time_beg = time.time()
+        self.snapshot_time = self.time_beg
+        self.nsnapshot = 0
+
+
+    def set_board_size(self, nrows, ncols):
+        """ Set board size for following times
+        :nrows: number of rows of squares
+        :ncols: number of columns of squares
+        """
+        self.size = "%dx%d" % (nrows, ncols)
+
+
+    def add(self, phase, sec, level=None):
+        """ Add phase duration
+        :phase: phase name
+        :sec: duration, in seconds
+        :level: player level, if appropriate default: none
+        """
+        if not self.enabled:
+            return
+
+        key = (phase, self.size, level)
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms[key] = LatencyHistogram()
+        hist.record(sec)
+
+
+    def clear(self):
+        """ Clear all histograms
+        """
+        self.histograms = {}
+
+
+    def snapshot(self):
+        """ Current histogram summaries
+        :returns: JSON compatible dictionary
+        """
+        phases = []
+        for key in sorted(self.histograms, key=lambda k: tuple(str(v) for v in k)):
+            phase, size, level = key
+            entry = dict(phase=phase, size=size, level=level)
+            entry.update(self.histograms[key].to_dict())
+            phases.append(entry)
+        return dict(ts=SlTrace.getTs(), elapsed=time.time()-self.time_beg,
+                    snapshot_no=self.nsnapshot, phases=phases)
+
+
+    def log_snapshot(self, snapshot=None):
+        """ Write snapshot to log
+        :snapshot: snapshot default: current snapshot
+        """
+        if snapshot is None:
+            snapshot = self.snapshot()
+        SlTrace.lg("play timing %d at %.1f sec (msec):" % (snapshot["snapshot_no"],
+                                                          snapshot["elapsed"]))
+        SlTrace.lg("    %-15s %-7s %5s %8s %9s %9s %9s %9s %9s"
+                   % ("phase", "size", "level", "count", "mean", "p50", "p95",
+                      "p99", "max"))
+        for entry in snapshot["phases"]:
+            level = "" if entry["level"] is None else str(entry["level"])
+            SlTrace.lg("    %-15s %-7s %5s %8d %9.3f %9.3f %9.3f %9.3f %9.3f"
+                       % (entry["phase"], entry["size"], level, entry["count"],
+                          entry["mean_ms"], entry["p50_ms"], entry["p95_ms"],
+                          entry["p99_ms"], entry["max_ms"]))
+
+
+    def save_snapshot(self, snapshot=None, file_name=None):
+        """ Write snapshot to JSON file, replacing previous snapshot
+        :snapshot: snapshot default: current snapshot
+        :file_name: output file default: self.snapshot_file
+        """
+        if snapshot is None:
+            snapshot = self.snapshot()
+        if file_name is None:
+            file_name = self.snapshot_file
+        tmp_name = file_name + ".tmp"
+        with open(tmp_name, "w") as fout:
+            json.dump(snapshot, fout, indent=2)
+        os.replace(tmp_name, file_name)
+
+
+    def write_snapshot(self):
+        """ Write snapshot to the snapshot file, if one, else to the log
+        """
+        snapshot = self.snapshot()
+        self.nsnapshot += 1
+        self.snapshot_time = time.time()
+        if self.snapshot_file is not None:
+            try:
+                self.save_snapshot(snapshot)
+            except IOError as ex:
+                SlTrace.lg("play timing snapshot %s failed: %s"
+                           % (self.snapshot_file, str(ex)))
+        else:
+            self.log_snapshot(snapshot)
+
+
+    def check_snapshot(self):
+        """ Write snapshot if snapshot_interval has passed since the last
+        """
+        if (self.snapshot_interval is None or not self.enabled
+                or time.time() - self.snapshot_time < self.snapshot_interval):
+            return
+
+        self.write_snapshot()
@@ -20,8 +20,22 @@ from select_edge import SelectEdge
 from select_region import SelectRegion
 from select_mover import SelectMover, SelectMoveDisplay
 from select_stroke import SelectStroke                    
+from select_grid_index import SelectGridIndex
 from image_hash import ImageHash
 from _ast import Or
+from trace_lazy import trace_flag, lg
+
+TR_ADD_PART = trace_flag("add_part")
+TR_DISPLAY = trace_flag("display")
+TR_GET_PARTS = trace_flag("get_parts")
+TR_IN_STROKE = trace_flag("in_stroke")
+TR_IS_OVER = trace_flag("is_over")
+TR_MOTION = trace_flag("motion")
+TR_ON_MOTION = trace_flag("on_motion")
+TR_OVERLAPPING = trace_flag("overlapping")
+TR_SQUARE_COMPLETION = trace_flag("square_completion")
+
+PART_TAG_ID_RE = re.compile(r'_id:(\d+)$')     # part id in part_tag()
                      
 class SelectArea(object):
     """
@@ -83,6 +97,9 @@ class SelectArea(object):
             loc: (pt), (x,y)
                  (pt1 (upper right), pt2 (lower right)
         """
+        self.parts_by_key = {}      # By (type, sub_type, row, col) - first added
+        self.parts_by_type_rc = {}  # By (type, row, col) - first added
+        self.grid_index = None      # Spatial index for hit testing, if built
         if image_hash is None:
             image_hash = ImageHash()
         self.image_hash = image_hash
@@ -294,7 +311,7 @@ class SelectArea(object):
                 default: part must already be added
         """
         if part.is_edge():
-            SlTrace.lg("complete square testing %s" % part, "square_completion")
+            lg(TR_SQUARE_COMPLETION, "complete square testing %s", part)
             regions = part.get_adjacents()      # Look if we completed any square
             ncomp = 0
             for square in regions:
@@ -322,7 +339,12 @@ class SelectArea(object):
         :returns: closest distance, NOT_CLOSE if no squares
         """
         NOT_CLOSE = 99
-        SlTrace.lg("square distance testing %s" % edge, "square_completion")
+        lg(TR_SQUARE_COMPLETION, "square distance testing %s", edge)
+        shadow = getattr(self.board, "shadow", None)
+        if squares_distances is None and shadow is not None:
+            hv = 0 if edge.sub_type() == 'h' else 1 # Use shadow's side counts
+            return shadow.square_complete_distance(edge.row, edge.col, hv)
+        
         regions = edge.get_adjacents()      # Look if we completed any square
         distances = []  # distances as found
         sqds = []       # distance, square pairs
@@ -441,7 +463,7 @@ class SelectArea(object):
         
         if parts is None:
             parts = self.parts
-        SlTrace.lg("\ndisplay %d parts" % (len(parts)), "display")
+        lg(TR_DISPLAY, lambda: "\ndisplay %d parts" % (len(parts)))
         for part in self.display_order(parts):
             part.display()
 
@@ -501,7 +523,7 @@ class SelectArea(object):
                                 fill=SelectPart.corner_fill_highlight)
         else:
             loc = corner.loc 
-            SlTrace.lg("corner: %s" % str(loc), "display")
+            lg(TR_DISPLAY, lambda: "corner: %s" % str(loc))
             c1x,c1y,c3x,c3y = corner.get_rect()
             corner.display_tag = self.canvas.create_rectangle(
                         c1x, c1y, c3x, c3y, fill=SelectPart.corner_fill)
@@ -552,17 +574,28 @@ class SelectArea(object):
         return parts
 
 
-    def get_part(self, id=None, type=None, sub_type=None, row=None, col=None):
+    def get_part(self, id=None, type=None, sub_type=None, row=None, col=None,
+                 tag=None):
         """ Get basic part
         :id: unique part id
         :type: part type e.g., edge, region, corner default: "edge"
         :sub_type: must match if present e.g. v for vertical, h for horizontal
         :row:  part row
         :col: part column
+        :tag: part tag (part_tag()) e.g. canvas tag of part's display
         :returns: part, None if not found
         """
+        if tag is not None:
+            match = PART_TAG_ID_RE.search(tag)
+            if match is None:
+                return None
+            id = int(match.group(1))
         if id is not None:
             if id not in self.parts_by_id:
+                for part in self.parts:     # Part not added via add_part
+                    if part.part_id == id:
+                        self.parts_by_id[id] = part
+                        return part
                 SlTrace.lg(f"part id={id} not in parts_by_id")
                 return None
             
@@ -571,36 +604,109 @@ class SelectArea(object):
         
         if type is None:
             type = "edge"
-        for part in self.parts:
+        if sub_type is None:
+            part = self.parts_by_type_rc.get((type, row, col))
+        else:
+            part = self.parts_by_key.get((type, sub_type, row, col))
+        if part is not None:
+            if part.row == row and part.col == col:
+                return part
+            self.reindex_parts()        # Part row/col changed since indexed
+        
+        for part in self.parts:     # Index miss or stale: scan as without index
             if part.part_type == type and (sub_type is None or part.sub_type() == sub_type):
                 if part.row == row and part.col == col:
+                    self.index_part(part)   # Part not added via add_part
                     return part
-                
+        return None
+
+
+    def index_part(self, part):
+        """ Add part to location indexes
+        The first part added at a location is kept
+        :part: part
+        """
+        self.parts_by_key.setdefault((part.part_type, part.sub_type(),
+                                      part.row, part.col), part)
+        self.parts_by_type_rc.setdefault((part.part_type, part.row, part.col), part)
+
+
+    def reindex_parts(self):
+        """ Rebuild location indexes, e.g. after parts' row, col are changed
+        """
+        self.parts_by_key = {}
+        self.parts_by_type_rc = {}
+        for part in self.parts:
+            self.index_part(part)
+
+
+    def build_grid_index(self, cell_size=None):
+        """ Build spatial index of parts, used by hit testing
+        Build after parts are setup, as part sizes are used
+        :cell_size: grid cell size, in pixels
+                default: chosen from part sizes
+        """
+        self.grid_index = SelectGridIndex(cell_size=cell_size)
+        self.grid_index.build(self.parts)
+
+
+    def update_grid_index(self, mover):
+        """ Update spatial index for parts moved
+        :mover: SelectMover with moves made
+        """
+        if self.grid_index is None:
+            return
+        
+        parts = {}
+        for move in mover.moves:
+            part = move.part
+            parts[part.part_id] = part
+            for connected in part.connecteds:
+                parts[connected.part_id] = connected    # e.g. region sized by corners
+            for adjacent in part.adjacents:
+                parts[adjacent.part_id] = adjacent
+        self.grid_index.update_parts(parts.values())
+
+
+    def get_hit_candidates(self, x, y):
+        """ Parts which may be at canvas location
+        :returns: parts in cell at x,y if indexed, else all parts
+                in order added
+        """
+        if self.grid_index is None:
+            return self.parts
+        
+        return sorted(self.grid_index.get_candidates(x, y),
+                      key=lambda part: part.parts_index)
+        
     
     def get_parts_at(self, x, y, sz_type=SelectPart.SZ_SELECT):
         """ Check if any part is at canvas location provided
         If found list of parts
         :Returns: SelectPart[]
         """
-        parts = []
-        for part in self.parts:
-            if not isinstance(part, SelectPart):
-                SlTrace.lg("part(%s) is not SelectPart" % part)
-            if part.is_over(x,y, sz_type=sz_type):
-                parts.append(part)
+        if self.grid_index is not None and sz_type == SelectPart.SZ_SELECT:
+            parts = self.grid_index.get_parts_at(x, y)
+        else:
+            parts = []
+            for part in self.get_hit_candidates(x, y):
+                if not isinstance(part, SelectPart):
+                    SlTrace.lg("part(%s) is not SelectPart" % part)
+                if part.is_over(x,y, sz_type=sz_type):
+                    parts.append(part)
         if len(parts) > 1:
-            SlTrace.lg("get_parts at (%d, %d) sz_type=%d" % (x,y, sz_type), "get_parts")
+            lg(TR_GET_PARTS, "get_parts at (%d, %d) sz_type=%d", x, y, sz_type)
             for part in parts:
                 c1x,c1y,c3x,c3y = part.get_rect(sz_type=sz_type)
-                SlTrace.lg("    %s : c1x:%d, c1y:%d, c3x:%d, c3y:%d"
-                       % (part, c1x,c1y,c3x,c3y), "get_parts")
+                lg(TR_GET_PARTS, "    %s : c1x:%d, c1y:%d, c3x:%d, c3y:%d",
+                   part, c1x, c1y, c3x, c3y)
             SlTrace.lg("", "get_parts")
             olap_rect = SelectPart.get_olaps(parts, sz_type=SelectPart.SZ_SELECT)
             if olap_rect is not None:
                 if SlTrace.trace("overlapping"):
-                    SlTrace.lg("Overlapping %d,%d, %d,%d"
-                       % (olap_rect[0][0], olap_rect[0][1],
-                          olap_rect[1][0], olap_rect[1][1]), "overlapping")
+                    lg(TR_OVERLAPPING, "Overlapping %d,%d, %d,%d",
+                       olap_rect[0][0], olap_rect[0][1],
+                       olap_rect[1][0], olap_rect[1][1])
                     SlTrace.lg("")
         return parts
 
@@ -619,7 +725,7 @@ class SelectArea(object):
         """ Returns corner SelectPart if at corner handle
         else None
         """
-        for corner in self.parts:
+        for corner in self.get_hit_candidates(x, y):
             if not corner.is_corner():
                 continue
             p1c1x,p1c1y,p1c3x,p1c3y = corner.get_rect(sz_type=SelectPart.SZ_SELECT)
@@ -633,7 +739,7 @@ class SelectArea(object):
         """ Returns edge object if at corner handle
         else None
         """
-        for edge in self.parts:
+        for edge in self.get_hit_candidates(x, y):
             if not edge.is_edge():
                 continue
             p1c1x,p1c1y,p1c3x,p1c3y = edge.get_rect()
@@ -649,7 +755,10 @@ class SelectArea(object):
             :pt2:  end point
             :Returns: edge or None
         """
-        for part in self.parts:
+        parts = self.parts
+        if self.grid_index is not None:     # Edge contains its mid point
+            parts = self.get_hit_candidates((pt1[0]+pt2[0])/2, (pt1[1]+pt2[1])/2)
+        for part in parts:
             if not part.is_edge():
                 continue
             points = part.get_points()
@@ -667,7 +776,7 @@ class SelectArea(object):
         """ Returns region object if at region handle
         else None
         """
-        for region in self.parts:
+        for region in self.get_hit_candidates(x, y):
             if not region.is_region():
                 continue
             p1c1x,p1c1y,p1c3x,p1c3y = region.get_rect()
@@ -683,25 +792,7 @@ class SelectArea(object):
         """ return part for region at row, col
         :returns: part at row,col else None
         """
-        
-        """ Create dictionary only if we have to
-        Maybe numpy would be better but we need to store parts, not numbers
-        """
-        if not hasattr(self, "parts_by_row_col") or self.parts_by_row_col is None:
-            parts_by_row_col = {}
-            for part in self.parts:
-                if part.row != 0 and part.col != 0:
-                    key = (part.row, part.col)
-                    parts_by_row_col[key] = part
-            self.parts_by_row_col = parts_by_row_col
-        key = (row,col)
-        
-        if key not in self.parts_by_row_col:
-            return None
-        
-        part = self.parts_by_row_col[key]
-        
-        return part
+        return self.get_part(type="region", row=row, col=col)
 
     def delete_tags(self, tags, quiet = False):
         """ Delete tag or list of tags
@@ -740,7 +831,7 @@ class SelectArea(object):
         
         loc = edge.loc
         rect = loc.coord
-        SlTrace.lg("edge: %s" % str(loc), "display")
+        lg(TR_DISPLAY, lambda: "edge: %s" % str(loc))
         if self.is_highlighted(edge):
             c1x,c1y,c3x,c3y = edge.get_rect(enlarge=True)
             edge.highlight_tag = self.canvas.create_rectangle(
@@ -977,7 +1068,7 @@ class SelectArea(object):
 
     def on_motion(self, event):
         x,y = self.get_event_xy(event)
-        SlTrace.lg("on_motion: x,y=%d,%d" % (x,y), "on_motion")
+        lg(TR_ON_MOTION, "on_motion: x,y=%d,%d", x, y)
         if not self.enable_moves_:
             return                  # Low-level ignore
         
@@ -985,7 +1076,7 @@ class SelectArea(object):
         self.motion_xy = (x,y)
         if prev_xy is None:
             prev_xy = self.motion_xy
-        SlTrace.lg("on_motion enable_moves: x,y=%d,%d" % (x,y), "on_motion")
+        lg(TR_ON_MOTION, "on_motion enable_moves: x,y=%d,%d", x, y)
         if self.is_down:
             if self.has_selected():
                 parts = self.get_selected_parts(only_draggable=True)
@@ -994,21 +1085,22 @@ class SelectArea(object):
                     for part in parts:
                         xinc = x - prev_xy[0]
                         yinc = y - prev_xy[1]
-                        SlTrace.lg("motion on(%s) at xy=(%d,%d) by xinc=%d yinc=%d"
-                               % (part.part_type, x,y, xinc, yinc), "on_motion")
+                        lg(TR_ON_MOTION, "motion on(%s) at xy=(%d,%d) by xinc=%d yinc=%d",
+                           part.part_type, x, y, xinc, yinc)
                         self.move_part(part, xinc, yinc)
                         if self.highlighting:
                             self.highlight_set(part)
                     self.record_move_display()
         parts = self.get_parts_at(x,y, sz_type=SelectPart.SZ_SELECT)        # NOTE: this is reference
         if len(parts) > 0:
-            s = ""
-            part_str = "NONE" if len(parts) == 0 else str(parts[0])
-            if len(parts) != 1:
-                s = "s"
-                for part in parts[1:]:      # first is already present
-                    part_str += "\n" + " "*len(" over 2 parts: ") + str(part)
-            SlTrace.lg(f"over {len(parts)} part{s}: {part_str}", "motion")
+            if TR_MOTION.on:
+                s = ""
+                part_str = "NONE" if len(parts) == 0 else str(parts[0])
+                if len(parts) != 1:
+                    s = "s"
+                    for part in parts[1:]:      # first is already present
+                        part_str += "\n" + " "*len(" over 2 parts: ") + str(part)
+                lg(TR_MOTION, f"over {len(parts)} part{s}: {part_str}")
             ncheck = 1
             if len(parts) > ncheck:
                 if SlTrace.trace("motion_over_n"):
@@ -1020,7 +1112,7 @@ class SelectArea(object):
                 self.highlight_clear(parts=parts, others=True) # First clear all highlighted parts
             for part in parts:
                 if not part.is_region():
-                    SlTrace.lg("motion over %s" % part, "is_over")
+                    lg(TR_IS_OVER, "motion over %s", part)
                 if SlTrace.trace("part_info_over"):
                     part.display_info(tag="over:")
                 if self.highlighting:
@@ -1246,16 +1338,16 @@ class SelectArea(object):
             return
 
         if self.stroke_info.in_stroke():
-            SlTrace.lg("in_stroke x=%d y=%d" % (x,y), "in_stroke")
+            lg(TR_IN_STROKE, "in_stroke x=%d y=%d", x, y)
             if part.is_edge() and not self.stroke_info.same_part(part):
                 self.stroke_info.setup()
                 return
             
-            SlTrace.lg("same stroke x=%d y=%d" % (x,y), "in_stroke")
+            lg(TR_IN_STROKE, "same stroke x=%d y=%d", x, y)
             if self.stroke_info.is_continued(part=part, x=x, y=y):
                 self.stroke_info.new_point(x,y)
                 if self.stroke_info.is_stroke():
-                    SlTrace.lg("got stroke x=%d y=%d\n" % (x,y), "in_stroke")
+                    lg(TR_IN_STROKE, "got stroke x=%d y=%d\n", x, y)
                     if self.down_click_call is not None:
                         res = self.down_click_call(part)
                         self.stroke_info.setup()      # Reset
@@ -1367,6 +1459,7 @@ class SelectArea(object):
         ###mover.add_moves(parts=edge.connecteds)
         ###mover.add_adjusts(edge.connecteds)      # Adjust those connected to corners and so on
         mover.move_list(delta_x, delta_y)
+        self.update_grid_index(mover)
 
         
     def move_corner(self, corner, xinc,  yinc):
@@ -1388,12 +1481,14 @@ class SelectArea(object):
             ###mover.add_moves(parts=edge.connecteds)
             ###mover.add_adjusts(edge.connecteds)      # Adjust those connected to corners and so on
             mover.move_list(delta_x, 0)
+            self.update_grid_index(mover)
         if delta_y != 0:
             mover = SelectMover(self, delta_y=delta_y)
             mover.add_moves(parts=corner)
             ###mover.add_moves(parts=edge.connecteds)
             ###mover.add_adjusts(edge.connecteds)      # Adjust those connected to corners and so on
             mover.move_list(0, delta_y)
+            self.update_grid_index(mover)
 
 
     def move_region(self, region, xinc,  yinc, adjusts=None):
@@ -1430,7 +1525,7 @@ class SelectArea(object):
         if part.part_id in self.parts_by_id:
             return
         
-        SlTrace.lg("add_part: %s" % part, "add_part")
+        lg(TR_ADD_PART, "add_part: %s", part)
         """ Provide pointers to other entries
         in the parts_by_id entry to aid do/undo
         """
@@ -1444,6 +1539,9 @@ class SelectArea(object):
         self.parts.append(part)
         self.parts_by_id[part.part_id] = part
         self.parts_by_loc[loc_key] = part
+        self.index_part(part)
+        if self.grid_index is not None:
+            self.grid_index.add_part(part)
         
                             
     def up (self, event):
@@ -0,0 +1,69 @@
+# select_area_timeit.py
+""" Timing of SelectArea hit testing - mouse motion events handled per second
+Motion events at random canvas locations are given to SelectArea.on_motion,
+and hit tests made with get_parts_at, with the grid index and with the
+linear scan of all parts (grid index removed), per board size
+"""
+import argparse
+import random
+import time
+from tkinter import *
+
+from select_trace import SlTrace
+from select_dots import SelectDots
+
+sizes = "5,10,20"
+seconds = 2.0
+width = 800
+height = 800
+parser = argparse.ArgumentParser()
+parser.add_argument('--sizes=', dest='sizes', default=sizes)
+parser.add_argument('--seconds=', type=float, dest='seconds', default=seconds)
+parser.add_argument('--width=', type=int, dest='width', default=width)
+parser.add_argument('--height=', type=int, dest='height', default=height)
+args = parser.parse_args()             # or die "Illegal options"
+
+
+class MotionEvent:
+    """ Minimal <Motion> event
+    """
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+def time_calls(call, seconds):
+    """ Number of calls per second at random locations
+    :call: function(x, y)
+    :seconds: time to run
+    """
+    ncall = 0
+    time_beg = time.time()
+    while time.time() - time_beg < seconds:
+        call(random.randint(0, args.width-1), random.randint(0, args.height-1))
+        ncall += 1
+    return ncall/(time.time() - time_beg)
+
+
+mw = Tk()
+mw.withdraw()
+frame = Frame(mw, width=args.width, height=args.height)
+frame.pack()
+for size in [int(x) for x in args.sizes.split(",")]:
+    board = SelectDots(frame, mw=mw, nrows=size, ncols=size,
+                       width=args.width, height=args.height,
+                       display_game=False, highlighting=False)
+    area = board.area
+    nparts = len(area.parts)
+    random.seed(1)
+    grid_motion = time_calls(lambda x, y: area.on_motion(MotionEvent(x, y)), args.seconds)
+    grid_hits = time_calls(area.get_parts_at, args.seconds)
+    grid_index = area.grid_index
+    area.grid_index = None
+    random.seed(1)
+    scan_motion = time_calls(lambda x, y: area.on_motion(MotionEvent(x, y)), args.seconds)
+    scan_hits = time_calls(area.get_parts_at, args.seconds)
+    area.grid_index = grid_index
+    SlTrace.lg(f"{size}x{size} {nparts} parts:"
+               f" on_motion {grid_motion:.0f}/sec (scan {scan_motion:.0f}/sec)"
+               f"  get_parts_at {grid_hits:.0f}/sec (scan {scan_hits:.0f}/sec)")
@@ -12,6 +12,75 @@ Command processing, especially undo/Redo
 """
 Command manager
 """
+
+
+class SelectCommandRing:
+    """ Commands kept in a preallocated ring, the oldest dropped when full
+    Supports the list operations used on the command stack:
+    append, pop, len, indexing (negative and slices) and iteration
+    """
+    def __init__(self, maxlen):
+        """ Setup empty ring
+        :maxlen: maximum number of commands kept
+        """
+        self.maxlen = max(maxlen, 1)
+        self.entries = self.maxlen*[None]
+        self.start = 0              # Index of oldest command
+        self.count = 0
+
+
+    def __len__(self):
+        return self.count
+
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.entries[(self.start+i) % self.maxlen]
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        
+        if index < 0:
+            index += self.count
+        if index < 0 or index >= self.count:
+            raise IndexError("command ring index out of range")
+        
+        return self.entries[(self.start+index) % self.maxlen]
+
+
+    def append(self, cmd):
+        """ Add command, dropping the oldest if full
+        """
+        self.entries[(self.start+self.count) % self.maxlen] = cmd
+        if self.count < self.maxlen:
+            self.count += 1
+        else:
+            self.start = (self.start+1) % self.maxlen
+
+
+    def pop(self):
+        """ Remove and return newest command
+        """
+        if self.count == 0:
+            raise IndexError("pop from empty command ring")
+        
+        self.count -= 1
+        index = (self.start+self.count) % self.maxlen
+        cmd = self.entries[index]
+        self.entries[index] = None
+        return cmd
+
+
+    def clear(self):
+        """ Remove all commands
+        """
+        for i in range(self.maxlen):
+            self.entries[i] = None
+        self.start = 0
+        self.count = 0
+
         
 class SelectCommandManager:
     """ Manipulate command redo/undo
@@ -32,7 +101,7 @@ class SelectCommandManager:
         self.undo_micro_move = undo_micro_move
         self.undo_len = undo_len
         self.current_command = None
-        self.command_stack = []         # Commands completed, which can be undone
+        self.command_stack = SelectCommandRing(undo_len)  # Commands completed, which can be undone
         self.undo_stack = []            # Commands which have been undone, which can be redone
         self.changed = {}               # Changed since last display
 
@@ -240,15 +309,12 @@ class SelectCommandManager:
     
     def save_command(self, bcmd):
         """ Save the most recent undo_len commands
-        for possible undo
+        for possible undo, the oldest being dropped
+        Commands are saved as their changes (compact), not copied
         """
-        while len(self.command_stack) >= self.undo_len:
-            if not self.command_stack:
-                break
-            self.command_stack.pop()
-        if len(self.command_stack) < self.undo_len:    
-            self.command_stack.append(bcmd.copy())
-            self.cmd_stack_print("save_command", "execute_stack")
+        bcmd.compact()
+        self.command_stack.append(bcmd)
+        self.cmd_stack_print("save_command", "execute_stack")
 
 
     def get_part(self, id=None, type=None, sub_type=None, row=None, col=None):
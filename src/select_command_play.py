@@ -1,6 +1,7 @@
 # select_command_play.py    12Nov2018
 
 import copy
+import time
 
 from select_fun import *
 from select_trace import SlTrace
@@ -12,7 +13,28 @@ from canvas_tracked import CanvasTracked
 
 """
 Command processing, especially undo/Redo
+
+Commands record part changes as field values, not part copies.
+While a command is built, the undoable fields of each part it changes
+are kept (add_prev_parts, add_new_parts).  When the command is saved
+for undo (compact) these are reduced to a list of the fields changed:
+    (part_id, field index, previous value, new value)
+Undo sets the previous values, redo the new values.
 """
+PART_FIELDS = ("turned_on", "invisible", "player", "move_no",
+               "color", "on_color", "off_color", "highlighted",
+               "centered_text")
+
+
+def get_part_state(part):
+    """ Undoable field values of part
+    :part: part
+    :returns: tuple of values in PART_FIELDS order
+    """
+    return (part.turned_on, part.invisible, part.player, part.move_no,
+            part.color, part.on_color, part.off_color, part.highlighted,
+            tuple(part.centered_text))
+
 
 """
 Command Definition
@@ -26,24 +48,10 @@ class SelectCommandPlay(SelectCommand):
 
     def __deepcopy__(self, memo=None):
         """ provide deep copy as a custimized "constructor",
-        reducing recusion
+        reducing recusion - players and part values are shared,
+        not modified in place
         """
-        new_copy = SelectCommandPlay(self.action,  cmd_num=self.cmd_num, has_prompt=self.has_prompt, undo_unit=self.undo_unit)
-        new_copy.prev_move_no = self.prev_move_no
-        new_copy.new_move_no = self.new_move_no
-        new_copy.prev_keycmd_edge_mark = self.prev_keycmd_edge_mark   # Usually no action
-        new_copy.new_keycmd_edge_mark = self.new_keycmd_edge_mark
-        new_copy.prev_messages = self.prev_messages
-        new_copy.new_messages = self.new_messages
-        new_copy.prev_player = select_copy(self.prev_player)
-        new_copy.new_player = select_copy(self.new_player)
-        new_copy.prev_selects = select_copy(self.prev_selects)
-        new_copy.new_selects = select_copy(self.new_selects)
-        new_copy.prev_parts = select_copy(self.prev_parts)    # Hash by id of previous part values
-        new_copy.new_parts = select_copy(self.new_parts)     # Hash by id of new part values
-        new_copy.prev_score = None
-        new_copy.new_score = None
-        return new_copy
+        return self.copy()
 
        
     """ Command object, sufficient to contain do/undo
@@ -80,11 +88,13 @@ class SelectCommandPlay(SelectCommand):
             self.prev_messages = []
             self.new_messages = []
             self.prev_player = self.user_module.get_player()
-            self.new_player = select_copy(self.prev_player)
+            self.new_player = self.prev_player
             self.prev_selects = {}
             self.new_selects = {}
             self.prev_parts = {}    # Hash by id of previous part values
             self.new_parts = {}     # Hash by id of new part values
+            self.part_changes = None    # (part_id, field index, prev, new)
+                                        # once compacted
             self.prev_score = None  # previous (player,score) if any change
             self.new_score = None   # new (player,score) if any change
         else:
@@ -117,12 +127,17 @@ class SelectCommandPlay(SelectCommand):
             st += "\n  new_score:%d %s" % (self.new_score[1], self.new_score[0])
         if self.prev_parts:
             st += "\n  prev_parts:%d" % len(self.prev_parts)
-            for part in self.prev_parts.values():
-                st += "\n   " + str(part)
+            for part_id, state in self.prev_parts.items():
+                st += "\n   %d: %s" % (part_id, self.state_str(state))
         if self.new_parts:
             st += "\n  new_parts:%d" % len(self.new_parts)
-            for part in self.new_parts.values():
-                st += "\n   " + str(part)
+            for part_id, state in self.new_parts.items():
+                st += "\n   %d: %s" % (part_id, self.state_str(state))
+        if self.part_changes:
+            st += "\n  part_changes:%d" % len(self.part_changes)
+            for part_id, field_no, prev_value, new_value in self.part_changes:
+                st += "\n   %d: %s %s => %s" % (part_id, PART_FIELDS[field_no],
+                                                 prev_value, new_value)
         if self.prev_messages:
             st += "\n  prev_messages:%d" % len(self.prev_messages)
             for message in self.prev_messages:
@@ -131,25 +146,16 @@ class SelectCommandPlay(SelectCommand):
             st += "\n  new_messages:%d" % len(self.new_messages)
             for message in self.new_messages:
                 st += "\n    %s" % str(message)
-        """ Check for duplicate entries
-        """
-        parts_by_id = {}
-        for part in self.prev_parts.values():
-            if part.part_id in parts_by_id:
-                SlTrace.lg("Duplicate in prev_parts id=%d       %s"
-                            % (part.part_id, st.replace("\n", "\n        ")))
-                return st
-            parts_by_id[part.part_id] = part
-        part_by_id = {}
-        for part in self.new_parts.values():
-            if part in part_by_id:
-                SlTrace.lg("Duplicate in new_parts id=%d      %s"
-                            % (part.part_id, st.replace("\n", "\n        ")))
-                return st
-            parts_by_id[part.part_id] = part
-                
         return st
 
+
+    def state_str(self, state):
+        """ Part field values as string
+        :state: values, in PART_FIELDS order
+        """
+        return " ".join("%s=%s" % (name, value)
+                        for name, value in zip(PART_FIELDS, state))
+
     def copy(self):
         """ present effective copy of object
         """
@@ -157,16 +163,21 @@ class SelectCommandPlay(SelectCommand):
     
 
     def select_copy(self, levels=None):
-        return copy.copy(self)
+        new_copy = copy.copy(self)
+        new_copy.prev_selects = dict(self.prev_selects)
+        new_copy.new_selects = dict(self.new_selects)
+        new_copy.prev_parts = dict(self.prev_parts)
+        new_copy.new_parts = dict(self.new_parts)
+        return new_copy
     
             
     def set_new_player(self, player):
-        self.new_player = select_copy(player)
+        self.new_player = player
     
     
             
     def set_prev_player(self, player):
-        self.prev_player = select_copy(player)
+        self.prev_player = player
         
                     
     def add_message(self, message):
@@ -233,7 +244,7 @@ class SelectCommandPlay(SelectCommand):
         if not isinstance(parts, list):
             parts = [parts]     # list of one
         if keep:
-            new_selects = select_copy(self.prev_selects)
+            new_selects = dict(self.prev_selects)
         else:
             new_selects = {}
         for part in parts:
@@ -251,7 +262,7 @@ class SelectCommandPlay(SelectCommand):
                 SlTrace.lg("Duplicate in add_new_parts id=%d       %s"
                             % (part.part_id, str(part).replace("\n", "\n        ")))
                 continue
-            self.new_parts[part.part_id] = select_copy(part)
+            self.new_parts[part.part_id] = get_part_state(part)
 
 
     def add_prev_parts(self, parts):
@@ -267,7 +278,7 @@ class SelectCommandPlay(SelectCommand):
                             % (part.part_id, str(part).replace("\n", "\n        ")))
                 continue
             
-            self.prev_parts[part.part_id] = select_copy(part)
+            self.prev_parts[part.part_id] = get_part_state(part)
 
     def add_new_selects(self, parts):
         """ add one or a list of part_ids to new
@@ -318,23 +329,90 @@ class SelectCommandPlay(SelectCommand):
         
         
 
+    def compact(self):
+        """ Reduce part values to the fields changed, from the previous
+        values to the current values.  Done when the command is saved for
+        undo, after it has been executed.
+        """
+        if self.part_changes is not None:
+            return                  # Already done
+        
+        part_changes = []
+        for part_id, prev_state in self.prev_parts.items():
+            part = self.get_part(part_id)
+            if part is None:
+                continue
+            new_state = get_part_state(part)
+            for field_no, prev_value in enumerate(prev_state):
+                new_value = new_state[field_no]
+                if new_value is not prev_value and new_value != prev_value:
+                    part_changes.append((part_id, field_no, prev_value, new_value))
+        self.part_changes = part_changes
+        self.prev_parts = {}
+        self.new_parts = {}
+
+
+    def get_part_values(self, undo=False):
+        """ Field values to set in executing command
+        :undo: True - undoing command default: doing/redoing
+        :returns: dictionary by part id of list of (field name, value)
+        """
+        values_by_id = {}
+        if self.part_changes is None:
+            for part_id in self.prev_parts:
+                values_by_id[part_id] = []
+            for part_id, state in self.new_parts.items():
+                values_by_id[part_id] = list(zip(PART_FIELDS, state))
+            return values_by_id
+        
+        part_changes = self.part_changes
+        if undo:
+            part_changes = reversed(part_changes)
+        for part_id, field_no, prev_value, new_value in part_changes:
+            if part_id not in values_by_id:
+                values_by_id[part_id] = []
+            values_by_id[part_id].append((PART_FIELDS[field_no],
+                                          prev_value if undo else new_value))
+        return values_by_id
+
+
+    def set_part_values(self, undo=False):
+        """ Set changed parts' field values
+        :undo: True - undoing command default: doing/redoing
+        """
+        values_by_id = self.get_part_values(undo=undo)
+        parts = []
+        for part_id in values_by_id:
+            part = self.get_part(part_id)
+            if part is not None:
+                parts.append(part)
+        self.user_module.remove_parts(parts)        # Clear display of changed parts
+        for part in parts:
+            self.user_module.set_part_values(part, values_by_id[part.part_id])
+
+
     def save_cmd(self):
         self.command_manager.save_cmd(self)
 
 
-    def execute_cmd_select(self):
+    def execute_cmd_select(self, undo=False):
         """ Execute selection command, just modifies selection
             1. clear the selection of previously selected
             2. set the selection of newly selected
+        :undo: True - restore previous selection default: set new selection
         """
-        for part_id in self.prev_selects:
-            if part_id not in self.new_selects:
+        prev_selects = self.prev_selects
+        new_selects = self.new_selects
+        if undo:
+            prev_selects, new_selects = new_selects, prev_selects
+        for part_id in prev_selects:
+            if part_id not in new_selects:
                 part = self.get_part(part_id)
                 if part is not None:
                     part.select_clear()
                 self.set_changed(part_id)
-        for part_id in self.new_selects:
-            if part_id not in self.prev_selects:
+        for part_id in new_selects:
+            if part_id not in prev_selects:
                 part = self.get_part(id=part_id)
                 if part is not None:
                     part.select_set()
@@ -348,6 +426,7 @@ class SelectCommandPlay(SelectCommand):
         if ActiveCheck.not_active():
             return
         
+        time_beg = time.perf_counter()
         command_manager = self.command_manager
         user_module = command_manager.user_module
         user_module.update_score_window()
@@ -368,6 +447,7 @@ class SelectCommandPlay(SelectCommand):
                 self.show_display()
                 SlTrace.lg(f"display_update: tracking: {CanvasTracked.tag_track_delete} in {self}")
             part.display()
+        user_module.play_timing.add("display_update", time.perf_counter()-time_beg)
 
 
     def display_order(self, parts):
@@ -388,12 +468,13 @@ class SelectCommandPlay(SelectCommand):
         return sel_area
     
             
-    def execute(self):
+    def execute(self, undo=False):
         """
         Execute constructed command
         without modifying commandStack.
         All commands capable of undo/redo call this
         without storing it for redo
+        :undo: True - reverse command's changes default: make changes
         """
         if self.user_module is None:
             return
@@ -416,28 +497,38 @@ class SelectCommandPlay(SelectCommand):
             ###execute_prev_keycmd_edge_mark = copy.copy(
             ###    self.user_module.keycmd_edge_mark)
         if SlTrace.trace("execute_part_change"):
-            execute_prev_parts = {}
-            for part_id, part in self.prev_parts.items():
-                execute_prev_parts[part_id] = copy.copy(part)
-            execute_orig_new_parts = {}
-            for part_id, part in self.new_parts.items():
-                execute_orig_new_parts[part_id] = copy.copy(part)
+            execute_prev_states = {}
+            for part_id in self.get_part_values(undo=undo):
+                part = self.user_module.get_part(part_id)
+                if part is not None:
+                    execute_prev_states[part_id] = get_part_state(part)
         self.command_manager.current_command = self
-        if (self.prev_keycmd_edge_mark != None
-            or self.new_keycmd_edge_mark != None):
+        if undo:
+            prev_keycmd_edge_mark = self.new_keycmd_edge_mark
+            new_keycmd_edge_mark = self.prev_keycmd_edge_mark
+            new_player = self.prev_player
+            prev_score = self.new_score
+            new_score = self.prev_score
+        else:
+            prev_keycmd_edge_mark = self.prev_keycmd_edge_mark
+            new_keycmd_edge_mark = self.new_keycmd_edge_mark
+            new_player = self.new_player
+            prev_score = self.prev_score
+            new_score = self.new_score
+        if (prev_keycmd_edge_mark != None
+            or new_keycmd_edge_mark != None):
             self.user_module.update_keycmd_edge_mark(
-                self.prev_keycmd_edge_mark, self.new_keycmd_edge_mark)
+                prev_keycmd_edge_mark, new_keycmd_edge_mark)
         if self.action == "cmd_select":
-            self.execute_cmd_select()
+            self.execute_cmd_select(undo=undo)
         else:
             try:
-                self.user_module.set_player(self.new_player)
-                self.user_module.remove_parts(list(self.prev_parts.values()))
-                self.user_module.insert_parts(list(self.new_parts.values()))
+                self.user_module.set_player(new_player)
+                self.set_part_values(undo=undo)
                 self.user_module.display_messages(self.new_messages)
-                if self.new_score is not None:
-                    SlTrace.lg("new_score %d: %s" % (self.new_score[1], self.new_score[0]), "score")
-                self.user_module.update_score_from_cmd(self.new_score, self.prev_score)
+                if new_score is not None:
+                    SlTrace.lg("new_score %d: %s" % (new_score[1], new_score[0]), "score")
+                self.user_module.update_score_from_cmd(new_score, prev_score)
             except Exception as exc:
                 SlTrace.lg(f"Exception running cmd: {self} exception: {exc}")
         if self.display:    
@@ -459,16 +550,15 @@ class SelectCommandPlay(SelectCommand):
                             % execute_prev_keycmd_edge_mark.diff(self.user_module.keycmd_edge_mark))
         '''
         if SlTrace.trace("execute_part_change"):
-            for part_id, part in execute_prev_parts.items():
-                post_part = self.user_module.get_part(part_id)
-                SlTrace.lg("    diff prev %d: %s %s"
-                            % (part_id, part.part_type,
-                                part.diff(post_part)))
-            for part_id, part in execute_orig_new_parts.items():
+            for part_id, prev_state in execute_prev_states.items():
                 post_part = self.user_module.get_part(part_id)
-                SlTrace.lg("    diff new %d: %s %s"
-                           % (part_id, part.part_type,
-                               part.diff(post_part)))
+                post_state = get_part_state(post_part)
+                diffs = ["%s: %s => %s" % (name, prev_value, post_value)
+                         for name, prev_value, post_value
+                          in zip(PART_FIELDS, prev_state, post_state)
+                          if post_value != prev_value]
+                SlTrace.lg("    diff %d: %s %s"
+                            % (part_id, post_part.part_type, " ".join(diffs)))
         if SlTrace.trace("selected"):
             self.list_selected("execute AFTER")
         return True
@@ -533,38 +623,8 @@ class SelectCommandPlay(SelectCommand):
           4. return true iff could undo
         Non destructive execution of command
         """
-
-        try:
-            cmd = select_copy(self)
-            
-        except:
-            SlTrace.lg("SelectCommandPlay failure")
-            return False
-        temp = cmd.new_move_no
-        cmd.new_move_no = cmd.prev_move_no
-        cmd.prev_move_no = temp
-        
-        temp = cmd.new_keycmd_edge_mark
-        cmd.new_keycmd_edge_mark = cmd.prev_keycmd_edge_mark
-        cmd.prev_keycmd_edge_mark = temp
-        
-        temp = cmd.new_player
-        cmd.new_player = cmd.prev_player
-        cmd.prev_player = temp
-        
-        temp = cmd.new_score
-        cmd.new_score = cmd.prev_score
-        cmd.prev_score = temp
-        
-        temp = select_copy(cmd.new_parts)
-        cmd.new_parts = select_copy(cmd.prev_parts)
-        cmd.prev_parts = temp
-        
-        temp_sel = cmd.new_selects
-        cmd.new_selects = cmd.prev_selects
-        cmd.prev_selects = temp_sel
-        
-        res = cmd.execute()
+        self.compact()
+        res = self.execute(undo=True)
         if res:
             self.command_manager.undo_stack.append(self)
         return res
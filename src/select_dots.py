@@ -44,7 +44,8 @@ class SelectDots(object):
                   region_visible=False,
                   region_width=0,
                   edge_width=8,
-                  edge_visible=True):
+                  edge_visible=True,
+                  use_bitboard=False):
         """
         :frame: - frame within we are placed
         :image_hash: file image access
@@ -70,8 +71,11 @@ class SelectDots(object):
         :edge_width: edge width in pixels
                         default:1
         :edge_visible: edge visible default: True
+        :use_bitboard: shadow keeps a DotsBitBoard for fast move queries
+                        default: False
         """
         self.display_game = display_game
+        self.use_bitboard = use_bitboard
         self.frame = frame
         self.image_hash = image_hash
         self.canvas = None
@@ -111,6 +115,9 @@ class SelectDots(object):
         self.edge_visible = edge_visible
         self.stroke_checking = stroke_checking
         self.area = None        # Set non None when created
+        self.area_geometry = None   # (nrows, ncols, width, height) of area
+        self.complete_square_call = None                # Setup for complete square call
+        self.new_edge_call = None                       # Setup for new edge call
         self.display_tracking = DisplayTracking(self)
         self.setup_area()
 
@@ -119,7 +126,8 @@ class SelectDots(object):
         """ Setup shadow which can be used to speedup testing
         if display or immediate display is not required
         """
-        self.shadow = DotsShadow(self, nrows=self.nrows, ncols=self.ncols)
+        self.shadow = DotsShadow(self, nrows=self.nrows, ncols=self.ncols,
+                                 use_bitboard=self.use_bitboard)
             
         
             
@@ -236,8 +244,15 @@ class SelectDots(object):
                 if left_edge is not None:
                     left_edge.row = part.row 
                     left_edge.col = part.col
-        self.complete_square_call = None                # Setup for complete square call
-        self.new_edge_call = None                       # Setup for new edge call
+        self.area.reindex_parts()           # Edge row, col set above
+        self.area.build_grid_index()        # Parts are sized - index for hit testing
+        self.area_geometry = self.get_area_geometry()
+
+
+    def get_area_geometry(self):
+        """ Board settings from which the area is built
+        """
+        return (self.nrows, self.ncols, self.width, self.height)
 
 
     def get_mvpart(self, mvpart=None):
@@ -247,17 +262,20 @@ class SelectDots(object):
         """
         return self.shadow.get_mvpart(mvpart=mvpart)
 
-    def get_part(self, id=None, type=None, sub_type=None, row=None, col=None):
+    def get_part(self, id=None, type=None, sub_type=None, row=None, col=None,
+                 tag=None):
         """ Get basic part
         :mvpart: shadow (MoveList) id
         :id: unique part id
         :type: part type e.g., edge, region, corner
         :row:  part row
         :col: part column
+        :tag: part tag
         :returns: part, None if not found
         """
         
-        return self.area.get_part(id=id, type=type, sub_type=sub_type, row=row, col=col)
+        return self.area.get_part(id=id, type=type, sub_type=sub_type, row=row, col=col,
+                                  tag=tag)
 
  
     def get_parts(self, pt_type=None):
@@ -512,19 +530,54 @@ class SelectDots(object):
 
     def reset(self):
         """ Set board to beginning of game
+        Parts and shadow are cleared in place, the canvas and
+        parts being rebuilt only if the board size or geometry
+        has changed
         """
-        self.setup_area()
-        '''
-        regions = self.area.get_parts(pt_type="region")
-        for region in regions:
-            region.display_clear()
-        edges = self.area.get_parts(pt_type="edge")
-        for edge in edges:
-            edge.turn_off()
-            edge.select_clear()
-            edge.highlight_clear()
-            edge.display_clear()
-        '''
+        if self.area is None or self.area_geometry != self.get_area_geometry():
+            self.setup_area()
+            return
+        
+        area = self.area
+        area.highlight_clear(display=False)
+        area.select_clear()
+        area.stroke_info.setup()
+        display = self.display_game
+        for part in area.get_parts():
+            part.reset_part(display=display)
+        self.shadow.reset()
+        self.drawn_lines = []
+            
+    def set_part_values(self, part, values):
+        """ Set part field values e.g. from command undo/redo
+        Keeps shadow and highlighting in step with the part
+        :part: part
+        :values: list of (field name, value)
+        """
+        turned_on = None
+        for name, value in values:
+            if name == "centered_text":
+                value = list(value)
+            elif getattr(part, name) == value:
+                continue
+            
+            if name == "highlighted":
+                if value:
+                    part.highlight_set(display=False, keep=True)
+                else:
+                    part.highlight_clear(display=False)
+                continue
+            
+            setattr(part, name, value)
+            if name == "turned_on":
+                turned_on = value
+        if turned_on is not None:           # After player, move_no are set
+            if turned_on:
+                self.shadow.turn_on(part=part, player=part.player,
+                                    move_no=part.move_no)
+            else:
+                self.shadow.turn_off(part=part)
+
             
     def insert_parts(self, parts):
         """ Add new or changed parts
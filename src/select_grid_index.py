@@ -0,0 +1,153 @@
+# select_grid_index.py
+"""
+Uniform grid spatial index of SelectArea parts, for hit testing
+
+The canvas is divided into square cells.  Each part is entered in
+every cell its rectangle overlaps, so the parts at a point are found
+by checking only the parts in the point's cell.
+
+For each part the index keeps the selection (SZ_SELECT) rectangle,
+checked directly by get_parts_at.  Cell placement uses the bounding
+rectangle of the selection and display (SZ_DISPLAY) rectangles, so
+the cell's parts are also the candidates for tests made with either
+size e.g. SelectArea.get_edge_part.
+
+Part rectangles depend on the part's location and connected parts,
+so a part must be updated (update_parts) after it, or a connected
+part, is moved.
+"""
+from select_trace import SlTrace
+from select_part import SelectPart
+
+
+class SelectGridIndex:
+    """ Grid of cells, each with the parts overlapping the cell
+    """
+    def __init__(self, cell_size=None):
+        """ Setup empty index
+        :cell_size: cell width and height, in canvas pixels
+                default: set by build from the parts' sizes
+        """
+        self.cell_size = cell_size
+        self.cells = {}             # parts list by cell (ix, iy)
+        self.part_cells = {}        # By part id: (select rect, list of cells)
+        self.nparts = 0
+
+
+    def build(self, parts):
+        """ (Re)build index for parts
+        :parts: list of parts
+        """
+        self.cells = {}
+        self.part_cells = {}
+        rects = [self.get_part_rects(part) for part in parts]
+        if self.cell_size is None:
+            sizes = sorted(max(bound[2]-bound[0], bound[3]-bound[1])
+                           for _, bound in rects if bound is not None)
+            cell_size = sizes[len(sizes)//2] if sizes else 0
+            self.cell_size = max(cell_size, 1)
+        for part, (rect, bound) in zip(parts, rects):
+            self.add_rects(part, rect, bound)
+        SlTrace.lg(f"grid index: {len(parts)} parts {len(self.cells)} cells"
+                   f" cell_size={self.cell_size}", "grid_index")
+
+
+    def get_part_rects(self, part):
+        """ Part's selection rectangle and cell placement rectangle
+        :part: part
+        :returns: (select rect, bounding rect), (None, None) if none
+        """
+        try:
+            rect = part.get_rect(sz_type=SelectPart.SZ_SELECT)
+            drect = part.get_rect(sz_type=SelectPart.SZ_DISPLAY)
+        except Exception:
+            return None, None
+
+        bound = (min(rect[0], drect[0]), min(rect[1], drect[1]),
+                 max(rect[2], drect[2]), max(rect[3], drect[3]))
+        return rect, bound
+
+
+    def get_cell(self, x, y):
+        """ Cell containing point
+        :x,y: canvas location
+        """
+        cell_size = self.cell_size
+        return int(x//cell_size), int(y//cell_size)
+
+
+    def add_part(self, part):
+        """ Add part to index
+        :part: part
+        """
+        rect, bound = self.get_part_rects(part)
+        self.add_rects(part, rect, bound)
+
+
+    def add_rects(self, part, rect, bound):
+        """ Enter part in cells overlapped by bound
+        :part: part
+        :rect: part's selection rectangle
+        :bound: bounding rectangle None - part not indexed
+        """
+        if bound is None:
+            return
+
+        ix1, iy1 = self.get_cell(bound[0], bound[1])
+        ix3, iy3 = self.get_cell(bound[2], bound[3])
+        cells = []
+        for ix in range(ix1, ix3+1):
+            for iy in range(iy1, iy3+1):
+                cell = (ix, iy)
+                if cell not in self.cells:
+                    self.cells[cell] = []
+                self.cells[cell].append(part)
+                cells.append(cell)
+        self.part_cells[part.part_id] = (rect, cells)
+        self.nparts += 1
+
+
+    def remove_part(self, part):
+        """ Remove part from index, if present
+        :part: part
+        """
+        entry = self.part_cells.pop(part.part_id, None)
+        if entry is None:
+            return
+
+        for cell in entry[1]:
+            self.cells[cell].remove(part)
+        self.nparts -= 1
+
+
+    def update_parts(self, parts):
+        """ Reenter parts at their current location
+        :parts: iterable of parts
+        """
+        for part in parts:
+            self.remove_part(part)
+            self.add_part(part)
+
+
+    def get_candidates(self, x, y):
+        """ Parts which may be at point
+        :x,y: canvas location
+        :returns: list of parts, empty if none
+        """
+        return self.cells.get(self.get_cell(x, y), [])
+
+
+    def get_parts_at(self, x, y):
+        """ Parts whose selection rectangle contains point
+        :x,y: canvas location
+        :returns: list of parts, in the order added to the SelectArea
+        """
+        parts = []
+        part_cells = self.part_cells
+        for part in self.cells.get(self.get_cell(x, y), []):
+            c1x, c1y, c3x, c3y = part_cells[part.part_id][0]
+            if x >= c1x and x <= c3x and y >= c1y and y <= c3y:
+                parts.append(part)
+        if len(parts) > 1:
+            parts.sort(key=lambda part: part.parts_index)
+        return parts
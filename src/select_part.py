@@ -16,6 +16,9 @@ from select_size import SelectSize
 from select_velocity import SelectVelocity
 from select_rotation import SelectRotation
 from canvas_tracked import CanvasTracked    # For debugging
+from trace_lazy import trace_flag, lg
+
+TR_IS_OVER = trace_flag("is_over")
 
 
 def color_to_fill(color):
@@ -416,7 +419,7 @@ class SelectPart(object):
         self.text_tags = []         # appended texts if any
         self.centered_text = []     # CenteredText entries
         self.blinker = None         # If blinking
-        self.base = {}              # base(reset) values if any
+        self.base = {"invisible" : invisible}   # base(reset) values
         if self.part_type == "thing":
             pass                    # Handled elsewhere
         elif point is not None:
@@ -1467,7 +1470,7 @@ class SelectPart(object):
         except:
             raise SelectError("bad get_rect call")
         if x >= c1x and x <= c3x and y >= c1y and y <= c3y:
-            SlTrace.lg("is_over: %s : c1x:%d, c1y:%d, c3x:%d, c3y:%d" % (self, c1x,c1y,c3x,c3y), "is_over")
+            lg(TR_IS_OVER, "is_over: %s : c1x:%d, c1y:%d, c3x:%d, c3y:%d", self, c1x, c1y, c3x, c3y)
             return True
         
         return False
@@ -1774,6 +1777,37 @@ class SelectPart(object):
         """ Check if element is "on"
         """
         return self.turned_on
+
+
+    def reset_part(self, display=True):
+        """ Return part to its state before play, in place, e.g. for a new game
+        Clears turned_on, player, move_no, highlighting, blinking and
+        centered text, restoring base(reset) values
+        :display: redisplay part, if changed default: True
+        """
+        if (not self.turned_on and self.move_no is None and self.player is None
+                and not self.centered_text and not self.highlighted
+                and self.blinker is None):
+            return                  # Untouched
+
+        if self.blinker is not None:
+            self.blinker.stop()
+            self.blinker = None
+        if self.highlighted or self.part_id in self.sel_area.highlights:
+            self.highlight_clear(display=False)
+        self.clear_centered_texts()
+        self.centered_text = []
+        if self.move_no_tag is not None:
+            self.delete_tags(self.move_no_tag)
+            self.move_no_tag = None
+        self.display_clear()
+        self.turned_on = False
+        self.player = None
+        self.move_no = None
+        for attr in self.base:
+            setattr(self, attr, self.base[attr])
+        if display:
+            self.display()
     
 
     def turn_off(self, display=True, player=None, move_no=None, visible=False):
@@ -25,9 +25,21 @@ from select_player import SelectPlayer
 from sc_player_control import PlayerControl
 from select_message import SelectMessage
 from active_check import ActiveCheck        
+from dots_strategy import DotsStrategy
 from select_blinker_state import BlinkerMultiState
 from select_kbd_cmd import SelectKbdCmd
 from canvas_tracked import CanvasTracked
+from play_timing import PlayTiming
+from trace_lazy import trace_flag, lg
+
+TR_EDGE = trace_flag("edge")
+TR_EXECUTE = trace_flag("execute")
+TR_NEW_EDGE = trace_flag("new_edge")
+TR_PLAY_STRATEGY = trace_flag("play_strategy")
+TR_PLAYER_TRACE = trace_flag("player_trace")
+TR_SCORE = trace_flag("score")
+TR_SELECTED = trace_flag("selected")
+TR_SQUARE = trace_flag("square")
         
 class SelectPlay:
     current_play = None             # Most recent - used for debugging
@@ -53,7 +65,14 @@ class SelectPlay:
                  before_move=None, after_move=None,
                  show_ties=False,
                  undo_len=100,
-                 undo_micro_move=False):
+                 undo_micro_move=False,
+                 search_time=DotsStrategy.SEARCH_TIME,
+                 mcts_playouts=None,
+                 mcts_time=DotsStrategy.MCTS_TIME,
+                 use_book=True,
+                 book_dir=None,
+                 timing_interval=None,
+                 timing_file=None):
         """ Setup play
         :board: playing board (SelectDots)
         :mw: Instance of Tk, if one, else created here
@@ -85,6 +104,21 @@ class SelectPlay:
                 default: none
         :src_lst: True - list source as run
         :stx_lst: True - list command stream as run
+        :search_time: search player (level 4) time limit per move, in seconds
+                    default: 1.0
+        :mcts_playouts: MCTS player (level 5) playouts per move
+                    default: no limit
+        :mcts_time: MCTS player (level 5) time limit per move, in seconds
+                    default: 1.0
+        :use_book: search / MCTS players (level 4, 5), of two players,
+                    play positions found in the board size's solved
+                    position table (dots_book) default: True
+        :book_dir: solved position table directory
+                    default: dots_book.BOOK_DIR
+        :timing_interval: seconds between play timing snapshots
+                    default: no periodic snapshots
+        :timing_file: JSON file for play timing snapshots
+                    default: snapshots are written to the log
         """
         SelectPlay.current_play = self              # For debugging
         self.clear_game_moves()                     # Initialize game moves list
@@ -93,6 +127,8 @@ class SelectPlay:
         self.display_game = display_game
         self.numgame = numgame
         self.profile_running = profile_running
+        self.play_timing = PlayTiming(snapshot_interval=timing_interval,
+                                      snapshot_file=timing_file)
         self.playing = True     # Hack to suppress activity on exit event
         self.score_window = score_window
         if game_control is None:
@@ -115,6 +151,10 @@ class SelectPlay:
             self.set_cmd_stream(cmd_stream)
         self.undo_len = undo_len
         self.undo_micro_move = undo_micro_move
+        self.strategy = DotsStrategy(search_time=search_time,
+                                     mcts_playouts=mcts_playouts, mcts_time=mcts_time,
+                                     use_book=use_book, book_dir=book_dir)
+        self.strategy.load_book(board.nrows, board.ncols)   # Load, if one, at startup
         self.command_manager = SelectCommandManager(self,
                                             undo_micro_move=self.undo_micro_move,
                                             undo_len=self.undo_len)
@@ -131,6 +171,9 @@ class SelectPlay:
         self.auto_play_check_ms = auto_play_check_ms
         self.auto_delay_waiting = False
         self.manual_moves = []          # Initialize empty list
+        self.batch_mode = False         # True - no display, all auto players
+        self.batch_moves = []           # (edge, player, move_no, squares, square_move_no)
+                                        # moves not yet reflected in parts
 
         self.btmove = btmove
         self.player_control = player_control    # May be set later
@@ -197,7 +240,13 @@ class SelectPlay:
             self.run_check_ms = run_check_ms
         BlinkerMultiState.enable()
         
+        play_timing = self.play_timing
+        loop_beg = None
         while self.running:
+            if loop_beg is not None:
+                play_timing.add("running_loop", time.perf_counter()-loop_beg)
+                play_timing.check_snapshot()
+            loop_beg = time.perf_counter()
             SlTrace.lg("running_loop", "running_loop")
             self.mw.update()
             if ActiveCheck.not_active():
@@ -301,15 +350,30 @@ class SelectPlay:
             
             SlTrace.lg("running_loop self.running and self.run", "running_loop")
             SlTrace.lg("running_loop self.start_move", "running_loop")
+            time_beg = time.perf_counter()
+            level = self.get_timing_level(self.get_player())
             if self.start_move():
                 SlTrace.lg("running_loop successful start_move", "running_loop")
                 self.next_move_no()
+                self.play_timing.add("make_move", time.perf_counter()-time_beg,
+                                     level=level)
             SlTrace.lg("running_loop after start_move", "running_loop")
         if self.to_pause:
             self.pause_cmd()
             self.to_pause = False
         return True
 
+    def get_timing_level(self, player):
+        """ Player level, by which play timing is kept
+        :player: player
+        :returns: level, None if not an automatic player
+        """
+        if player is None or not player.auto:
+            return None
+        
+        return player.level
+
+
     def add_event_queue(self, proc):
         """ Add to event queue, to be processed when appropriate
         :proc: event processing function
@@ -393,7 +457,7 @@ class SelectPlay:
         
         row = rowcols[0]
         col = rowcols[1]
-        SlTrace.lg("make_new_edge: %s row=%d col=%d" % (dir, row, col), "edge")
+        lg(TR_EDGE, "make_new_edge: %s row=%d col=%d", dir, row, col)
         edge = self.get_part(type="edge", sub_type=dir, row=row, col=col)
         if edge is None:
             SlTrace.lg("No edge(%s) at row=%d col=%d" % (dir, row, col))
@@ -616,8 +680,7 @@ class SelectPlay:
             was_str = " was %s" % prev_player
         else:
             was_str = ""
-        SlTrace.lg("announce_player: %s %s%s"
-                    % (tag, player, was_str), "execute")
+        lg(TR_EXECUTE, "announce_player: %s %s%s", tag, player, was_str)
         scmd = self.get_cmd("announce_player", has_prompt=True)
         self.set_prev_player(prev_player)
         self.set_new_player(player)
@@ -789,7 +852,9 @@ class SelectPlay:
         if self.score_window is None:
             return
         
+        time_beg = time.perf_counter()
         self.score_window.update_score(move_no=move_no, players=players)
+        self.play_timing.add("score_window", time.perf_counter()-time_beg)
 
 
     def update_score_window(self):
@@ -800,7 +865,9 @@ class SelectPlay:
             return
 
         if self.score_window is not None:
+            time_beg = time.perf_counter()
             self.score_window.update_window()
+            self.play_timing.add("score_window", time.perf_counter()-time_beg)
         
     def wait_message(self, message=None):
         """ Wait till message completed
@@ -1267,6 +1334,7 @@ class SelectPlay:
                     default: command_manager.undo_micro_move
         :returns: True iff successful
         """
+        self.batch_sync()
         self.add_play_move(PlayMove.UNDO_MOVE)
         while self.is_waiting_for_message():
             self.end_message()
@@ -1283,6 +1351,7 @@ class SelectPlay:
                     default: command_manager.undo_micro_move
         :returns: True iff successful
         """
+        self.batch_sync()
         self.add_play_move(PlayMove.REDO_MOVE)
         while self.is_waiting_for_message():
             self.end_message()
@@ -1352,24 +1421,27 @@ class SelectPlay:
     def auto_play(self, player):
         """ Do automatic move based on "level" of player
         """
-        SlTrace.lg("auto_play player: %s" % self.get_player(), "player_trace")
+        lg(TR_PLAYER_TRACE, lambda: "auto_play player: %s" % self.get_player())
+        time_beg = time.perf_counter()
         self.trace_scores("auto_play:")
         legal_list = self.get_legal_list()
         if legal_list.get_nmoves() == 0:
             self.end_game("No more moves!")
             return False
         
-        SlTrace.lg("auto_play player: %s" % self.get_player(), "player_trace")
+        lg(TR_PLAYER_TRACE, lambda: "auto_play player: %s" % self.get_player())
         
         level = self.adjust_level_to_stay_even(player)
-        SlTrace.lg("auto_play player: %s" % self.get_player(), "player_trace")
+        lg(TR_PLAYER_TRACE, lambda: "auto_play player: %s" % self.get_player())
         if level > 0:
             self.auto_play_positive(player)
         elif level < 0:
             self.auto_play_negative(player)
         else:
             self.auto_play_random(player)
-        SlTrace.lg("auto_play player END: %s" % self.get_player(), "player_trace")
+        lg(TR_PLAYER_TRACE, lambda: "auto_play player END: %s" % self.get_player())
+        self.play_timing.add("auto_play", time.perf_counter()-time_beg,
+                             level=player.level)
         return True                         # Next move number
 
 
@@ -1386,22 +1458,22 @@ class SelectPlay:
                         e.g. stay_even==2 if score > 2 + opponent
         :returns: adjusted level
         """
-        SlTrace.lg("adjust_level_to_stay_even player: %s" % self.get_player(), "player_trace")
+        lg(TR_PLAYER_TRACE, lambda: "adjust_level_to_stay_even player: %s" % self.get_player())
         level = player.level
         steven = player.steven
         if steven == 0:
             return level        # No adjustment wanted
-        SlTrace.lg("adjust_level_to_stay_even player: %s" % self.get_player(), "player_trace")
+        lg(TR_PLAYER_TRACE, lambda: "adjust_level_to_stay_even player: %s" % self.get_player())
        
         our_score = player.get_score()
-        SlTrace.lg("adjust_level_to_stay_even player: %s" % self.get_player(), "player_trace")
+        lg(TR_PLAYER_TRACE, lambda: "adjust_level_to_stay_even player: %s" % self.get_player())
         next_player = self.get_next_player(set_player=False)
         if next_player is None:
             return level
         
-        SlTrace.lg("adjust_level_to_stay_even player: %s" % self.get_player(), "player_trace")
+        lg(TR_PLAYER_TRACE, lambda: "adjust_level_to_stay_even player: %s" % self.get_player())
         next_score = next_player.get_score()
-        SlTrace.lg("adjust_level_to_stay_even player: %s" % self.get_player(), "player_trace")
+        lg(TR_PLAYER_TRACE, lambda: "adjust_level_to_stay_even player: %s" % self.get_player())
         diff = abs(our_score - next_score)
         steven_abs = abs(steven)
         diff_limit = steven_abs
@@ -1413,7 +1485,7 @@ class SelectPlay:
                 level = -abs(level)     # reduce our level
             elif our_score < next_score:
                 level = abs(level)
-        SlTrace.lg("adjust_level_to_stay_even player: %s" % self.get_player(), "player_trace")
+        lg(TR_PLAYER_TRACE, lambda: "adjust_level_to_stay_even player: %s" % self.get_player())
         return level
 
 
@@ -1421,15 +1493,25 @@ class SelectPlay:
         """ Positive player - trying to "win"
         """
         level = player.level
-        LEVEL_SQUARE = 1                # Complete a square
-        LEVEL_NO_GIVE_SQUARE = 2        # Provide possible square to next play
+        LEVEL_SQUARE = DotsStrategy.LEVEL_SQUARE
+        LEVEL_NO_GIVE_SQUARE = DotsStrategy.LEVEL_NO_GIVE_SQUARE
+        shadow = self.board.shadow
+        index = self.strategy.get_move(shadow, level, player_num=self.get_player_num(),
+                                       nplayer=len(self.get_players()))
+        if index is not None:
+            row, col, hv = shadow.tables.edge_rchs[index]
+            next_move = shadow.get_edge(row, col, hv)
+            self.new_edge(next_move)
+            lg(TR_PLAY_STRATEGY, "positive play strategy move for %s: %s", player, next_move)
+            return
+        
         legal_list = self.get_legal_list()
         if level >= LEVEL_SQUARE:
             square_list = self.get_square_moves(legal_list)
             if square_list.get_nmoves() > 0:
                 next_move = square_list.rand_obj()
                 self.new_edge(next_move)
-                SlTrace.lg("positive play move for %s: %s" % (player, next_move), "play_strategy")
+                lg(TR_PLAY_STRATEGY, "positive play move for %s: %s", player, next_move)
                 return
 
         if level >= LEVEL_NO_GIVE_SQUARE:
@@ -1437,7 +1519,7 @@ class SelectPlay:
             if safe_square_list.get_nmoves() > 0:
                 next_move = safe_square_list.rand_obj()
                 self.new_edge(next_move)
-                SlTrace.lg("positive play safe move for %s: %s" % (player, next_move), "play_strategy")
+                lg(TR_PLAY_STRATEGY, "positive play safe move for %s: %s", player, next_move)
                 return
                    
         self.auto_play_random(player)         # Default - just play one
@@ -1450,15 +1532,16 @@ class SelectPlay:
             player = self.get_player()
 
         level = player.level
-        LEVEL_SQUARE = 1                # Complete a square
-        LEVEL_NO_GIVE_SQUARE = 2        # Provide possible square to next play
+        LEVEL_SQUARE = DotsStrategy.LEVEL_SQUARE
+        LEVEL_NO_GIVE_SQUARE = DotsStrategy.LEVEL_NO_GIVE_SQUARE
         legal_list = self.get_legal_list()
         if abs(level) >= LEVEL_SQUARE:
             squares = []
             not_square_moves = []
             not_safe_moves = []     # give win to next player
-            for mvp in legal_list:
-                move = self.get_mvpart(mvpart=mvp)
+            get_edge = self.board.shadow.get_edge
+            for row, col, hv in legal_list:
+                move = get_edge(row, col, hv)
                 if not self.is_square_complete(move, squares, ifadd=True):
                     not_square_moves.append(move)
                     if self.square_complete_distance(move) <= 2:
@@ -1468,14 +1551,14 @@ class SelectPlay:
                     nr = random.randint(0, len(not_safe_moves)-1)
                     next_move = not_safe_moves[nr]
                     self.new_edge(next_move)
-                    SlTrace.lg("negative play safe for %s: %s" % (player, next_move), "play_strategy")
+                    lg(TR_PLAY_STRATEGY, "negative play safe for %s: %s", player, next_move)
                     return
                     
             if len(not_square_moves) > 0:
                 nr = random.randint(0, len(not_square_moves)-1)
                 next_move = not_square_moves[nr]
                 self.new_edge(next_move)
-                SlTrace.lg("negative play square for %s: %s" % (player, next_move), "play_strategy")
+                lg(TR_PLAY_STRATEGY, "negative play square for %s: %s", player, next_move)
                 return
             
             
@@ -1538,8 +1621,9 @@ class SelectPlay:
             ###return False       
         
         if self.new_move:
-            self.announce_player("start_move")
-            if SlTrace.trace("selected"):
+            if not self.batch_mode:
+                self.announce_player("start_move")
+            if TR_SELECTED.on:
                 self.list_selected("After start_move")
             self.new_move = False
         player = self.get_player()
@@ -1558,6 +1642,8 @@ class SelectPlay:
             return False
         
         player = self.get_player()
+        if self.batch_mode and not (from_local and player.auto):
+            self.batch_sync()
         if from_local:
             if player.auto:
                 self.auto_play_pause()
@@ -1593,6 +1679,7 @@ class SelectPlay:
         """ End the game
         :msg: message /reason
         """
+        self.batch_sync()
         self.ngame += 1
         self.game_end_ts = SlTrace.getTs(6)
         SlTrace.lg("end of game {:d}   {:.2f}".format(self.ngame,
@@ -1930,6 +2017,7 @@ class SelectPlay:
             return False
         self.reset()
         self.player_control.setup_game()
+        self.play_timing.set_board_size(self.board.nrows, self.board.ncols)
         self.in_game = True
         self.new_move = True
         self.manual_moves = []          # Initialize empty list
@@ -1949,8 +2037,82 @@ class SelectPlay:
         ###self.set_move_no(1)
         self.do_cmd()
         self.set_move_no(1)
+        self.batch_mode = self.is_batch_play()
+        self.batch_moves = []
+        return True
+
+
+    def is_batch_play(self):
+        """ Check if game can be played in batch mode:
+        no display, no command stream and every playing player auto
+        In batch mode moves update only the shadow board, scores and
+        game record, parts are updated by batch_sync
+        """
+        if self.display_game:
+            return False
+        
+        if self.cmd_stream is not None and not self.cmd_stream.is_eof():
+            return False
+        
+        players = self.get_players()
+        if len(players) == 0:
+            return False
+        
+        for player in players:
+            if not player.auto:
+                return False
+        
         return True
 
+
+    def batch_new_edge(self, edge, not_move=False):
+        """ Process new edge in batch mode
+        Same play and results as new_edge, without commands or display
+        :edge: edge played
+        """
+        player = self.get_player()
+        move_no = self.get_move_no()
+        if not not_move:
+            self.add_play_move(PlayMove.MARK_EDGE, part=edge,
+                            player=player, move_no=move_no)
+        row = edge.row
+        col = edge.col
+        hv = 0 if edge.sub_type() == 'h' else 1
+        pn = self.get_player_num()
+        shadow = self.board.shadow
+        shadow.turn_on_edge(row, col, hv, pn)
+        self.update_score(self.next_move_no(), player, edge)
+        squares = shadow.get_completed_squares(row, col, hv)
+        if squares:
+            for sq in squares:
+                shadow.turn_on_square(sq[0], sq[1], pn)
+            self.update_results_score(edge, squares)
+            self.set_score(player.get_score() + len(squares), player=player)
+        else:
+            self.get_next_player()      # Advance to next player
+        self.batch_moves.append((edge, player, move_no, squares, self.get_move_no()))
+
+
+    def batch_sync(self):
+        """ Update parts from batch mode play, ending batch mode
+        e.g. at the end of the game or when a move is not an auto move
+        """
+        if not self.batch_mode:
+            return
+        
+        self.batch_mode = False
+        for edge, player, move_no, squares, square_move_no in self.batch_moves:
+            edge.turn_on(display=False, player=player, move_no=move_no)
+            for sq in squares:
+                square = self.get_part(type="region", row=sq[0], col=sq[1])
+                square.turn_on(display=False, player=player, move_no=square_move_no)
+                square.set_centered_text(player.label, display=False,
+                                         color=player.color,
+                                         color_bg=player.color_bg)
+        self.batch_moves = []
+        self.command_manager.command_stack.clear()  # Batch moves have no commands
+        self.clear_redo()
+
     def set_move_no(self, move_no):
         self.command_manager.set_move_no(move_no)
 
@@ -1977,6 +2139,15 @@ class SelectPlay:
         if self.board is None:
             return False
         
+        if self.batch_mode:             # Parts are not current - use shadow
+            hv = 0 if edge.sub_type() == 'h' else 1
+            completed = self.board.shadow.get_completed_squares(edge.row, edge.col,
+                                                                 hv, ifadd=ifadd)
+            if squares is not None:
+                for sq in completed:
+                    squares.append(self.get_part(type="region", row=sq[0], col=sq[1]))
+            return len(completed) > 0
+        
         return self.board.is_square_complete(edge, squares=squares, ifadd=ifadd)
 
 
@@ -2017,17 +2188,24 @@ class SelectPlay:
                 3. Make command undo unit
         :edge: updated edge component
         """
-        SlTrace.lg("new_edge player: %s" % self.get_player(), "player_trace")
+        lg(TR_PLAYER_TRACE, lambda: "new_edge player: %s" % self.get_player())
         if not edge.connecteds:
             SlTrace.lg("new_edge id=%d no connecteds" % edge.part_id)
             return
         
+        time_beg = time.perf_counter()
+        prev_player = self.get_player()
+        level = self.get_timing_level(prev_player)
+        if self.batch_mode:
+            self.batch_new_edge(edge, not_move=not_move)
+            self.play_timing.add("new_edge", time.perf_counter()-time_beg,
+                                 level=level)
+            return
+        
         self.disable_moves()                    # Disable input till ready
         self.clear_redo()
-        prev_player = self.get_player()
         self.trace_scores("new_edge:")
-        SlTrace.lg("New edge %s by %s"
-                    % (edge, prev_player), "new_edge")
+        lg(TR_NEW_EDGE, "New edge %s by %s", edge, prev_player)
         self.complete_cmd()                     # Complete current command if one
         prev_selects = self.get_selected_part()
         self.cmd_select(edge)
@@ -2041,7 +2219,7 @@ class SelectPlay:
         self.add_new_parts(edge)
         self.update_score(self.next_move_no(), prev_player, edge)
         self.do_cmd()                               # move complete
-        if SlTrace.trace("selected"):
+        if TR_SELECTED.on:
             self.list_selected("After new_edge")
         self.clear_mods()
 
@@ -2056,24 +2234,25 @@ class SelectPlay:
                 plu = ""
             else:
                 plu = "s" 
-            SlTrace.lg("%d Dot%s Completed" % (nsq, plu), "square")
+            lg(TR_SQUARE, "%d Dot%s Completed", nsq, plu)
         else:
             next_player = self.get_next_player()      # Advance to next player
             if next_player is None:
                 return level
             
-            SlTrace.lg("Next player: %s" % next_player, "player_trace")
-        if SlTrace.trace("selected"):
+            lg(TR_PLAYER_TRACE, "Next player: %s", next_player)
+        if TR_SELECTED.on:
             self.list_selected("After square check")
         if next_player != prev_player:
             scmd = self.get_cmd("new_player")
             scmd.set_new_player(next_player)
             self.do_cmd()
-        if SlTrace.trace("selected"):
+        if TR_SELECTED.on:
             self.list_selected("After next_player set")
         self.enable_moves()
         self.trace_scores("new_edge end:")
-        SlTrace.lg("new_edge END player: %s" % self.get_player(), "player_trace")
+        lg(TR_PLAYER_TRACE, lambda: "new_edge END player: %s" % self.get_player())
+        self.play_timing.add("new_edge", time.perf_counter()-time_beg, level=level)
 
 
     def clear_highlighted(self, parts=None, display=True):
@@ -2208,7 +2387,7 @@ class SelectPlay:
         :prefix: leading text to identify place
                 default: none
         """
-        if not SlTrace.trace("score"):
+        if not TR_SCORE.on:
             return
         
         if prefix is None:
@@ -2227,6 +2406,8 @@ class SelectPlay:
         if self.board is None:
             self.setup_board()
         self.board.reset()
+        self.command_manager.command_stack.clear()  # Parts are reused - no undo into last game
+        self.clear_redo()
         
 
     def reset_score(self):
@@ -2288,7 +2469,7 @@ class SelectPlay:
             squares = [squares]
         prev_score = player.get_score()
         new_score = prev_score + len(squares)
-        SlTrace.lg("prev_score:%d new_score:%d %s" % (prev_score, new_score, player), "score")
+        lg(TR_SCORE, "prev_score:%d new_score:%d %s", prev_score, new_score, player)
         self.set_score(new_score, player=player)
         self.trace_scores("after set_score(%d, %s)" % (new_score, player))
         scmd.add_prev_score(player, prev_score)
@@ -2335,4 +2516,12 @@ class SelectPlay:
         """
         self.board.insert_parts(parts)
         self.set_changed(parts)
+    
+    def set_part_values(self, part, values):
+        """ Set changed part's field values
+        :part: part
+        :values: list of (field name, value)
+        """
+        self.board.set_part_values(part, values)
+        self.set_changed(part)
             
\ No newline at end of file
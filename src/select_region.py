@@ -9,6 +9,11 @@ from select_part import SelectPart
 from select_edge import SelectEdge
 from select_part import color_to_fill
 from select_centered_text import CenteredText        
+from trace_lazy import trace_flag, lg
+
+TR_DISPLAY = trace_flag("display")
+TR_GET_COLOR = trace_flag("get_color")
+TR_REGION_FEW_CORNERS = trace_flag("region_few_corners")
 ###from select_area import SelectArea
         
 class SelectRegion(SelectPart):
@@ -151,7 +156,7 @@ class SelectRegion(SelectPart):
         ###    return
         self.display_clear()
         
-        SlTrace.lg("%s: %s at %s" % (self.part_type, self, str(self.loc)), "display")
+        lg(TR_DISPLAY, lambda: "%s: %s at %s" % (self.part_type, self, str(self.loc)))
         c1x,c1y,c3x,c3y = self.get_rect()
         if self.is_turned_on():
             fill = self.on_color
@@ -161,7 +166,7 @@ class SelectRegion(SelectPart):
             fill = self.color
         if fill is None:
             fill = 'PeachPuff3'
-        SlTrace.lg("region fill=%s" % fill, "get_color")
+        lg(TR_GET_COLOR, "region fill=%s", fill)
         ###self.display_clear()
         if SlTrace.trace("region_rect"):
             SlTrace.lg("region: %d c1x=%d c1y=%d c3x=%d c3y=%d"
@@ -275,7 +280,7 @@ class SelectRegion(SelectPart):
                 if part.is_corner():
                     corners.append(part)
             if len(corners) < 4:
-                SlTrace.lg("Region with %d corners %s" % (len(corners), self), "region_few_corners")
+                lg(TR_REGION_FEW_CORNERS, lambda: "Region with %d corners %s" % (len(corners), self))
                 co = self.loc.coord
                 c1x = co[0][0]
                 c1y = co[0][1]
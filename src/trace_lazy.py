@@ -0,0 +1,107 @@
+# trace_lazy.py
+"""
+Deferred (lazy) trace logging for hot paths
+
+SlTrace.lg("..." % (...), "flag") formats its message, often calling
+str(part), before the flag is checked.  Here the message is formatted
+only if the flag is set:
+    lg(TR_PLAYER, "auto_play player: %s", player)   template and args
+    lg(TR_PLAYER, lambda: "..." + str(part))        callable
+and code can test a flag as an attribute:
+    TR_PLAYER = trace_flag("player_trace")           at module load
+    if TR_PLAYER.on:
+        ...
+
+Flag values are cached in TraceFlag objects.  The SlTrace flag setting
+functions are wrapped, on first use of this module, to refresh the
+cached values whenever flags are changed e.g. by setFlags or the
+TraceControl window.
+"""
+from select_trace import SlTrace
+
+
+class TraceFlag:
+    """ Cached value of a trace flag
+    """
+    flags = {}          # TraceFlag by name
+
+    def __init__(self, name):
+        """ Setup flag, registering it with SlTrace
+        :name: trace flag name
+        """
+        self.name = name
+        self.on = False
+        self.refresh()
+
+
+    def refresh(self):
+        """ Update cached value from SlTrace
+        """
+        self.on = bool(SlTrace.trace(self.name))
+
+
+    def __bool__(self):
+        return self.on
+
+
+    def __str__(self):
+        return "%s=%s" % (self.name, self.on)
+
+
+def trace_flag(name):
+    """ Get cached trace flag
+    :name: trace flag name
+    :returns: TraceFlag, one per name
+    """
+    flag = TraceFlag.flags.get(name)
+    if flag is None:
+        flag = TraceFlag(name)
+        TraceFlag.flags[name] = flag
+    return flag
+
+
+def refresh_trace_flags():
+    """ Update all cached flags from SlTrace
+    """
+    for flag in TraceFlag.flags.values():
+        flag.refresh()
+
+
+def lg(flag, msg, *args):
+    """ Log message if trace flag is set, formatting only then
+    :flag: TraceFlag or flag name
+    :msg: message template, formatted with args by %
+            or callable returning message
+    :args: template arguments
+    """
+    if not isinstance(flag, TraceFlag):
+        flag = trace_flag(flag)
+    if not flag.on:
+        return
+
+    if callable(msg):
+        msg = msg()
+    elif args:
+        msg = msg % args
+    SlTrace.lg(msg, flag.name)
+
+
+def wrap_setter(name):
+    """ Wrap SlTrace flag setting function to refresh cached flags
+    :name: SlTrace function name
+    """
+    setter = getattr(SlTrace, name, None)
+    if setter is None or getattr(setter, "refreshes_trace_flags", False):
+        return
+
+    def set_and_refresh(*args, **kwargs):
+        res = setter(*args, **kwargs)
+        refresh_trace_flags()
+        return res
+
+    set_and_refresh.refreshes_trace_flags = True
+    setattr(SlTrace, name, set_and_refresh)
+
+
+for setter_name in ("setFlags", "setLevel", "setTraceFlag"):
+    wrap_setter(setter_name)